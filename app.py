@@ -1,12 +1,22 @@
-import streamlit as st
-import pycountry as pc
-import plotly.graph_objects as go
+import copy
+import os
+from datetime import datetime, timedelta
+
 import folium
+import plotly.graph_objects as go
+import pycountry as pc
+import streamlit as st
 from streamlit_folium import st_folium
-from wildfire_risk_dashboard.src.wildfire_risk_dashboard import utils
-import wildfire_risk_dashboard.src.wildfire_risk_dashboard.wildfire_risk_dashboard as wrd
+
+from wildfire_risk_dashboard.src.wildfire_risk_dashboard import metrics, pipeline, tiles, utils
+from wildfire_risk_dashboard.src.wildfire_risk_dashboard.results import RiskResult
 
 # --- Helper Functions ---
+# Every widget interaction reruns this script, so rendered figures and maps are memoized by their inputs.
+# cache_data hands each caller its own copy, since a session may modify the figure it is given.
+RENDER_CACHE_ENTRIES = 256
+
+@st.cache_data(max_entries=RENDER_CACHE_ENTRIES, show_spinner=False)
 def display_risk_gauge(score):
     # Determine color based on risk level
     if score < 33:
@@ -41,7 +51,13 @@ def display_risk_gauge(score):
     return fig
 
 
-def display_map(lat, lon, radius):
+def display_map(lat, lon, radius, tileUrl=None):
+    # Folium maps do not pickle, so the shared map is cached as a resource and each session gets a copy
+    return copy.deepcopy(build_map(lat, lon, radius, tileUrl))
+
+
+@st.cache_resource(max_entries=RENDER_CACHE_ENTRIES, show_spinner=False)
+def build_map(lat, lon, radius, tileUrl=None):
     # Ensure radius is a float to prevent scaling bugs
     radiusMeters = float(radius)
     
@@ -68,9 +84,99 @@ def display_map(lat, lon, radius):
         popup=f"{radius}m Assessment Area"
     ).add_to(m)
 
+    # Risk heatmap over the whole neighbourhood, rendered tile by tile
+    if tileUrl:
+        folium.TileLayer(
+            tiles=tileUrl,
+            attr="Wildfire risk",
+            name="Risk Heatmap",
+            overlay=True,
+            opacity=0.6,
+            min_zoom=tiles.TILE_MIN_ZOOM
+        ).add_to(m)
+        folium.LayerControl().add_to(m)
+
     return m
 
 
+# Address browsers reach the tile server at. Tiles are fetched by the browser, not by this process,
+# so a server-local address such as 127.0.0.1 only works when both run on the same machine.
+TILE_SERVER_URL = os.getenv("TILE_SERVER_URL")
+
+@st.cache_resource
+def get_tile_url():
+    # One tile server per process, shared by every session; None when browsers have no address to reach it at
+    if not TILE_SERVER_URL:
+        return None
+    tiles.start_tile_server(port=int(os.getenv("TILE_SERVER_PORT", "0")))
+    return f"{TILE_SERVER_URL.rstrip('/')}/tiles/{{z}}/{{x}}/{{y}}.png"
+
+
+@st.cache_data(max_entries=RENDER_CACHE_ENTRIES, show_spinner=False)
+def display_forecast_chart(timeline):
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=timeline["time"], y=timeline["riskScore"], mode="lines", name="Risk",
+                             line={'color': "#e74c3c", 'width': 3}))
+    fig.add_trace(go.Scatter(x=timeline["time"], y=timeline["weatherScore"], mode="lines", name="Weather",
+                             line={'color': "#f39c12", 'dash': "dot"}))
+
+    # Highlight the peak-risk window; its end is the start of the last hour, so shade through that hour
+    peakWindow = timeline["peakWindow"]
+    if peakWindow:
+        fig.add_vrect(
+            x0=peakWindow["start"], x1=datetime.fromisoformat(peakWindow["end"]) + timedelta(hours=1),
+            fillcolor="rgba(231, 76, 60, 0.2)", line_width=0,
+            annotation_text=f"Peak: {peakWindow['riskScore']}%", annotation_position="top left"
+        )
+
+    fig.update_layout(height=300, margin=dict(l=20, r=20, t=30, b=20), yaxis={'range': [0, 100], 'title': "Score (%)"},
+                      xaxis={'title': "Time (UTC)"}, legend={'orientation': "h"})
+    return fig
+
+
+# --- Stage Caches ---
+# Process-wide, so every session shares them. Each stage is keyed only by the inputs it depends on,
+# so moving the radius slider recomputes fuel and slope but reuses the geocode and the weather.
+WEATHER_CACHE_TTL = 600 # OpenWeatherMap refreshes current conditions about every 10 minutes
+SATELLITE_CACHE_TTL = 24 * 60 * 60
+GEOCODE_CACHE_TTL = 24 * 60 * 60
+
+@st.cache_data(ttl=GEOCODE_CACHE_TTL, show_spinner=False)
+def get_cached_geo_coordinates(zipCode, countryCode):
+    # grab_coordinates raises on a failed lookup, and exceptions are not cached, so the next click retries it
+    location, geocodeSource = utils.geocode_location(zipCode, countryCode)
+    return *utils.grab_coordinates(location), geocodeSource
+
+
+@st.cache_data(ttl=WEATHER_CACHE_TTL, show_spinner=False)
+def run_cached_weather_stage(lat, lon):
+    return pipeline.run_weather_stage(lat, lon, None)
+
+
+@st.cache_data(ttl=SATELLITE_CACHE_TTL, show_spinner=False)
+def run_cached_fuel_stage(lat, lon, radius):
+    return pipeline.run_fuel_stage(lat, lon, radius)
+
+
+@st.cache_data(ttl=SATELLITE_CACHE_TTL, show_spinner=False)
+def run_cached_slope_stage(lat, lon, radius):
+    return pipeline.run_slope_stage(lat, lon, radius)
+
+
+@st.cache_data(ttl=WEATHER_CACHE_TTL, show_spinner=False)
+def run_cached_forecast(lat, lon, radius):
+    # Shares the cached fuel and slope stages, so the timeline costs one forecast request
+    stages = {"fuel": run_cached_fuel_stage, "slope": run_cached_slope_stage}
+    return pipeline.assess_forecast(lat, lon, radius, stages=stages)
+
+
+CACHED_STAGES = {
+    "weather": lambda lat, lon, radius: run_cached_weather_stage(lat, lon),
+    "fuel": run_cached_fuel_stage,
+    "slope": run_cached_slope_stage
+}
+
+
 # --- Page Configuration ---
 st.set_page_config(page_title="Wildfire Risk Assessment", page_icon="🔥", layout="wide")
 st.title("🔥 Wildfire Risk Assessment")
@@ -103,11 +209,37 @@ with st.sidebar:
 
     radius = st.slider("Assessment Radius (meters)", 10, 500, 30)
 
+    heatmapMode = st.toggle(
+        "Risk Heatmap", disabled=not TILE_SERVER_URL,
+        help="Overlay risk tiles for the surrounding area on the map" if TILE_SERVER_URL
+        else "Set TILE_SERVER_URL to the tile server's public address to enable the heatmap"
+    )
+
+    forecastMode = st.toggle("Forecast Mode", help="Also show the hourly risk timeline for the next 48 hours")
+
     calculateButton = st.button("Calculate Risk Score", type="primary")
 
+    # Stage timings and counters, only recorded when WILDFIRE_METRICS=1
+    if metrics.ENABLED:
+        with st.expander("⏱️ Performance Metrics"):
+            metricsData = metrics.export_json()
+            st.dataframe(
+                [{"stage": stage, **stats} for stage, stats in sorted(metricsData["stages"].items())],
+                hide_index=True
+            )
+            st.dataframe(
+                [{"cache": cache, **stats} for cache, stats in sorted(metricsData["caches"].items())],
+                hide_index=True
+            )
+            st.download_button("Download Prometheus metrics", metrics.export_prometheus(), file_name="metrics.prom")
+
 # --- Initialize Session State ---
 if "risk_results" not in st.session_state:
     st.session_state.risk_results = None
+if "reused_components" not in st.session_state:
+    st.session_state.reused_components = {}
+if "forecast_results" not in st.session_state:
+    st.session_state.forecast_results = None
 
 # --- Main App Logic ---
 if calculateButton:
@@ -120,47 +252,33 @@ if calculateButton:
                     # Use Direct Inputs
                     latitude, longitude = latInput, lonInput
                     name = locationName
+                    source = "coordinates"
+                    geocodeSource = None
                 else:
                     # Get Geo-Coordinates
-                    geoData = utils.get_geo_coordinates(zipCode, countryCode)
-                    latitude, longitude = utils.grab_coordinates(geoData)
-
-                # Weather Processing
-                weatherData = utils.get_weather_data(latitude, longitude)
-                tempScore = wrd.normalize_temperature(weatherData)
-                humidityScore = wrd.normalize_humidity(weatherData)
-                windScore = wrd.normalize_wind_speed(weatherData)
-                weatherScore = wrd.calculate_weather_score(tempScore, humidityScore, windScore)
-
-                # Fuel/NDVI Processing
-                try:
-                    ndvi = utils.get_ndvi(latitude, longitude, radius)
-                    fuelScore = wrd.normalize_fuel(ndvi) # normalizing NDVI
-                except utils.SatelliteDataError as e:
-                    st.warning(f"⚠️ Fuel Risk Unavailable: {e}")
-                    fuelScore = None
-
-                # Topograpgy Processing
-                neighboringCoords = wrd.get_neighboring_coords(latitude, longitude, radius)
-                elevationData = utils.get_elevation_data(neighboringCoords)
-                elevations = wrd.grab_elevations(elevationData)
-                slope = wrd.get_steepness(elevations, neighboringCoords)
-                slopeScore = wrd.normalize_slope(slope)
-
-                # Final Calculation
-                riskScore = wrd.calculate_risk_score(weatherScore, fuelScore, slopeScore)
+                    latitude, longitude, geocodeSource = get_cached_geo_coordinates(
+                        zipCode.strip(), countryCode.strip().upper()
+                    )
+                    source = "geocode"
+
+                # Weather, Fuel/NDVI and Topography are fetched concurrently; cached stages return immediately
+                assessment = pipeline.assess_location(latitude, longitude, radius, stages=CACHED_STAGES)
+                if assessment["fuelError"]:
+                    st.warning(f"⚠️ Fuel Risk Unavailable: {assessment['fuelError']}")
 
                 # Save everything to session state
-                st.session_state.risk_results = {
-                    "riskScore": riskScore,
-                    "weatherScore": weatherScore,
-                    "fuelScore": fuelScore,
-                    "slopeScore": slopeScore,
-                    "lat": latitude,
-                    "lon": longitude,
-                    "radius": radius
-                }
+                # The zip and country fields keep their last values in coordinates mode, so only a geocode records them
+                geocoded = source == "geocode"
+                st.session_state.risk_results = RiskResult.from_assessment(
+                    assessment, zip=zipCode if geocoded else None, country=countryCode if geocoded else None,
+                    radius=radius, source=source, geocodeSource=geocodeSource
+                )
+                st.session_state.reused_components = assessment["reused"]
 
+                # Hourly timeline; fuel and slope come from the stage caches filled above
+                st.session_state.forecast_results = (
+                    run_cached_forecast(latitude, longitude, radius) if forecastMode else None
+                )
                 
                 
         except Exception as e:
@@ -169,13 +287,13 @@ if calculateButton:
 # Persistent display logic
 if st.session_state.risk_results:
     results = st.session_state.risk_results
-    riskScore = results["riskScore"]
-    weatherScore = results["weatherScore"]
-    fuelScore = results["fuelScore"]
-    slopeScore = results["slopeScore"]
-    latitude = results["lat"]
-    longitude = results["lon"]
-    radius = results["radius"]
+    riskScore = results.riskScore
+    weatherScore = results.weatherScore
+    fuelScore = results.fuelScore
+    slopeScore = results.slopeScore
+    latitude = results.lat
+    longitude = results.lon
+    radius = results.radius
 
     if riskScore >= 66:
         st.error(f"### CURRENT RISK: HIGH ({riskScore}%)")
@@ -202,7 +320,10 @@ if st.session_state.risk_results:
     with col2:
         st.subheader("Assessment Area")
         # Display the interactive map
-        st_folium(display_map(latitude, longitude, radius), height=300, width=None, key="assesment_map")
+        tileUrl = get_tile_url() if heatmapMode else None
+        # Nothing is read back from the map, so panning and zooming stay in the browser instead of triggering reruns
+        st_folium(display_map(latitude, longitude, radius, tileUrl), height=300, width=None, key="assesment_map",
+                  returned_objects=[])
 
         st.write("---")
         st.subheader("Factor Breakdown")
@@ -214,7 +335,7 @@ if st.session_state.risk_results:
         # Fuel Progress
         if fuelScore == None:
             st.write("🌿 Fuel: Currently Unavailable")
-            st.warning(f"⚠️ Fuel Risk Unavailable: {utils.SatelliteDataError}")
+            st.warning(f"⚠️ Fuel Risk Unavailable: {results.fuelError or utils.SatelliteDataError}")
         else:
             st.write(f"🌿 Fuel: {fuelScore}%")
             st.progress(fuelScore / 100)
@@ -222,5 +343,25 @@ if st.session_state.risk_results:
         # Slope Progress
         st.write(f"⛰️ Slope: {slopeScore}%")
         st.progress(slopeScore / 100)
+
+        # Components reused from nearby assessments (REUSE_ENABLED=1)
+        if st.session_state.reused_components:
+            st.caption("Reused from nearby results: " + ", ".join(
+                f"{name} ({info['distance']} m away, {info['mode']})"
+                for name, info in st.session_state.reused_components.items()
+            ))
+
+    # Forecast Timeline
+    if st.session_state.forecast_results:
+        timeline = st.session_state.forecast_results
+        peakWindow = timeline["peakWindow"]
+        st.write("---")
+        st.subheader("Risk Forecast")
+        st.plotly_chart(display_forecast_chart(timeline), width='stretch')
+        if peakWindow:
+            st.caption(f"Peak risk of {peakWindow['riskScore']}% expected "
+                       f"from {peakWindow['start']} to {peakWindow['end']} UTC.")
+        else:
+            st.caption("No forecast hours are available for this location.")
 else:
     st.info("Enter a location on the left and click 'Calculate Risk' to begin.")
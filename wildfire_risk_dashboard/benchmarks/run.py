@@ -0,0 +1,280 @@
+"""
+Offline benchmark suite.
+
+Measures the pure scoring functions, single assessments and bulk.score_file runs at several concurrency levels
+against the local provider stand-ins, and writes the results as JSON so runs can be compared for
+regressions. Run from the wildfire_risk_dashboard directory:
+
+    python -m benchmarks.run --output bench.json
+"""
+
+# Imports
+import argparse
+import csv
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+from src.wildfire_risk_dashboard import bulk, utils
+from src.wildfire_risk_dashboard import wildfire_risk_dashboard as wrd
+
+from benchmarks.standins import ProviderProfile, standin_providers
+
+
+def summarize_latencies(latencies):
+    """
+    Returns count, mean and p50/p95/p99/max of a list of latencies, in milliseconds.
+
+    :param latencies: latencies in seconds
+    """
+
+    latencies = np.asarray(latencies, dtype=float) * 1000
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        "count": int(latencies.size),
+        "meanMs": round(float(latencies.mean()), 3),
+        "p50Ms": round(float(p50), 3),
+        "p95Ms": round(float(p95), 3),
+        "p99Ms": round(float(p99), 3),
+        "maxMs": round(float(latencies.max()), 3)
+    }
+
+
+def best_of(function, repeats):
+    """
+    Returns the fastest wall-clock time in seconds of several calls to function.
+
+    :param function: function to time
+    :param repeats: number of calls
+    """
+
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def make_locations(count):
+    """
+    Returns a repeatable mix of location rows: US zips (OWM path), Brazilian zips (Google fallback) and coordinates.
+
+    :param count: number of rows
+    """
+
+    locations = []
+    for index in range(count):
+        if index % 3 == 0:
+            locations.append({"id": str(index), "zip": f"{57100 + index % 50}", "country": "US"})
+        elif index % 3 == 1:
+            locations.append({"id": str(index), "zip": f"{69400 + index % 50}-000", "country": "BR"})
+        else:
+            locations.append({"id": str(index), "lat": 43.5 + (index % 97) * 0.01, "lon": -96.7 - (index % 89) * 0.01})
+    return locations
+
+
+#################################################################################
+
+# --- Benchmarks ---
+
+def bench_scoring(points, repeats):
+    """
+    Returns per-point timings of the scalar scorers against the batch kernel.
+
+    :param points: number of synthetic points to score
+    :param repeats: timing repeats (the best is kept)
+    """
+
+    rng = np.random.default_rng(0)
+    temps = rng.uniform(263, 313, points)
+    humidities = rng.uniform(5, 95, points)
+    windSpeeds = rng.uniform(0, 15, points)
+    ndvis = rng.uniform(-0.2, 0.9, points)
+    slopes = rng.uniform(0, 40, points)
+    # The scalar path gets plain Python floats, as it would from parsed JSON
+    weatherDataList = [
+        {"main": {"temp": temp, "humidity": humidity}, "wind": {"speed": windSpeed}}
+        for temp, humidity, windSpeed in zip(temps.tolist(), humidities.tolist(), windSpeeds.tolist(), strict=True)
+    ]
+    ndviList = ndvis.tolist()
+    slopeList = slopes.tolist()
+
+    def score_scalar():
+        for weatherData, ndvi, slope in zip(weatherDataList, ndviList, slopeList, strict=True):
+            weatherScore = wrd.calculate_weather_score(
+                wrd.normalize_temperature(weatherData), wrd.normalize_humidity(weatherData),
+                wrd.normalize_wind_speed(weatherData)
+            )
+            wrd.calculate_risk_score(weatherScore, wrd.normalize_fuel(ndvi), wrd.normalize_slope(slope))
+
+    def score_batch():
+        wrd.score_batch(temps, humidities, windSpeeds, ndvis, slopes)
+
+    scalarSeconds = best_of(score_scalar, repeats)
+    batchSeconds = best_of(score_batch, repeats)
+    return {
+        "points": points,
+        "scalarNsPerPoint": round(scalarSeconds / points * 1e9, 1),
+        "batchNsPerPoint": round(batchSeconds / points * 1e9, 1),
+        "speedup": round(scalarSeconds / batchSeconds, 1)
+    }
+
+
+def bench_single(assessments, radius):
+    """
+    Returns the latency distribution of one-at-a-time assessments (geocode + weather/NDVI/slope).
+
+    :param assessments: number of sequential assessments
+    :param radius: assessment radius in meters
+    """
+
+    latencies = []
+    errors = 0
+    for location in make_locations(assessments):
+        start = time.perf_counter()
+        result = bulk.score_location(location, radius)
+        latencies.append(time.perf_counter() - start)
+        errors += result.error is not None
+    return {**summarize_latencies(latencies), "errors": errors}
+
+
+def write_locations(path, locations):
+    """
+    Writes location rows to a CSV file that bulk.score_file can read.
+
+    :param path: CSV file to write
+    :param locations: rows from make_locations
+    """
+
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.DictWriter(file, fieldnames=["id", "zip", "country", "lat", "lon"])
+        writer.writeheader()
+        writer.writerows(locations)
+
+
+def bench_bulk(rows, concurrencyLevels, radius, windowSize=20):
+    """
+    Returns throughput and window latency distribution of bulk.score_file at each concurrency level,
+    reading a CSV of locations and writing a CSV of results as a real run does.
+
+    :param rows: rows scored per level
+    :param concurrencyLevels: list of worker counts
+    :param radius: assessment radius in meters
+    :param windowSize: rows scored together (one NDVI and one elevation batch per window)
+    """
+
+    levels = []
+    scoreWindow = bulk.score_window
+    with tempfile.TemporaryDirectory() as directory:
+        inputPath = os.path.join(directory, "locations.csv")
+        write_locations(inputPath, make_locations(rows))
+
+        for concurrency in concurrencyLevels:
+            latencies = []
+            outputPath = os.path.join(directory, f"scores-{concurrency}.csv")
+
+            def timed_window(window, defaultRadius, executor, latencies=latencies):
+                start = time.perf_counter()
+                results = scoreWindow(window, defaultRadius, executor)
+                latencies.append(time.perf_counter() - start)
+                return results
+
+            # score_file looks score_window up for every window, so the timing wrapper sees each one
+            bulk.score_window = timed_window
+            try:
+                start = time.perf_counter()
+                bulk.score_file(inputPath, outputPath, concurrency=concurrency, windowSize=windowSize,
+                                defaultRadius=radius)
+                elapsed = time.perf_counter() - start
+            finally:
+                bulk.score_window = scoreWindow
+
+            with open(outputPath, newline="", encoding="utf-8") as file:
+                errors = sum(bool(row["error"]) for row in csv.DictReader(file))
+            levels.append({
+                "concurrency": concurrency,
+                "rowsPerSecond": round(rows / elapsed, 2),
+                "errors": errors,
+                **summarize_latencies(latencies)
+            })
+    return levels
+
+
+def run_benchmarks(points=10_000, assessments=20, rows=60, concurrencyLevels=(1, 4, 16), latency=0.05,
+                   jitter=0.02, errorRate=0.0, useCaches=False, radius=30, repeats=5, seed=0):
+    """
+    Runs every benchmark and returns a JSON-serializable dictionary of results.
+
+    :param points: points for the scoring microbenchmark
+    :param assessments: sequential single assessments
+    :param rows: rows per bulk concurrency level
+    :param concurrencyLevels: bulk worker counts
+    :param latency: stand-in latency per provider call in seconds
+    :param jitter: stand-in latency jitter in seconds
+    :param errorRate: fraction of provider calls that fail
+    :param useCaches: run with the geocode/weather/NDVI caches enabled
+    :param radius: assessment radius in meters
+    :param repeats: timing repeats for the microbenchmark
+    :param seed: random seed for the stand-ins
+    """
+
+    config = {
+        "points": points, "assessments": assessments, "rows": rows, "concurrencyLevels": list(concurrencyLevels),
+        "latency": latency, "jitter": jitter, "errorRate": errorRate, "useCaches": useCaches, "radius": radius
+    }
+    results = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "config": config,
+        "scoring": bench_scoring(points, repeats)
+    }
+
+    profile = ProviderProfile(latency=latency, jitter=jitter, errorRate=errorRate, seed=seed)
+    with standin_providers(utils, profile, useCaches=useCaches):
+        results["single"] = bench_single(assessments, radius)
+        results["bulk"] = bench_bulk(rows, concurrencyLevels, radius)
+
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the offline wildfire risk benchmarks.")
+    parser.add_argument("--points", type=int, default=10_000, help="points for the scoring microbenchmark")
+    parser.add_argument("--assessments", type=int, default=20, help="sequential single assessments")
+    parser.add_argument("--rows", type=int, default=60, help="rows per bulk concurrency level")
+    parser.add_argument("--concurrency", default="1,4,16", help="comma-separated bulk worker counts")
+    parser.add_argument("--latency", type=float, default=0.05, help="stand-in latency per call (seconds)")
+    parser.add_argument("--jitter", type=float, default=0.02, help="stand-in latency jitter (seconds)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of provider calls that fail")
+    parser.add_argument("--caches", action="store_true", help="enable the geocode/weather/NDVI caches")
+    parser.add_argument("--output", help="write JSON results to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(
+        points=args.points,
+        assessments=args.assessments,
+        rows=args.rows,
+        concurrencyLevels=[int(level) for level in args.concurrency.split(",")],
+        latency=args.latency,
+        jitter=args.jitter,
+        errorRate=args.error_rate,
+        useCaches=args.caches
+    )
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""
+Local stand-ins for the data providers, so benchmarks run offline and repeatably.
+
+OpenWeatherMap, Open-Meteo and Google Geocoding are served over HTTP by a threaded local server that
+replays the recorded payloads in fixtures/. Earth Engine has no HTTP surface we call directly, so it is
+replaced by in-process fakes of utils.request_ndvi and utils.request_ndvi_batch. Every stand-in adds
+the configured latency and fails the configured fraction of calls (503 over HTTP, an exception for
+Earth Engine).
+"""
+
+# Imports
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from src.wildfire_risk_dashboard.cache import GeocodeCache, NdviCache, WeatherCache
+
+# Global Variables
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def load_fixture(name):
+    """
+    Returns a recorded provider response from the fixtures directory.
+
+    :param name: fixture file name without the .json extension
+    """
+
+    with open(os.path.join(FIXTURE_DIR, f"{name}.json"), encoding="utf-8") as file:
+        return json.load(file)
+
+
+class ProviderProfile:
+    """
+    Latency and error-injection settings shared by all stand-ins.
+    """
+
+    def __init__(self, latency=0.05, jitter=0.02, errorRate=0.0, seed=None):
+        """
+        :param latency: mean added latency per call in seconds
+        :param jitter: +/- uniform jitter around the latency in seconds
+        :param errorRate: fraction of calls that fail (0-1)
+        :param seed: optional random seed for repeatable runs
+        """
+
+        self.latency = latency
+        self.jitter = jitter
+        self.errorRate = errorRate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """
+        Sleeps for one call's latency and returns True when the call should fail.
+        """
+
+        with self._lock:
+            delay = max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+            fail = self._random.random() < self.errorRate
+        time.sleep(delay)
+        return fail
+
+
+#################################################################################
+
+# --- HTTP Stand-ins ---
+
+def get_standin_elevation(lat, lon):
+    """
+    Returns a synthetic elevation for the stand-in Open-Meteo endpoint (a gently tilted plane).
+
+    :param lat: latitude
+    :param lon: longitude
+    """
+
+    return round(440 + 900 * (lat - 43.5) + 600 * (lon + 96.7), 1)
+
+
+def make_handler(profile):
+    """
+    Returns a request handler class that serves the recorded payloads with the given profile.
+
+    :param profile: ProviderProfile used for every request
+    """
+
+    owmGeocode = load_fixture("owm_geocode")
+    owmWeather = load_fixture("owm_weather")
+    googleGeocode = load_fixture("google_geocode")
+
+    class ProviderHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1" # Keep-alive, like the real providers
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = {key: values[0] for key, values in parse_qs(url.query).items()}
+
+            if profile.wait():
+                return self.send_json(503, {"cod": 503, "message": "Injected error"})
+
+            if url.path == "/geo/1.0/zip":
+                zipCode, _, countryCode = query.get("zip", "").partition(",")
+                # A Brazilian postal code gets a country-only name, which forces the Google fallback
+                name = "Brazil" if countryCode.upper() == "BR" else owmGeocode["name"]
+                return self.send_json(200, {**owmGeocode, "zip": zipCode, "name": name,
+                                            "country": countryCode.upper()})
+
+            if url.path == "/data/2.5/weather":
+                return self.send_json(200, owmWeather)
+
+            if url.path == "/v1/elevation":
+                lats = [float(value) for value in query["latitude"].split(",")]
+                lons = [float(value) for value in query["longitude"].split(",")]
+                elevations = [get_standin_elevation(*point) for point in zip(lats, lons, strict=True)]
+                return self.send_json(200, {"elevation": elevations})
+
+            if url.path == "/maps/api/geocode/json":
+                return self.send_json(200, googleGeocode)
+
+            return self.send_json(404, {"message": "Unknown endpoint"})
+
+        def send_json(self, status, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass # Keep benchmark output clean
+
+    return ProviderHandler
+
+
+#################################################################################
+
+# --- Earth Engine Stand-ins ---
+
+def make_ndvi_fakes(profile, utils):
+    """
+    Returns fake (request_ndvi, request_ndvi_batch) functions that replay the recorded NDVI.
+    A batch pays the latency once, like the single server-side reduceRegions it replaces.
+
+    :param profile: ProviderProfile used for every call
+    :param utils: the utils module (for SatelliteDataError)
+    """
+
+    fixture = load_fixture("earth_engine_ndvi")
+    noDataRandom = random.Random(0)
+    noDataLock = threading.Lock()
+
+    def has_data():
+        with noDataLock:
+            return noDataRandom.random() >= fixture["noDataRate"]
+
+    def fake_request_ndvi(lat, lon, radius, compositeStart=None):
+        if profile.wait():
+            raise RuntimeError("Injected Earth Engine error")
+        if not has_data():
+            raise utils.SatelliteDataError(utils.NO_SATELLITE_DATA_MESSAGE)
+        return fixture["NDVI"]
+
+    def fake_request_ndvi_batch(points, compositeStart=None):
+        if profile.wait():
+            raise RuntimeError("Injected Earth Engine error")
+        return [fixture["NDVI"] if has_data() else None for _ in points]
+
+    return fake_request_ndvi, fake_request_ndvi_batch
+
+
+@contextmanager
+def standin_providers(utils, profile, useCaches=False):
+    """
+    Points utils at local stand-ins for every provider for the duration of the block.
+
+    :param utils: the utils module to patch
+    :param profile: ProviderProfile with latency and error settings
+    :param useCaches: keep the geocode/weather/NDVI caches (fresh, in a temporary directory) instead of disabling them
+    """
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(profile))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    baseUrl = f"http://127.0.0.1:{server.server_address[1]}"
+
+    fakeNdvi, fakeNdviBatch = make_ndvi_fakes(profile, utils)
+    cacheDir = tempfile.TemporaryDirectory()
+    patches = {
+        "OPENWEATHER_BASE_URL": baseUrl,
+        "OPEN_METEO_BASE_URL": baseUrl,
+        "GOOGLE_MAPS_BASE_URL": baseUrl,
+        "HTTP_BACKOFF_BASE": 0.01,
+        "demTileStore": None,
+        "postalIndex": None,
+        "request_ndvi": fakeNdvi,
+        "request_ndvi_batch": fakeNdviBatch,
+        "get_latest_composite_start": lambda: date.today() - timedelta(days=20),
+        "geocodeCache": GeocodeCache(path=os.path.join(cacheDir.name, "geocode.sqlite")) if useCaches else None,
+        "weatherCache": WeatherCache() if useCaches else None,
+        "ndviCache": NdviCache(path=os.path.join(cacheDir.name, "ndvi.sqlite")) if useCaches else None
+    }
+    originals = {name: getattr(utils, name) for name in patches}
+    originalRateLimit = utils.ratelimit.ENABLED
+    originalKeys = {name: os.environ.get(name) for name in ("OPENWEATHER_API_KEY", "GOOGLECLOUD_API_KEY")}
+
+    for name, value in patches.items():
+        setattr(utils, name, value)
+    utils.ratelimit.ENABLED = False # The stand-ins have no quota to respect
+    os.environ["OPENWEATHER_API_KEY"] = "benchmark"
+    os.environ["GOOGLECLOUD_API_KEY"] = "AIza-benchmark" # googlemaps validates the key prefix
+    utils.reset_provider_clients()
+
+    try:
+        yield baseUrl
+    finally:
+        server.shutdown()
+        server.server_close()
+        for name, value in originals.items():
+            setattr(utils, name, value)
+        utils.ratelimit.ENABLED = originalRateLimit
+        for name, value in originalKeys.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        utils.reset_provider_clients()
+        cacheDir.cleanup()
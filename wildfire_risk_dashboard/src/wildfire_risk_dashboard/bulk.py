@@ -0,0 +1,409 @@
+"""
+Bulk scoring of location files.
+
+Locations are streamed from a CSV or Parquet file one window at a time and appended to a CSV or
+Parquet output as each window finishes, so memory use does not grow with the size of the input.
+Each window is geocoded and given current weather with bounded concurrency, then its NDVI and
+elevations are fetched with one batch request each and scored in one vectorized pass. Each window's
+results are held column by column in a RiskResultBatch (see results.py). Rows whose id is
+already scored in the output are skipped, which lets an interrupted run resume where it stopped.
+"""
+
+# Imports
+import csv
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+import numpy as np
+
+from . import pipeline, utils
+from . import wildfire_risk_dashboard as wrd
+from .results import RESULT_COLUMNS, RiskResult, RiskResultBatch, get_arrow_schema, import_pyarrow
+
+# Global Variables
+PARQUET_PART_PATTERN = re.compile(r"^part-(\d+)\.parquet$")
+
+
+def get_file_format(path, fileFormat=None):
+    """
+    Returns "csv" or "parquet" for a path, using the explicit format when given and the extension otherwise.
+
+    :param path: file path
+    :param fileFormat: explicit format, or None
+    """
+
+    fileFormat = (fileFormat or os.path.splitext(path)[1].lstrip(".")).lower()
+    if fileFormat == "pq":
+        fileFormat = "parquet"
+    if fileFormat not in ("csv", "parquet"):
+        raise ValueError(f"Unsupported file format '{fileFormat}' (use csv or parquet).")
+    return fileFormat
+
+
+#################################################################################
+
+# --- Input ---
+
+def read_locations(path, fileFormat=None):
+    """
+    Yields location rows as dictionaries, streaming the file rather than loading it.
+    Rows without an "id" column are given their 0-based position in the file as id.
+
+    :param path: CSV or Parquet file with zip/country or lat/lon columns (plus an optional radius)
+    :param fileFormat: "csv" or "parquet" (defaults to the file extension)
+    """
+
+    if get_file_format(path, fileFormat) == "csv":
+        with open(path, newline="", encoding="utf-8") as file:
+            rows = csv.DictReader(file)
+            for index, row in enumerate(rows):
+                yield normalize_location_row(row, index)
+    else:
+        _, parquet = import_pyarrow()
+        index = 0
+        for batch in parquet.ParquetFile(path).iter_batches():
+            for row in batch.to_pylist():
+                yield normalize_location_row(row, index)
+                index += 1
+
+
+def normalize_location_row(row, index):
+    """
+    Returns a location row with lower-cased column names, empty values as None and a string id.
+
+    :param row: dictionary read from the input file
+    :param index: position of the row in the file
+    """
+
+    location = {}
+    for key, value in row.items():
+        if isinstance(value, str):
+            value = value.strip() or None
+        location[key.strip().lower()] = value
+
+    location["id"] = str(location["id"]) if location.get("id") is not None else str(index)
+    return location
+
+
+#################################################################################
+
+# --- Output ---
+
+class CsvResultWriter:
+    """
+    Appends results to a CSV file, writing the header only when the file is new.
+    When appending, the existing header is kept, so files from older versions keep their columns.
+    """
+
+    def __init__(self, path, append=False):
+        """
+        :param path: output file
+        :param append: keep existing rows (for resuming) instead of overwriting them
+        """
+
+        fieldnames = RESULT_COLUMNS
+        writeHeader = not (append and os.path.exists(path) and os.path.getsize(path) > 0)
+        if not writeHeader:
+            with open(path, newline="", encoding="utf-8") as file:
+                fieldnames = next(csv.reader(file))
+
+        self.file = open(path, "a" if append else "w", newline="", encoding="utf-8")
+        self.writer = csv.DictWriter(self.file, fieldnames=fieldnames, extrasaction="ignore")
+        if writeHeader:
+            self.writer.writeheader()
+
+    def write(self, batch):
+        self.writer.writerows(batch.to_rows())
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetResultWriter:
+    """
+    Writes results to a Parquet dataset: a directory with one finished part file per window
+    (part-00000.parquet, part-00001.parquet, ...), readable as one table with pyarrow.parquet.read_table.
+    Each part is written under a hidden name and renamed once complete, so every finished window
+    survives a crash, and resuming only adds parts. A single-file output from an older version is
+    moved into the directory as its first part, with missing columns filled with nulls.
+    """
+
+    def __init__(self, path, append=False):
+        """
+        :param path: output directory
+        :param append: keep existing parts (for resuming) instead of removing them
+        """
+
+        self.pyarrow, self.parquet = import_pyarrow()
+        self.path = path
+        self.schema = get_arrow_schema(self.pyarrow)
+
+        legacyTable = None
+        if os.path.isfile(path):
+            if append:
+                legacyTable = self.conform(self.parquet.read_table(path))
+            os.remove(path)
+        os.makedirs(path, exist_ok=True)
+
+        for name in os.listdir(path):
+            if name.startswith(".") or (not append and PARQUET_PART_PATTERN.match(name)):
+                os.remove(os.path.join(path, name)) # Unfinished parts, or an output being overwritten
+
+        self.nextPart = max((int(match.group(1)) + 1 for match in map(PARQUET_PART_PATTERN.match, os.listdir(path))
+                             if match), default=0)
+        if legacyTable is not None:
+            self.write_table(legacyTable)
+
+    def conform(self, table):
+        # Columns added since the table was written are filled with nulls
+        return self.pyarrow.Table.from_arrays([
+            table.column(field.name) if field.name in table.schema.names
+            else self.pyarrow.nulls(table.num_rows, field.type)
+            for field in self.schema
+        ], schema=self.schema)
+
+    def write_table(self, table):
+        partPath = os.path.join(self.path, f"part-{self.nextPart:05d}.parquet")
+        tempPath = os.path.join(self.path, f".part-{self.nextPart:05d}.parquet.partial")
+        self.parquet.write_table(table, tempPath)
+        os.replace(tempPath, partPath)
+        self.nextPart += 1
+
+    def write(self, batch):
+        if len(batch):
+            self.write_table(batch.to_arrow())
+
+    def close(self):
+        pass # Every part is complete as soon as it is written
+
+
+def read_scored_ids(path, fileFormat=None):
+    """
+    Returns the set of ids already scored successfully in an output (empty if it does not exist).
+    Rows that failed (a non-empty "error") are left out so that resuming retries them; the retried
+    row is appended, and the last row of an id is the current one.
+
+    :param path: output file (or Parquet dataset directory)
+    :param fileFormat: "csv" or "parquet" (defaults to the file extension)
+    """
+
+    if not os.path.exists(path) or (os.path.isfile(path) and os.path.getsize(path) == 0):
+        return set()
+
+    if get_file_format(path, fileFormat) == "csv":
+        latestErrors = {}
+        with open(path, newline="", encoding="utf-8") as file:
+            for row in csv.DictReader(file):
+                latestErrors[row["id"]] = row.get("error")
+        return {rowId for rowId, error in latestErrors.items() if not error}
+
+    _, parquet = import_pyarrow()
+    if os.path.isdir(path):
+        parts = sorted(name for name in os.listdir(path) if PARQUET_PART_PATTERN.match(name))
+        paths = [os.path.join(path, name) for name in parts]
+    else:
+        paths = [path] # Single-file output from an older version
+
+    latestErrors = {}
+    for partPath in paths:
+        for batch in parquet.ParquetFile(partPath).iter_batches(columns=["id", "error"]):
+            latestErrors.update(zip(batch.column(0).to_pylist(), batch.column(1).to_pylist(), strict=True))
+    return {rowId for rowId, error in latestErrors.items() if not error}
+
+
+#################################################################################
+
+# --- Scoring ---
+
+def score_location(location, defaultRadius):
+    """
+    Returns a RiskResult for one location through pipeline.assess_location, as the dashboard scores it.
+    Failures are recorded in its "error" field instead of raising. Files are scored by score_window instead.
+
+    :param location: location row (see read_locations)
+    :param defaultRadius: radius in meters used when the row has none
+    """
+
+    result = RiskResult(id=location["id"])
+    for column in ("zip", "country"):
+        if location.get(column) is not None:
+            setattr(result, column, str(location[column]))
+
+    try:
+        radius = float(location.get("radius") or defaultRadius)
+        result.radius = radius
+
+        if location.get("lat") is not None and location.get("lon") is not None:
+            lat, lon = float(location["lat"]), float(location["lon"])
+            source = "coordinates"
+        else:
+            if not result.zip or not result.country:
+                raise ValueError("Row needs either lat/lon or zip/country.")
+            geoData, result.geocodeSource = utils.geocode_location(result.zip, result.country)
+            lat, lon = utils.grab_coordinates(geoData)
+            source = "geocode"
+
+        assessment = pipeline.assess_location(lat, lon, radius)
+        result = RiskResult.from_assessment(assessment, id=result.id, zip=result.zip, country=result.country,
+                                            radius=radius, source=source, geocodeSource=result.geocodeSource)
+    except Exception as e:
+        result.error = str(e)
+        result.assessedAt = time.time()
+
+    return result
+
+
+def resolve_location(location, defaultRadius):
+    """
+    Returns a RiskResult holding the id, zip/country, radius, coordinates and sources of a location row,
+    geocoding it when it has no coordinates. Failures are recorded in its "error" field instead of raising.
+
+    :param location: location row (see read_locations)
+    :param defaultRadius: radius in meters used when the row has none
+    """
+
+    result = RiskResult(id=location["id"])
+    for column in ("zip", "country"):
+        if location.get(column) is not None:
+            setattr(result, column, str(location[column]))
+
+    try:
+        result.radius = float(location.get("radius") or defaultRadius)
+        if location.get("lat") is not None and location.get("lon") is not None:
+            result.lat, result.lon = float(location["lat"]), float(location["lon"])
+            result.source = "coordinates"
+        else:
+            if not result.zip or not result.country:
+                raise ValueError("Row needs either lat/lon or zip/country.")
+            geoData, result.geocodeSource = utils.geocode_location(result.zip, result.country)
+            result.lat, result.lon = utils.grab_coordinates(geoData)
+            result.source = "geocode"
+    except Exception as e:
+        result.error = str(e)
+    return result
+
+
+def add_weather(result):
+    """
+    Sets the current weather inputs of a resolved RiskResult, or its "error" when the lookup fails.
+
+    :param result: RiskResult from resolve_location
+    """
+
+    try:
+        weatherData = utils.get_weather_data(result.lat, result.lon)
+        result.temp = weatherData["main"]["temp"]
+        result.humidity = weatherData["main"]["humidity"]
+        result.windSpeed = weatherData["wind"]["speed"]
+    except Exception as e:
+        result.error = str(e)
+    return result
+
+
+def score_window(window, defaultRadius, executor):
+    """
+    Returns a RiskResult for each location of a window, scored through the batch APIs: rows are geocoded
+    and given weather concurrently, then NDVI and elevations are fetched for every row at once and all
+    scores are computed in one pass. A failed NDVI batch degrades to fuelScore = None as in the
+    dashboard; any other failure is recorded in the affected rows' "error" field.
+
+    :param window: list of location rows (see read_locations)
+    :param defaultRadius: radius in meters used when a row has none
+    :param executor: thread pool for the per-row geocoding and weather lookups
+    """
+
+    results = list(executor.map(lambda location: resolve_location(location, defaultRadius), window))
+    results = list(executor.map(lambda result: add_weather(result) if result.error is None else result, results))
+    scorable = [result for result in results if result.error is None]
+
+    if scorable:
+        lats = np.array([result.lat for result in scorable])
+        lons = np.array([result.lon for result in scorable])
+        radii = np.array([result.radius for result in scorable])
+
+        try:
+            ndvis = utils.get_ndvi_batch(list(zip(lats.tolist(), lons.tolist(), radii.tolist(), strict=True)))
+            fuelError = utils.NO_SATELLITE_DATA_MESSAGE
+        except Exception as e:
+            ndvis = np.full(len(scorable), np.nan)
+            fuelError = str(e)
+
+        try:
+            elevations = utils.get_elevation_data_batch(lats, lons, radii)
+            slopes = wrd.get_steepness_batch(wrd.grab_elevations_batch(elevations), lats, radii)
+        except Exception as e:
+            slopes = np.full(len(scorable), np.nan)
+            for result in scorable:
+                result.error = str(e)
+
+        scores = wrd.score_batch([result.temp for result in scorable], [result.humidity for result in scorable],
+                                 [result.windSpeed for result in scorable], ndvis, slopes)
+        for index, result in enumerate(scorable):
+            if result.error is not None:
+                continue
+            if np.isnan(slopes[index]):
+                result.error = "Elevation data unavailable for this location."
+                continue
+            result.slope = float(slopes[index])
+            result.weatherScore = float(scores["weatherScore"][index])
+            result.slopeScore = float(scores["slopeScore"][index])
+            result.riskScore = float(scores["riskScore"][index])
+            if np.isnan(ndvis[index]):
+                result.fuelError = fuelError
+            else:
+                result.ndvi = float(ndvis[index])
+                result.fuelScore = float(scores["fuelScore"][index])
+
+    assessedAt = time.time()
+    for result in results:
+        result.assessedAt = assessedAt
+    return results
+
+
+def score_file(inputPath, outputPath, inputFormat=None, outputFormat=None, concurrency=8,
+               windowSize=500, defaultRadius=30, resume=False, progress=None):
+    """
+    Scores every location of an input file into an output file and returns (scored, skipped) counts.
+
+    :param inputPath: CSV or Parquet file of locations
+    :param outputPath: CSV file, or Parquet dataset directory, to write results to
+    :param inputFormat: "csv" or "parquet" (defaults to the input extension)
+    :param outputFormat: "csv" or "parquet" (defaults to the output extension)
+    :param concurrency: locations geocoded and given weather at once
+    :param windowSize: rows read, scored (with one NDVI and one elevation batch) and written together; bounds memory use
+    :param defaultRadius: radius in meters for rows without one
+    :param resume: skip rows already scored without error in the output and keep the existing results
+    :param progress: optional function called with the number of rows written after each window
+    """
+
+    outputFormat = get_file_format(outputPath, outputFormat)
+    scoredIds = read_scored_ids(outputPath, outputFormat) if resume else set()
+    writerClass = CsvResultWriter if outputFormat == "csv" else ParquetResultWriter
+
+    scored = 0
+    skipped = 0
+    locations = read_locations(inputPath, inputFormat)
+    writer = writerClass(outputPath, append=resume)
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="bulk") as executor:
+            while True:
+                window = list(islice(locations, windowSize))
+                if not window:
+                    break
+
+                pending = [location for location in window if location["id"] not in scoredIds]
+                skipped += len(window) - len(pending)
+
+                batch = RiskResultBatch.from_results(score_window(pending, defaultRadius, executor))
+                writer.write(batch)
+                scored += len(batch)
+                if progress is not None:
+                    progress(len(batch))
+    finally:
+        writer.close()
+
+    return scored, skipped
@@ -0,0 +1,450 @@
+"""
+Caches that sit in front of the data providers in utils.
+
+Geocoding results are stored on disk in SQLite so that the OpenWeatherMap/Google waterfall
+runs once per postal code for the life of the cache. Current weather is held in memory, bucketed
+by geohash cell, for as long as the provider takes to refresh it. NDVI results are stored on disk
+per 32-day Landsat composite period, including "no data" outcomes.
+"""
+
+# Imports
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import closing
+from datetime import date
+
+from . import metrics
+
+# Global Variables
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "wildfire_risk_dashboard")
+SECONDS_PER_DAY = 86_400
+NDVI_COMPOSITE_DAYS = 32 # LANDSAT/COMPOSITES/C02/T1_L2_32DAY_NDVI starts a new composite every 32 days from January 1st
+GEOHASH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def get_cache_dir():
+    """
+    Returns the directory persistent caches are written to (WILDFIRE_CACHE_DIR, or ~/.cache).
+    """
+
+    return os.getenv("WILDFIRE_CACHE_DIR", DEFAULT_CACHE_DIR)
+
+
+def normalize_postal_code(zipCode):
+    """
+    Returns a postal code with surrounding whitespace removed, inner whitespace collapsed and letters upper-cased.
+
+    :param zipCode: postal code as entered
+    """
+
+    return " ".join(str(zipCode).split()).upper()
+
+
+def encode_geohash(lat, lon, precision):
+    """
+    Returns the geohash of a coordinate. Each extra character shrinks the cell roughly 4-8x
+    (precision 5 is about 4.9 x 4.9 km, 6 about 1.2 x 0.6 km, 7 about 153 x 153 m).
+
+    :param lat: latitude
+    :param lon: longitude
+    :param precision: number of geohash characters
+    """
+
+    latRange = [-90.0, 90.0]
+    lonRange = [-180.0, 180.0]
+    geohash = []
+    bits = 0
+    bitCount = 0
+    useLon = True
+
+    while len(geohash) < precision:
+        valueRange, value = (lonRange, lon) if useLon else (latRange, lat)
+        mid = (valueRange[0] + valueRange[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            valueRange[0] = mid
+        else:
+            bits <<= 1
+            valueRange[1] = mid
+        useLon = not useLon
+
+        bitCount += 1
+        if bitCount == 5:
+            geohash.append(GEOHASH_BASE32[bits])
+            bits = 0
+            bitCount = 0
+
+    return "".join(geohash)
+
+
+def get_composite_period(day=None):
+    """
+    Returns the 32-day NDVI composite period a date falls in, e.g. "2026-08" for the ninth period of 2026.
+
+    :param day: date to look up (defaults to today)
+    """
+
+    day = day or date.today()
+    return f"{day.year}-{(day.timetuple().tm_yday - 1) // NDVI_COMPOSITE_DAYS:02d}"
+
+
+class SqliteCache:
+    """
+    Base class for caches persisted in a SQLite file; subclasses provide the table name and schema.
+    """
+
+    table = None
+    schema = None
+
+    def __init__(self, path):
+        """
+        :param path: SQLite file to use
+        """
+
+        self.path = path
+        self._initialized = False
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=30)
+        if not self._initialized:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(f"CREATE TABLE IF NOT EXISTS {self.table} ({self.schema})")
+            connection.commit()
+            self._initialized = True
+        return connection
+
+    def _fetch_row(self, query, params):
+        if not os.path.exists(self.path):
+            return None
+
+        with closing(self._connect()) as connection:
+            return connection.execute(query, params).fetchone()
+
+    def _write(self, query, params):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with closing(self._connect()) as connection:
+            connection.execute(query, params)
+            connection.commit()
+
+    def clear(self):
+        """
+        Removes every cached entry.
+        """
+
+        if os.path.exists(self.path):
+            with closing(self._connect()) as connection:
+                connection.execute(f"DELETE FROM {self.table}")
+                connection.commit()
+
+
+#################################################################################
+
+# --- Geocode Cache ---
+
+class GeocodeCache(SqliteCache):
+    """
+    Persistent cache of geocoding waterfall outcomes keyed by normalized (zip, country).
+
+    Each entry stores the returned location (or None when neither provider found one), the source
+    that answered ("owm" or "google"; postal index hits are never cached) and the decision taken on the
+    OpenWeatherMap answer ("accepted", "generic", "wrong_country" or "no_result"; None when Google answered
+    a hedged lookup first).
+    """
+
+    table = "geocode"
+    schema = (
+        "zip TEXT NOT NULL, country TEXT NOT NULL, result TEXT, source TEXT, "
+        "owm_decision TEXT, created REAL NOT NULL, PRIMARY KEY (zip, country)"
+    )
+
+    def __init__(self, path=None, ttl=None, negativeTtl=None):
+        """
+        :param path: SQLite file to use; defaults to geocode.sqlite in the cache directory
+        :param ttl: seconds a found location stays valid (default GEOCODE_CACHE_TTL_DAYS, 365 days)
+        :param negativeTtl: seconds a "not found" outcome stays valid (default GEOCODE_NEGATIVE_TTL_DAYS, 1 day)
+        """
+
+        super().__init__(path or os.path.join(get_cache_dir(), "geocode.sqlite"))
+        self.ttl = ttl if ttl is not None else float(os.getenv("GEOCODE_CACHE_TTL_DAYS", "365")) * SECONDS_PER_DAY
+        self.negativeTtl = negativeTtl if negativeTtl is not None \
+            else float(os.getenv("GEOCODE_NEGATIVE_TTL_DAYS", "1")) * SECONDS_PER_DAY
+
+    def get(self, zipCode, countryCode):
+        """
+        Returns the cached entry as a dictionary with "result", "source" and "owmDecision", or None on a miss.
+
+        :param zipCode: postal code
+        :param countryCode: ISO Alpha-2 country code
+        """
+
+        row = self._fetch_row(
+            "SELECT result, source, owm_decision, created FROM geocode WHERE zip = ? AND country = ?",
+            (normalize_postal_code(zipCode), countryCode.strip().upper())
+        )
+
+        if row is None:
+            metrics.record_cache_lookup("geocode", False)
+            return None
+
+        result, source, owmDecision, created = row
+        ttl = self.ttl if result is not None else self.negativeTtl
+        if time.time() - created > ttl:
+            metrics.record_cache_lookup("geocode", False)
+            return None
+
+        metrics.record_cache_lookup("geocode", True)
+        return {
+            "result": json.loads(result) if result is not None else None,
+            "source": source,
+            "owmDecision": owmDecision
+        }
+
+    def set(self, zipCode, countryCode, result, source, owmDecision):
+        """
+        Stores the outcome of a geocoding waterfall.
+
+        :param zipCode: postal code
+        :param countryCode: ISO Alpha-2 country code
+        :param result: location dictionary returned to the caller, or None
+        :param source: provider that answered ("owm", "google" or None)
+        :param owmDecision: what the quality checks decided about the OpenWeatherMap answer, or None
+        """
+
+        self._write(
+            "INSERT OR REPLACE INTO geocode (zip, country, result, source, owm_decision, created) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                normalize_postal_code(zipCode),
+                countryCode.strip().upper(),
+                json.dumps(result) if result is not None else None,
+                source,
+                owmDecision,
+                time.time()
+            )
+        )
+
+
+#################################################################################
+
+# --- NDVI Cache ---
+
+class NdviCache(SqliteCache):
+    """
+    Persistent cache of NDVI results keyed by (composite period, quantized lat/lon, radius). Callers pass the
+    period of the composite they reduced (see utils.get_latest_composite_start), which lags today's period.
+
+    A "no data" outcome (water, cloud) is stored as a negative entry with a NULL NDVI, so known
+    empty cells are not queried again until the next composite period.
+    """
+
+    table = "ndvi"
+    schema = (
+        "period TEXT NOT NULL, lat INTEGER NOT NULL, lon INTEGER NOT NULL, radius REAL NOT NULL, "
+        "ndvi REAL, created REAL NOT NULL, PRIMARY KEY (period, lat, lon, radius)"
+    )
+
+    def __init__(self, path=None, precision=None):
+        """
+        :param path: SQLite file to use; defaults to ndvi.sqlite in the cache directory
+        :param precision: decimal places lat/lon are quantized to (default NDVI_CACHE_PRECISION, 4, about 11m)
+        """
+
+        super().__init__(path or os.path.join(get_cache_dir(), "ndvi.sqlite"))
+        self.precision = precision if precision is not None else int(os.getenv("NDVI_CACHE_PRECISION", "4"))
+
+    def _get_key(self, lat, lon, radius, period):
+        scale = 10 ** self.precision
+        return (period or get_composite_period(), round(lat * scale), round(lon * scale), float(radius))
+
+    def get(self, lat, lon, radius, period=None):
+        """
+        Returns the cached entry as a dictionary with "ndvi" (None for a negative entry), or None on a miss.
+
+        :param lat: Latitude
+        :param lon: Longitude
+        :param radius: Radius in meters
+        :param period: period of the composite reduced (defaults to today's)
+        """
+
+        row = self._fetch_row(
+            "SELECT ndvi FROM ndvi WHERE period = ? AND lat = ? AND lon = ? AND radius = ?",
+            self._get_key(lat, lon, radius, period)
+        )
+
+        metrics.record_cache_lookup("ndvi", row is not None)
+        if row is None:
+            return None
+        return {"ndvi": row[0]}
+
+    def set(self, lat, lon, radius, ndvi, period=None):
+        """
+        Stores an NDVI result, or a negative entry when ndvi is None.
+
+        :param lat: Latitude
+        :param lon: Longitude
+        :param radius: Radius in meters
+        :param ndvi: average NDVI of the area, or None when no data was available
+        :param period: period of the composite reduced (defaults to today's)
+        """
+
+        self._write(
+            "INSERT OR REPLACE INTO ndvi (period, lat, lon, radius, ndvi, created) VALUES (?, ?, ?, ?, ?, ?)",
+            (*self._get_key(lat, lon, radius, period), ndvi, time.time())
+        )
+
+    def get_many(self, points, period=None):
+        """
+        Returns a list with the cached entry of each (lat, lon, radius) point, or None for a miss, using one connection.
+
+        :param points: list of (lat, lon, radius) tuples
+        :param period: period of the composite reduced (defaults to today's)
+        """
+
+        entries = [None] * len(points)
+        if os.path.exists(self.path):
+            with closing(self._connect()) as connection:
+                for index, (lat, lon, radius) in enumerate(points):
+                    row = connection.execute(
+                        "SELECT ndvi FROM ndvi WHERE period = ? AND lat = ? AND lon = ? AND radius = ?",
+                        self._get_key(lat, lon, radius, period)
+                    ).fetchone()
+                    if row is not None:
+                        entries[index] = {"ndvi": row[0]}
+
+        for entry in entries:
+            metrics.record_cache_lookup("ndvi", entry is not None)
+        return entries
+
+    def set_many(self, points, ndvis, period=None):
+        """
+        Stores the NDVI result of each (lat, lon, radius) point in a single transaction.
+
+        :param points: list of (lat, lon, radius) tuples
+        :param ndvis: matching list of average NDVIs, None where no data was available
+        :param period: period of the composite reduced (defaults to today's)
+        """
+
+        now = time.time()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with closing(self._connect()) as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO ndvi (period, lat, lon, radius, ndvi, created) VALUES (?, ?, ?, ?, ?, ?)",
+                [(*self._get_key(lat, lon, radius, period), ndvi, now)
+                 for (lat, lon, radius), ndvi in zip(points, ndvis, strict=True)]
+            )
+            connection.commit()
+
+
+#################################################################################
+
+# --- Weather Cache ---
+
+class WeatherCache:
+    """
+    In-memory LRU cache of current-conditions weather, keyed by geohash cell.
+
+    Requests that fall in the same cell within the time-to-live share one provider payload.
+    Hit and miss counters are available through stats().
+    """
+
+    def __init__(self, precision=None, ttl=None, maxEntries=None):
+        """
+        :param precision: geohash precision of a bucket (default WEATHER_CACHE_PRECISION, 6)
+        :param ttl: seconds a payload stays fresh (default WEATHER_CACHE_TTL, 600; OpenWeatherMap refreshes
+            about every 10 minutes)
+        :param maxEntries: most cells held before the least recently used is dropped
+            (default WEATHER_CACHE_MAX_ENTRIES, 10000)
+        """
+
+        self.precision = precision if precision is not None else int(os.getenv("WEATHER_CACHE_PRECISION", "6"))
+        self.ttl = ttl if ttl is not None else float(os.getenv("WEATHER_CACHE_TTL", "600"))
+        self.maxEntries = maxEntries if maxEntries is not None \
+            else int(os.getenv("WEATHER_CACHE_MAX_ENTRIES", "10000"))
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, lat, lon):
+        """
+        Returns the cached weather data for the cell containing (lat, lon), or None on a miss.
+
+        :param lat: latitude
+        :param lon: longitude
+        """
+
+        key = encode_geohash(lat, lon, self.precision)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] <= self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                metrics.record_cache_lookup("weather", True)
+                return entry[1]
+
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            metrics.record_cache_lookup("weather", False)
+            return None
+
+    def set(self, lat, lon, weatherData):
+        """
+        Stores weather data for the cell containing (lat, lon).
+
+        :param lat: latitude
+        :param lon: longitude
+        :param weatherData: Converted JSON object containing weather data
+        """
+
+        key = encode_geohash(lat, lon, self.precision)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), weatherData)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxEntries:
+                self._entries.popitem(last=False)
+
+    def get_or_fetch(self, lat, lon, fetcher):
+        """
+        Returns cached weather data for (lat, lon), calling fetcher(lat, lon) on a miss.
+        Error payloads (no "main" block) are returned but not cached.
+
+        :param lat: latitude
+        :param lon: longitude
+        :param fetcher: function returning weather data for a coordinate
+        """
+
+        weatherData = self.get(lat, lon)
+        if weatherData is None:
+            weatherData = fetcher(lat, lon)
+            if "main" in weatherData:
+                self.set(lat, lon, weatherData)
+        return weatherData
+
+    def stats(self):
+        """
+        Returns a dictionary of hit/miss counters, hit rate and current size.
+        """
+
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRate": self.hits / lookups if lookups else 0.0,
+                "size": len(self._entries)
+            }
+
+    def clear(self):
+        """
+        Removes every cached entry and resets the counters.
+        """
+
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
@@ -1,21 +1,135 @@
 """Console script for wildfire_risk_dashboard."""
 
+import json
+import threading
+from pathlib import Path
+from typing import Annotated
+
 import typer
 from rich.console import Console
+from rich.progress import Progress
+from rich.table import Table
 
-from wildfire_risk_dashboard import utils
+from wildfire_risk_dashboard import bulk, metrics, pipeline, tiles
+from wildfire_risk_dashboard.postal import PostalIndex
 
 app = typer.Typer()
 console = Console()
 
 
-@app.command()
+@app.callback()
 def main():
-    """Console script for wildfire_risk_dashboard."""
-    console.print("Replace this message by putting your code into "
-               "wildfire_risk_dashboard.cli.main")
-    console.print("See Typer documentation at https://typer.tiangolo.com/")
-    utils.do_something_useful()
+    """Wildfire risk assessment from the command line."""
+
+
+@app.command(epilog=(
+    "Each row needs an OpenWeatherMap weather request, and each geocoded row a geocoding request as well, unless "
+    "the caches or the postal index answer them. At the default OpenWeatherMap limit of 1 request per second "
+    "(burst 10) that caps a run at about 1 row per second, or 1 row every 2 seconds for geocoded rows, whatever "
+    "the concurrency. Raise OPENWEATHER_RATE_LIMIT and OPENWEATHER_RATE_BURST to match a paid plan."
+))
+def score(
+    input_path: Annotated[Path, typer.Argument(
+        exists=True, dir_okay=False,
+        help="CSV or Parquet file with zip/country or lat/lon columns, plus optional id and radius columns."
+    )],
+    output_path: Annotated[Path, typer.Argument(help="CSV file, or Parquet dataset directory, to write results to.")],
+    input_format: Annotated[str | None, typer.Option(help="csv or parquet (default: from extension).")] = None,
+    output_format: Annotated[str | None, typer.Option(help="csv or parquet (default: from extension).")] = None,
+    concurrency: Annotated[int, typer.Option(
+        min=1,
+        help="Locations geocoded and given weather at once. OpenWeatherMap requests are still paced by "
+             "OPENWEATHER_RATE_LIMIT (default 1 per second)."
+    )] = 8,
+    window_size: Annotated[int, typer.Option(
+        min=1, help="Rows read, scored and written together, with one NDVI and one elevation batch request."
+    )] = 500,
+    radius: Annotated[float, typer.Option(help="Radius in meters for rows without one.")] = 30,
+    resume: Annotated[bool, typer.Option(help="Skip rows already scored without error in the output.")] = False,
+    metrics_output: Annotated[Path | None, typer.Option(
+        dir_okay=False,
+        help="Record stage timings and counters and write them here (JSON for .json, Prometheus text otherwise)."
+    )] = None,
+):
+    """Score every location in a file and stream the results to CSV or Parquet."""
+    if metrics_output is not None:
+        metrics.enable()
+    with Progress(console=console, transient=True) as progress:
+        task = progress.add_task("Scoring locations...", total=None)
+        scored, skipped = bulk.score_file(
+            str(input_path), str(output_path),
+            inputFormat=input_format,
+            outputFormat=output_format,
+            concurrency=concurrency,
+            windowSize=window_size,
+            defaultRadius=radius,
+            resume=resume,
+            progress=lambda count: progress.advance(task, count)
+        )
+    console.print(f"Scored {scored} locations ({skipped} already in {output_path}).")
+
+    if metrics_output is not None:
+        if metrics_output.suffix.lower() == ".json":
+            metrics_output.write_text(json.dumps(metrics.export_json(), indent=2) + "\n", encoding="utf-8")
+        else:
+            metrics_output.write_text(metrics.export_prometheus(), encoding="utf-8")
+        console.print(f"Wrote metrics to {metrics_output}.")
+
+
+@app.command()
+def sweep(
+    lat: Annotated[float, typer.Argument(help="Latitude of the site.")],
+    lon: Annotated[float, typer.Argument(help="Longitude of the site.")],
+    radii: Annotated[str, typer.Option(help="Comma-separated radii in meters.")] = "30,100,250,500",
+):
+    """Compare the risk breakdown of one site at several radii from a single fetch per provider."""
+    radiusList = [float(radius) for radius in radii.split(",")]
+    assessments = pipeline.assess_sweep(lat, lon, radiusList)
+
+    table = Table(title=f"Wildfire risk at {lat}, {lon}")
+    for column in ("Radius (m)", "Risk", "Weather", "Fuel", "Slope"):
+        table.add_column(column, justify="right")
+    for assessment in assessments:
+        fuelScore = assessment["fuelScore"]
+        table.add_row(
+            f"{assessment['radius']:g}",
+            f"{assessment['riskScore']:.2f}",
+            f"{assessment['weatherScore']:.2f}",
+            "n/a" if fuelScore is None else f"{fuelScore:.2f}",
+            f"{assessment['slopeScore']:.2f}"
+        )
+    console.print(table)
+
+
+@app.command("build-postal-index")
+def build_postal_index(
+    source_path: Annotated[Path, typer.Argument(
+        exists=True, dir_okay=False, help="GeoNames postal-code dump (.txt or .zip), e.g. allCountries.zip."
+    )],
+    output_path: Annotated[Path | None, typer.Option(
+        "--output", dir_okay=False,
+        help="Index file (default: postal_index.sqlite in the cache directory, where geocoding picks it up)."
+    )] = None,
+):
+    """Build the offline postal-code index that geocoding consults before the providers."""
+    index = PostalIndex(str(output_path) if output_path else None)
+    with console.status("Indexing postal codes..."):
+        count = index.build(str(source_path))
+    console.print(f"Indexed {count} postal codes into {index.path}.")
+
+
+@app.command("serve-tiles")
+def serve_tiles(
+    host: Annotated[str, typer.Option(help="Interface to listen on.")] = "127.0.0.1",
+    port: Annotated[int, typer.Option(help="Port to listen on.")] = 8765,
+):
+    """Serve risk heatmap tiles at /tiles/{z}/{x}/{y}.png until interrupted."""
+    server = tiles.start_tile_server(host, port)
+    console.print(f"Serving risk tiles at http://{host}:{server.server_address[1]}/tiles/{{z}}/{{x}}/{{y}}.png")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
 
 
 if __name__ == "__main__":
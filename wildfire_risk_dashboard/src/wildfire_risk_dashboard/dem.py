@@ -0,0 +1,183 @@
+"""
+Offline elevation backend that reads local DEM tiles instead of calling Open-Meteo.
+
+Tiles are SRTM/Copernicus-style .hgt files: one grid of big-endian 16-bit elevations per 1 x 1 degree
+cell, named after the cell's south-west corner (e.g. N43W097.hgt), with row 0 on the northern edge.
+Grids are square unless an ESRI-style .hdr sidecar (e.g. N70W150.hdr) gives NROWS and NCOLS, as for the
+narrower high-latitude tiles. Tiles are memory-mapped, so a lookup only pages in the rows it touches.
+Other raster formats such as GeoTIFF are not read; convert them to .hgt first (e.g. with gdal_translate -of SRTMHGT).
+"""
+
+# Imports
+import math
+import os
+import threading
+
+import numpy as np
+
+# Global Variables
+HGT_VOID = -32768
+
+
+def get_tile_name(tileLat, tileLon):
+    """
+    Returns the .hgt file name for the tile whose south-west corner is (tileLat, tileLon).
+
+    :param tileLat: integer latitude of the tile's southern edge
+    :param tileLon: integer longitude of the tile's western edge
+    """
+
+    latPrefix = "N" if tileLat >= 0 else "S"
+    lonPrefix = "E" if tileLon >= 0 else "W"
+    return f"{latPrefix}{abs(tileLat):02d}{lonPrefix}{abs(tileLon):03d}.hgt"
+
+
+def read_tile_shape(path):
+    """
+    Returns the (rows, columns) of a .hgt tile: NROWS and NCOLS from its .hdr sidecar when there is one,
+    otherwise the square grid implied by the file size.
+
+    :param path: .hgt file
+    """
+
+    samples = os.path.getsize(path) // 2
+    headerPath = os.path.splitext(path)[0] + ".hdr"
+    if os.path.exists(headerPath):
+        with open(headerPath, encoding="utf-8") as file:
+            header = dict(line.split(None, 1) for line in file if len(line.split()) >= 2)
+        header = {key.upper(): value.strip() for key, value in header.items()}
+        rows, columns = int(header["NROWS"]), int(header["NCOLS"])
+    else:
+        rows = columns = math.isqrt(samples)
+
+    if rows * columns != samples:
+        raise ValueError(f"DEM tile {path} is not a {rows} x {columns} grid; add a .hdr file with NROWS and NCOLS.")
+    return rows, columns
+
+
+class DemTileStore:
+    """
+    Answers point and grid elevation queries from a directory of .hgt tiles using bilinear interpolation.
+    Points that draw on a void sample yield NaN.
+    """
+
+    def __init__(self, directory):
+        """
+        :param directory: folder containing the .hgt tiles
+        """
+
+        self.directory = directory
+        self._tiles = {}
+        self._lock = threading.Lock()
+
+    def get_tile(self, tileLat, tileLon):
+        """
+        Returns the memory-mapped elevation array of a tile, opening it on first use.
+
+        :param tileLat: integer latitude of the tile's southern edge
+        :param tileLon: integer longitude of the tile's western edge
+        """
+
+        key = (tileLat, tileLon)
+        with self._lock:
+            if key not in self._tiles:
+                path = os.path.join(self.directory, get_tile_name(tileLat, tileLon))
+                if not os.path.exists(path):
+                    raise ValueError(f"No DEM tile covers latitude {tileLat}, longitude {tileLon} ({path}).")
+
+                self._tiles[key] = np.memmap(path, dtype=">i2", mode="r", shape=read_tile_shape(path))
+            return self._tiles[key]
+
+    def has_tile(self, tileLat, tileLon):
+        """
+        Returns whether the directory has the tile whose south-west corner is (tileLat, tileLon).
+
+        :param tileLat: integer latitude of the tile's southern edge
+        :param tileLon: integer longitude of the tile's western edge
+        """
+
+        with self._lock:
+            if (tileLat, tileLon) in self._tiles:
+                return True
+        return os.path.exists(os.path.join(self.directory, get_tile_name(tileLat, tileLon)))
+
+    def get_owning_tiles(self, lats, lons):
+        """
+        Returns the (tileLats, tileLons) integer arrays of the tiles to read each point from. A point on a
+        whole degree is on the edge of two (or four) tiles; it is read from whichever of them is present,
+        preferring the one to its north-east.
+
+        :param lats: array of latitudes
+        :param lons: array of longitudes
+        """
+
+        tileLats = np.floor(lats).astype(int)
+        tileLons = np.floor(lons).astype(int)
+
+        edgeLats = (lats == tileLats).ravel()
+        edgeLons = (lons == tileLons).ravel()
+        flatTileLats = tileLats.reshape(-1)
+        flatTileLons = tileLons.reshape(-1)
+        for index in np.flatnonzero(edgeLats | edgeLons):
+            tileLat, tileLon = int(flatTileLats[index]), int(flatTileLons[index])
+            candidates = [
+                (tileLat - latStep, tileLon - lonStep)
+                for latStep in ((0, 1) if edgeLats[index] else (0,))
+                for lonStep in ((0, 1) if edgeLons[index] else (0,))
+            ]
+            owner = next((candidate for candidate in candidates if self.has_tile(*candidate)), candidates[0])
+            flatTileLats[index], flatTileLons[index] = owner
+
+        return tileLats, tileLons
+
+    def get_elevations(self, lats, lons):
+        """
+        Returns an array of elevations in meters for matching arrays of latitudes and longitudes.
+
+        :param lats: array of latitudes
+        :param lons: array of longitudes
+        """
+
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+        elevations = np.full(lats.shape, np.nan)
+
+        tileLats, tileLons = self.get_owning_tiles(lats, lons)
+
+        # Interpolate one tile at a time so each memory map is indexed with a single fancy-index
+        for tileLat, tileLon in set(zip(tileLats.ravel().tolist(), tileLons.ravel().tolist(), strict=True)):
+            tile = self.get_tile(tileLat, tileLon)
+            lastRow = tile.shape[0] - 1
+            lastCol = tile.shape[1] - 1
+            inTile = (tileLats == tileLat) & (tileLons == tileLon)
+
+            rows = (tileLat + 1 - lats[inTile]) * lastRow
+            cols = (lons[inTile] - tileLon) * lastCol
+            row0 = np.clip(np.floor(rows).astype(int), 0, lastRow - 1)
+            col0 = np.clip(np.floor(cols).astype(int), 0, lastCol - 1)
+            rowFrac = rows - row0
+            colFrac = cols - col0
+
+            corners = np.stack([
+                tile[row0, col0], tile[row0, col0 + 1], tile[row0 + 1, col0], tile[row0 + 1, col0 + 1]
+            ]).astype(float)
+            corners[corners == HGT_VOID] = np.nan
+            weights = np.stack([
+                (1 - rowFrac) * (1 - colFrac), (1 - rowFrac) * colFrac, rowFrac * (1 - colFrac), rowFrac * colFrac
+            ])
+
+            # A void corner only voids the point when it carries weight, e.g. not for a point on a valid sample
+            elevations[inTile] = np.where(weights == 0, 0.0, corners * weights).sum(axis=0)
+
+        return elevations
+
+    def get_elevation_grid(self, lats, lons):
+        """
+        Returns a 2D array of elevations for every (lat, lon) pair of a grid.
+
+        :param lats: latitude axis of the grid (rows)
+        :param lons: longitude axis of the grid (columns)
+        """
+
+        latGrid, lonGrid = np.meshgrid(lats, lons, indexing="ij")
+        return self.get_elevations(latGrid, lonGrid)
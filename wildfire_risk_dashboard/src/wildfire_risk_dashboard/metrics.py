@@ -0,0 +1,261 @@
+"""
+Per-stage timing and counter instrumentation.
+
+Provider fetchers and scoring stages record duration histograms and call/error counts; the HTTP client
+counts retries, the caches count hits and misses, and the geocoding waterfall counts how often it falls
+back to Google. Everything is exported as Prometheus text or JSON.
+
+Instrumentation is off unless WILDFIRE_METRICS=1 (or enable() is called). While off, every hook returns
+after a single flag check.
+"""
+
+# Imports
+import functools
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Global Variables
+ENABLED = os.getenv("WILDFIRE_METRICS", "0") == "1"
+METRIC_PREFIX = "wildfire_"
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, math.inf)
+METRIC_HELP = {
+    "stage_duration_seconds": "Duration of provider fetches and scoring stages.",
+    "stage_calls_total": "Calls per stage.",
+    "stage_errors_total": "Calls per stage that raised.",
+    "http_retries_total": "HTTP requests retried, by host and reason.",
+    "cache_lookups_total": "Cache lookups, by cache and result (hit or miss).",
+    "geocode_fallback_total": "Geocoding lookups answered by the Google fallback, by OpenWeatherMap decision.",
+    "geocode_hedges_total": "Geocoding lookups where a slow OpenWeatherMap was hedged with Google.",
+    "geocode_hedge_wins_total": "Hedged geocoding lookups, by the provider that answered first.",
+    "reused_components_total": "Assessment components reused from nearby results instead of fetched, by mode.",
+    "rate_limit_wait_seconds": "Time requests waited for a provider's rate limiter.",
+    "rate_limit_throttles_total": "429/over-quota responses that slowed a provider's rate limiter.",
+    "tile_errors_total": "Risk tile requests that failed to render."
+}
+
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+
+
+def enable(enabled=True):
+    """
+    Turns instrumentation on or off at runtime.
+
+    :param enabled: True to record metrics
+    """
+
+    global ENABLED
+    ENABLED = enabled
+
+
+def reset():
+    """
+    Clears every recorded metric.
+    """
+
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+#################################################################################
+
+# --- Recording ---
+
+def increment(name, amount=1, **labels):
+    """
+    Adds to a counter.
+
+    :param name: metric name without the wildfire_ prefix
+    :param amount: value to add
+    :param labels: label names and values
+    """
+
+    if not ENABLED:
+        return
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def observe(name, value, **labels):
+    """
+    Records one observation in a histogram.
+
+    :param name: metric name without the wildfire_ prefix
+    :param value: observed value (seconds for durations)
+    :param labels: label names and values
+    """
+
+    if not ENABLED:
+        return
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = {"buckets": [0] * len(DURATION_BUCKETS), "sum": 0.0, "count": 0}
+        for index, bound in enumerate(DURATION_BUCKETS):
+            if value <= bound:
+                histogram["buckets"][index] += 1
+                break
+        histogram["sum"] += value
+        histogram["count"] += 1
+
+
+def record_cache_lookup(cache, hit):
+    """
+    Counts a cache hit or miss.
+
+    :param cache: cache name (e.g. "geocode", "weather", "ndvi")
+    :param hit: True for a hit
+    """
+
+    if ENABLED:
+        increment("cache_lookups_total", cache=cache, result="hit" if hit else "miss")
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+@contextmanager
+def _stage_timer(stage):
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        increment("stage_errors_total", stage=stage)
+        raise
+    finally:
+        observe("stage_duration_seconds", time.perf_counter() - start, stage=stage)
+        increment("stage_calls_total", stage=stage)
+
+
+def timer(stage):
+    """
+    Returns a context manager that times a block as one call of a stage.
+
+    :param stage: stage name (e.g. "score_weather")
+    """
+
+    return _stage_timer(stage) if ENABLED else _NULL_TIMER
+
+
+def timed(stage):
+    """
+    Returns a decorator that times every call of a function as a stage.
+
+    :param stage: stage name (e.g. "weather")
+    """
+
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return function(*args, **kwargs)
+            with _stage_timer(stage):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+#################################################################################
+
+# --- Export ---
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in pairs) + "}"
+
+
+def _format_bound(bound):
+    return "+Inf" if bound == math.inf else repr(bound)
+
+
+def export_prometheus():
+    """
+    Returns every metric in the Prometheus text exposition format.
+    """
+
+    with _lock:
+        counters = dict(_counters)
+        histograms = {key: {**value, "buckets": list(value["buckets"])} for key, value in _histograms.items()}
+
+    lines = []
+    for name in sorted({key[0] for key in counters}):
+        lines.append(f"# HELP {METRIC_PREFIX}{name} {METRIC_HELP.get(name, name)}")
+        lines.append(f"# TYPE {METRIC_PREFIX}{name} counter")
+        for (metricName, labels), value in sorted(counters.items()):
+            if metricName == name:
+                lines.append(f"{METRIC_PREFIX}{name}{_format_labels(labels)} {value}")
+
+    for name in sorted({key[0] for key in histograms}):
+        lines.append(f"# HELP {METRIC_PREFIX}{name} {METRIC_HELP.get(name, name)}")
+        lines.append(f"# TYPE {METRIC_PREFIX}{name} histogram")
+        for (metricName, labels), histogram in sorted(histograms.items()):
+            if metricName != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(DURATION_BUCKETS, histogram["buckets"], strict=True):
+                cumulative += count
+                bucketLabels = _format_labels(labels, [("le", _format_bound(bound))])
+                lines.append(f"{METRIC_PREFIX}{name}_bucket{bucketLabels} {cumulative}")
+            lines.append(f"{METRIC_PREFIX}{name}_sum{_format_labels(labels)} {histogram['sum']}")
+            lines.append(f"{METRIC_PREFIX}{name}_count{_format_labels(labels)} {histogram['count']}")
+
+    return "\n".join(lines) + "\n"
+
+
+def export_json():
+    """
+    Returns a dictionary of per-stage timings, counters and cache hit rates.
+    """
+
+    with _lock:
+        counters = dict(_counters)
+        histograms = {key: dict(value) for key, value in _histograms.items()}
+
+    stages = {}
+    for (name, labels), histogram in histograms.items():
+        if name != "stage_duration_seconds":
+            continue
+        stage = dict(labels)["stage"]
+        stages[stage] = {
+            "calls": histogram["count"],
+            "errors": counters.get(("stage_errors_total", labels), 0),
+            "totalSeconds": round(histogram["sum"], 6),
+            "meanSeconds": round(histogram["sum"] / histogram["count"], 6) if histogram["count"] else 0.0
+        }
+
+    caches = {}
+    for (name, labels), value in counters.items():
+        if name == "cache_lookups_total":
+            labelDic = dict(labels)
+            cacheStats = caches.setdefault(labelDic["cache"], {"hits": 0, "misses": 0})
+            cacheStats["hits" if labelDic["result"] == "hit" else "misses"] += value
+    for cacheStats in caches.values():
+        lookups = cacheStats["hits"] + cacheStats["misses"]
+        cacheStats["hitRate"] = cacheStats["hits"] / lookups if lookups else 0.0
+
+    return {
+        "enabled": ENABLED,
+        "stages": stages,
+        "caches": caches,
+        "counters": [
+            {"name": METRIC_PREFIX + name, "labels": dict(labels), "value": value}
+            for (name, labels), value in sorted(counters.items())
+        ]
+    }
@@ -0,0 +1,401 @@
+"""
+Runs a risk assessment for one location.
+
+Once the coordinates are known, the weather, fuel (NDVI) and slope (elevation) stages are independent,
+so they are fetched concurrently with a timeout per stage. Wall-clock latency is roughly the slowest
+single provider instead of the sum of all of them. Forecast mode swaps current weather for the hourly
+forecast and scores every hour at once; sweep mode scores several radii around one point from a single
+fetch per provider.
+"""
+
+# Imports
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import numpy as np
+
+from . import metrics, utils
+from . import wildfire_risk_dashboard as wrd
+from .reuse import ReuseIndex
+
+# Global Variables
+STAGE_TIMEOUTS = {
+    "weather": float(os.getenv("WEATHER_STAGE_TIMEOUT", "30")),
+    "fuel": float(os.getenv("FUEL_STAGE_TIMEOUT", "60")),
+    "slope": float(os.getenv("SLOPE_STAGE_TIMEOUT", "30"))
+}
+PEAK_WINDOW_HOURS = int(os.getenv("PEAK_WINDOW_HOURS", "3"))
+STAGE_POOL_SIZE = int(os.getenv("STAGE_POOL_SIZE", "32")) # Stages in flight at once across all assessments
+
+_stageExecutor = None
+_stageExecutorPid = None
+_stageExecutorLock = threading.Lock()
+
+# Nearby results reused instead of calling the providers (see reuse.py)
+reuseIndex = ReuseIndex() if os.getenv("REUSE_ENABLED", "0") == "1" else None
+
+
+def get_stage_executor():
+    """
+    Returns the thread pool stages run on, creating it on first use in each process.
+    It is shared by every assessment, so threads are reused instead of started per assessment.
+    """
+
+    global _stageExecutor, _stageExecutorPid
+    with _stageExecutorLock:
+        # A forked worker cannot use its parent's threads
+        if _stageExecutor is None or _stageExecutorPid != os.getpid():
+            _stageExecutor = ThreadPoolExecutor(max_workers=STAGE_POOL_SIZE, thread_name_prefix="assessment")
+            _stageExecutorPid = os.getpid()
+        return _stageExecutor
+
+
+#################################################################################
+
+# --- Stages ---
+
+def run_weather_stage(lat, lon, radius):
+    """
+    Returns the weather inputs and scores for a location.
+
+    :param lat: Latitude
+    :param lon: Longitude
+    :param radius: Radius in meters (unused; weather does not depend on it)
+    """
+
+    weatherData = utils.get_weather_data(lat, lon)
+    with metrics.timer("score_weather"):
+        tempScore = wrd.normalize_temperature(weatherData)
+        humidityScore = wrd.normalize_humidity(weatherData)
+        windScore = wrd.normalize_wind_speed(weatherData)
+        weatherScore = wrd.calculate_weather_score(tempScore, humidityScore, windScore)
+
+    return {
+        "temp": weatherData["main"]["temp"],
+        "humidity": weatherData["main"]["humidity"],
+        "windSpeed": weatherData["wind"]["speed"],
+        "weatherScore": weatherScore
+    }
+
+
+def run_fuel_stage(lat, lon, radius):
+    """
+    Returns the NDVI and fuel score for the area.
+
+    :param lat: Latitude
+    :param lon: Longitude
+    :param radius: Radius in meters
+    """
+
+    ndvi = utils.get_ndvi(lat, lon, radius)
+    with metrics.timer("score_fuel"):
+        fuelScore = wrd.normalize_fuel(ndvi)
+    return {"ndvi": ndvi, "fuelScore": fuelScore}
+
+
+def run_slope_stage(lat, lon, radius):
+    """
+    Returns the slope and slope score for the area.
+
+    :param lat: Latitude
+    :param lon: Longitude
+    :param radius: Radius in meters
+    """
+
+    neighboringCoords = wrd.get_neighboring_coords(lat, lon, radius)
+    elevationData = utils.get_elevation_data(neighboringCoords)
+    with metrics.timer("score_slope"):
+        elevations = wrd.grab_elevations(elevationData)
+        slope = wrd.get_steepness(elevations, neighboringCoords)
+        slopeScore = wrd.normalize_slope(slope)
+    return {"slope": slope, "slopeScore": slopeScore}
+
+
+DEFAULT_STAGES = {
+    "weather": run_weather_stage,
+    "fuel": run_fuel_stage,
+    "slope": run_slope_stage
+}
+REUSE_KEYS = {
+    "weather": ("temp", "humidity", "windSpeed", "weatherScore"),
+    "fuel": ("ndvi", "fuelScore"),
+    "slope": ("slope", "slopeScore")
+}
+
+
+#################################################################################
+
+# --- Assessment ---
+
+def run_stages(lat, lon, radius, stages, timeouts=None):
+    """
+    Runs stages concurrently and returns their results merged into one dictionary, with "fuelError" set.
+
+    Each stage's timeout runs from when it starts on the shared pool, so time queued behind other
+    assessments' stages (STAGE_POOL_SIZE in flight at once) does not count against it.
+    A failed or timed-out fuel stage degrades to fuelScore = None (its message is kept in "fuelError")
+    without cancelling the other stages; any other failed stage raises.
+
+    :param lat: Latitude
+    :param lon: Longitude
+    :param radius: Radius in meters
+    :param stages: stage name -> function(lat, lon, radius)
+    :param timeouts: optional overrides of STAGE_TIMEOUTS (stage name -> seconds)
+    """
+
+    timeouts = {**STAGE_TIMEOUTS, **(timeouts or {})}
+    startTimes = {}
+    started = {name: threading.Event() for name in stages}
+
+    def run_stage(name, stage):
+        # Each stage's timeout counts from when a pool thread picks it up, not from time spent queued
+        startTimes[name] = time.monotonic()
+        started[name].set()
+        return stage(lat, lon, radius)
+
+    # Results are awaited with a timeout, so a hung provider cannot hold up the result past its timeout
+    futures = {name: get_stage_executor().submit(run_stage, name, stage) for name, stage in stages.items()}
+    try:
+        results = {}
+        for name, future in futures.items():
+            started[name].wait()
+            remaining = max(0.0, startTimes[name] + timeouts[name] - time.monotonic())
+            try:
+                results[name] = future.result(timeout=remaining)
+            except FutureTimeoutError:
+                if name != "fuel":
+                    message = f"The {name} provider did not respond within {timeouts[name]} seconds."
+                    raise TimeoutError(message) from None
+                results[name] = {"ndvi": None, "fuelScore": None,
+                                 "fuelError": f"Satellite data request timed out after {timeouts[name]} seconds."}
+            except Exception as e:
+                if name != "fuel":
+                    raise
+                results[name] = {"ndvi": None, "fuelScore": None, "fuelError": str(e)}
+    finally:
+        # Stages that have not started are dropped; running ones finish in the background
+        for future in futures.values():
+            future.cancel()
+
+    merged = {"fuelError": None}
+    for stageResult in results.values():
+        merged.update(stageResult)
+    return merged
+
+
+@metrics.timed("assessment")
+def assess_location(lat, lon, radius, stages=None, timeouts=None):
+    """
+    Returns a dictionary with the risk score, its component scores and inputs for a location.
+
+    The weather, fuel and slope stages run concurrently (see run_stages). A failed or timed-out fuel
+    stage degrades to fuelScore = None; a failed weather or slope stage raises. With REUSE_ENABLED, a
+    component computed recently close enough by is reused instead; "reused" lists which ones, how and
+    from how far away.
+
+    :param lat: Latitude
+    :param lon: Longitude
+    :param radius: Radius in meters
+    :param stages: optional overrides of DEFAULT_STAGES (stage name -> function(lat, lon, radius))
+    :param timeouts: optional overrides of STAGE_TIMEOUTS (stage name -> seconds)
+    """
+
+    stages = {**DEFAULT_STAGES, **(stages or {})}
+    assessment = {"lat": lat, "lon": lon, "radius": radius, "reused": {}}
+
+    # Components recently computed close enough by are reused instead of fetched
+    if reuseIndex is not None:
+        for name in [name for name in stages if name in REUSE_KEYS]:
+            reused = reuseIndex.lookup(name, lat, lon, radius)
+            if reused is not None:
+                values, assessment["reused"][name] = reused
+                assessment.update(values)
+                metrics.increment("reused_components_total", component=name, mode=assessment["reused"][name]["mode"])
+                del stages[name]
+
+    computed = run_stages(lat, lon, radius, stages, timeouts) if stages else {}
+    assessment.setdefault("fuelError", None)
+    assessment.update(computed)
+
+    if reuseIndex is not None:
+        for name in stages:
+            if name not in REUSE_KEYS or (name == "fuel" and computed.get("fuelScore") is None):
+                continue
+            reuseIndex.add(name, lat, lon, radius, {key: computed[key] for key in REUSE_KEYS[name]})
+
+    with metrics.timer("score_risk"):
+        assessment["riskScore"] = wrd.calculate_risk_score(
+            assessment["weatherScore"], assessment["fuelScore"], assessment["slopeScore"]
+        )
+    return assessment
+
+
+#################################################################################
+
+# --- Forecast ---
+
+def run_forecast_stage(lat, lon, radius, hours=None):
+    """
+    Returns the hourly weather inputs and weather scores for a location, scored in one vectorized pass.
+
+    :param lat: Latitude
+    :param lon: Longitude
+    :param radius: Radius in meters (unused; weather does not depend on it)
+    :param hours: number of forecast hours; defaults to utils.FORECAST_HOURS
+    """
+
+    forecast = utils.get_hourly_forecast(lat, lon, hours)
+    with metrics.timer("score_forecast"):
+        weatherScores = wrd.calculate_weather_score_batch(
+            wrd.normalize_temperature_batch(forecast["temp"]),
+            wrd.normalize_humidity_batch(forecast["humidity"]),
+            wrd.normalize_wind_speed_batch(forecast["windSpeed"])
+        )
+
+    return {
+        "time": forecast["time"],
+        "temp": forecast["temp"],
+        "humidity": forecast["humidity"],
+        "windSpeed": forecast["windSpeed"],
+        "weatherScore": weatherScores
+    }
+
+
+@metrics.timed("forecast_assessment")
+def assess_forecast(lat, lon, radius, hours=None, windowHours=None, stages=None, timeouts=None):
+    """
+    Returns an hourly risk timeline for a location and its peak-risk window.
+
+    The hourly forecast, fuel and slope stages run concurrently, and fuel and slope are fetched once:
+    they do not change over the forecast, so every hour shares them. "weatherScore" and "riskScore"
+    are arrays aligned with "time"; "peakWindow" holds the start and end hours (inclusive) and the mean
+    risk of the windowHours-long run with the highest risk, or is None when the forecast has no hours.
+
+    :param lat: Latitude
+    :param lon: Longitude
+    :param radius: Radius in meters
+    :param hours: number of forecast hours; defaults to utils.FORECAST_HOURS
+    :param windowHours: length of the peak-risk window in hours; defaults to PEAK_WINDOW_HOURS
+    :param stages: optional overrides of the fuel and slope stages (stage name -> function(lat, lon, radius))
+    :param timeouts: optional overrides of STAGE_TIMEOUTS (stage name -> seconds)
+    """
+
+    stages = {
+        "weather": lambda lat, lon, radius: run_forecast_stage(lat, lon, radius, hours),
+        "fuel": run_fuel_stage,
+        "slope": run_slope_stage,
+        **(stages or {})
+    }
+    timeline = {"lat": lat, "lon": lon, "radius": radius}
+    timeline.update(run_stages(lat, lon, radius, stages, timeouts))
+
+    fuelScore = np.nan if timeline["fuelScore"] is None else timeline["fuelScore"]
+    with metrics.timer("score_risk"):
+        riskScores = wrd.calculate_risk_score_batch(timeline["weatherScore"], fuelScore, timeline["slopeScore"])
+    timeline["riskScore"] = np.broadcast_to(riskScores, timeline["weatherScore"].shape).copy()
+
+    peakWindow = wrd.get_peak_window(timeline["riskScore"], windowHours or PEAK_WINDOW_HOURS)
+    timeline["peakWindow"] = None
+    if peakWindow is not None:
+        start, end = peakWindow
+        timeline["peakWindow"] = {
+            "start": timeline["time"][start],
+            "end": timeline["time"][end - 1],
+            "riskScore": round(float(timeline["riskScore"][start:end].mean()), 2)
+        }
+    return timeline
+
+
+#################################################################################
+
+# --- Radius Sweep ---
+
+def run_fuel_sweep_stage(lat, lon, radii):
+    """
+    Returns NDVI and fuel score arrays for concentric buffers, reduced in one Earth Engine request.
+    Radii without satellite data are NaN.
+
+    :param lat: Latitude
+    :param lon: Longitude
+    :param radii: list of radii in meters
+    """
+
+    ndvis = utils.get_ndvi_batch([(lat, lon, radius) for radius in radii])
+    with metrics.timer("score_fuel"):
+        fuelScores = wrd.normalize_fuel_batch(ndvis)
+    return {"ndvi": ndvis, "fuelScore": fuelScores}
+
+
+def run_slope_sweep_stage(lat, lon, radii):
+    """
+    Returns slope and slope score arrays for every radius, with all neighbour rings' elevations
+    fetched in one batched request.
+
+    :param lat: Latitude
+    :param lon: Longitude
+    :param radii: list of radii in meters
+    """
+
+    radii = np.asarray(radii, dtype=float)
+    lats = np.full(radii.shape, lat)
+    lons = np.full(radii.shape, lon)
+    elevations = utils.get_elevation_data_batch(lats, lons, radii)
+    with metrics.timer("score_slope"):
+        slopes = wrd.get_steepness_batch(elevations, lats, radii)
+        slopeScores = wrd.normalize_slope_batch(slopes)
+    return {"slope": slopes, "slopeScore": slopeScores}
+
+
+SWEEP_STAGES = {
+    "weather": run_weather_stage,
+    "fuel": run_fuel_sweep_stage,
+    "slope": run_slope_sweep_stage
+}
+
+
+@metrics.timed("sweep_assessment")
+def assess_sweep(lat, lon, radii, stages=None, timeouts=None):
+    """
+    Returns one assessment per radius (shaped like assess_location's) for a single location.
+
+    Weather is fetched once and shared by every radius; NDVI for all the buffers and elevations for all
+    the neighbour rings are each fetched in one batched request. A radius without satellite data gets
+    fuelScore = None and a "fuelError", like a failed fuel stage.
+
+    :param lat: Latitude
+    :param lon: Longitude
+    :param radii: list of radii in meters
+    :param stages: optional overrides of SWEEP_STAGES (stage name -> function(lat, lon, radii))
+    :param timeouts: optional overrides of STAGE_TIMEOUTS (stage name -> seconds)
+    """
+
+    radii = [float(radius) for radius in radii]
+    results = run_stages(lat, lon, radii, {**SWEEP_STAGES, **(stages or {})}, timeouts)
+
+    ndvis = np.broadcast_to(np.asarray(results["ndvi"], dtype=float), len(radii))
+    fuelScores = np.broadcast_to(np.asarray(results["fuelScore"], dtype=float), len(radii))
+    with metrics.timer("score_risk"):
+        riskScores = wrd.calculate_risk_score_batch(results["weatherScore"], fuelScores, results["slopeScore"])
+
+    assessments = []
+    for index, radius in enumerate(radii):
+        hasFuel = not np.isnan(fuelScores[index])
+        assessments.append({
+            "lat": lat,
+            "lon": lon,
+            "radius": radius,
+            "temp": results["temp"],
+            "humidity": results["humidity"],
+            "windSpeed": results["windSpeed"],
+            "weatherScore": results["weatherScore"],
+            "ndvi": float(ndvis[index]) if hasFuel else None,
+            "fuelScore": float(fuelScores[index]) if hasFuel else None,
+            "fuelError": None if hasFuel else (results["fuelError"] or utils.NO_SATELLITE_DATA_MESSAGE),
+            "slope": float(results["slope"][index]),
+            "slopeScore": float(results["slopeScore"][index]),
+            "riskScore": float(riskScores[index])
+        })
+    return assessments
@@ -0,0 +1,160 @@
+"""
+Offline postal-code geocoding.
+
+A GeoNames postal-code dump (https://download.geonames.org/export/zip/, e.g. allCountries.zip or US.zip)
+is packed into a SQLite index of postal-code centroids keyed by (country, normalized zip). Keying by
+country avoids the cross-country zip collisions the provider waterfall guards against (69450 is both
+Brazilian and French), and Brazilian CEPs are stored in their full 8-digit form with a city-level
+"-000" centroid for every 5-digit prefix. The geocoding waterfall consults the index before the providers.
+"""
+
+# Imports
+import csv
+import io
+import os
+import zipfile
+from contextlib import closing
+
+from . import metrics
+from .cache import SqliteCache, get_cache_dir, normalize_postal_code
+
+# Global Variables
+DEFAULT_INDEX_NAME = "postal_index.sqlite"
+# country, zip, place, admin1 name, admin1 code, admin2 name, admin2 code, admin3 name, admin3 code, lat, lon, accuracy
+GEONAMES_COLUMNS = 12
+BUILD_BATCH_SIZE = 50_000
+
+
+def get_postal_key(zipCode, countryCode):
+    """
+    Returns the (country, zip) key of a postal code. Brazilian CEPs become "NNNNN-NNN", with "-000"
+    appended to a 5-digit prefix; other codes are normalized with normalize_postal_code.
+
+    :param zipCode: postal code as entered
+    :param countryCode: ISO Alpha-2 country code
+    """
+
+    countryCode = countryCode.strip().upper()
+    zipCode = normalize_postal_code(zipCode)
+
+    if countryCode == "BR":
+        digits = "".join(character for character in zipCode if character.isdigit())
+        if len(digits) == 5:
+            digits += "000"
+        if len(digits) == 8:
+            zipCode = f"{digits[:5]}-{digits[5:]}"
+
+    return countryCode, zipCode
+
+
+def read_geonames(path):
+    """
+    Yields (country, zip, name, lat, lon) rows from a GeoNames postal-code dump (.txt, or a .zip of them).
+
+    :param path: dump file
+    """
+
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            for member in archive.namelist():
+                if member.lower().endswith(".txt") and "readme" not in member.lower():
+                    with archive.open(member) as file:
+                        yield from parse_geonames(io.TextIOWrapper(file, encoding="utf-8", newline=""))
+    else:
+        with open(path, encoding="utf-8", newline="") as file:
+            yield from parse_geonames(file)
+
+
+def parse_geonames(file):
+    """
+    Yields (country, zip, name, lat, lon) rows from an open tab-separated GeoNames file.
+
+    :param file: text file object
+    """
+
+    for row in csv.reader(file, delimiter="\t", quoting=csv.QUOTE_NONE):
+        if len(row) < GEONAMES_COLUMNS - 1 or not row[9] or not row[10]:
+            continue
+        countryCode, zipCode = get_postal_key(row[1], row[0])
+        name = ", ".join(part for part in (row[2], row[3]) if part)
+        yield countryCode, zipCode, name, float(row[9]), float(row[10])
+
+
+#################################################################################
+
+# --- Postal Index ---
+
+class PostalIndex(SqliteCache):
+    """
+    SQLite index of postal-code centroids keyed by (country, normalized zip).
+    Codes listed several times in the dump (one row per place) are averaged into one centroid.
+    """
+
+    table = "postal"
+    schema = (
+        "country TEXT NOT NULL, zip TEXT NOT NULL, lat REAL NOT NULL, lon REAL NOT NULL, name TEXT, "
+        "PRIMARY KEY (country, zip)"
+    )
+
+    def __init__(self, path=None):
+        """
+        :param path: SQLite file to use; defaults to postal_index.sqlite in the cache directory
+        """
+
+        super().__init__(path or os.path.join(get_cache_dir(), DEFAULT_INDEX_NAME))
+
+    def get(self, zipCode, countryCode):
+        """
+        Returns the location of a postal code as a dictionary with "lat", "lon", "name" and "source",
+        or None when the index does not have it. An unknown Brazilian CEP falls back to its city-level "-000" centroid.
+
+        :param zipCode: postal code
+        :param countryCode: ISO Alpha-2 country code
+        """
+
+        countryCode, zipCode = get_postal_key(zipCode, countryCode)
+        keys = [zipCode]
+        if countryCode == "BR" and len(zipCode) == 9 and not zipCode.endswith("-000"):
+            keys.append(f"{zipCode[:5]}-000")
+
+        for key in keys:
+            row = self._fetch_row("SELECT lat, lon, name FROM postal WHERE country = ? AND zip = ?", (countryCode, key))
+            if row is not None:
+                metrics.record_cache_lookup("postal_index", True)
+                return {"lat": row[0], "lon": row[1], "name": row[2], "source": "postal_index"}
+
+        metrics.record_cache_lookup("postal_index", False)
+        return None
+
+    def build(self, sourcePath):
+        """
+        Replaces the index with the postal codes of a GeoNames dump and returns the number of keys indexed.
+
+        :param sourcePath: GeoNames postal-code dump (.txt or .zip)
+        """
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with closing(self._connect()) as connection:
+            connection.execute("CREATE TEMP TABLE raw (country TEXT, zip TEXT, name TEXT, lat REAL, lon REAL)")
+
+            batch = []
+            for row in read_geonames(sourcePath):
+                batch.append(row)
+                if len(batch) >= BUILD_BATCH_SIZE:
+                    connection.executemany("INSERT INTO raw VALUES (?, ?, ?, ?, ?)", batch)
+                    batch = []
+            connection.executemany("INSERT INTO raw VALUES (?, ?, ?, ?, ?)", batch)
+
+            connection.execute("DELETE FROM postal")
+            connection.execute(
+                "INSERT INTO postal (country, zip, lat, lon, name) "
+                "SELECT country, zip, AVG(lat), AVG(lon), MIN(name) FROM raw GROUP BY country, zip"
+            )
+            # City-level centroid for every Brazilian 5-digit prefix the dump does not list itself
+            connection.execute(
+                "INSERT OR IGNORE INTO postal (country, zip, lat, lon, name) "
+                "SELECT country, substr(zip, 1, 5) || '-000', AVG(lat), AVG(lon), MIN(name) FROM raw "
+                "WHERE country = 'BR' AND length(zip) = 9 GROUP BY country, substr(zip, 1, 5)"
+            )
+            connection.commit()
+            return connection.execute("SELECT COUNT(*) FROM postal").fetchone()[0]
@@ -0,0 +1,185 @@
+"""
+Per-provider request rate limiting.
+
+Each provider gets a token bucket whose state lives in a small file in the cache directory, locked with
+fcntl, so every thread and every process on the machine (dashboard sessions, bulk workers) draws from
+the same budget. The refill rate adapts to the provider: a 429 halves it and honours Retry-After, and it
+then climbs back linearly to the configured ceiling (additive increase, multiplicative decrease), so
+throughput settles just under the quota instead of bursting into bans.
+"""
+
+# Imports
+import os
+import struct
+import threading
+import time
+
+from . import metrics
+from .cache import get_cache_dir
+
+try:
+    import fcntl
+except ImportError: # Windows: buckets are shared between threads only
+    fcntl = None
+
+# Global Variables
+ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1") != "0"
+# Default (requests per second, burst) per provider, overridable with <PROVIDER>_RATE_LIMIT and <PROVIDER>_RATE_BURST
+DEFAULT_RATE_LIMITS = {
+    "openweather": (1.0, 10), # Free tier: 60 calls/minute
+    "google": (50.0, 50), # Geocoding API: 50 queries/second
+    "open_meteo": (5.0, 20) # Free tier: 600 calls/minute
+}
+RECOVERY_PER_SECOND = 0.05 # Fraction of the ceiling regained each second after a throttle
+MIN_RATE_FRACTION = 0.05 # Lowest the rate can fall, as a fraction of the ceiling
+RETRY_AFTER_MAX = float(os.getenv("HTTP_RETRY_AFTER_MAX", "60")) # Longest Retry-After a bucket blocks for, as in utils
+STATE_FORMAT = "5d" # tokens, updated, rate, blockedUntil, lastThrottle
+
+_registryLock = threading.Lock()
+_buckets = {}
+
+
+class TokenBucket:
+    """
+    Token bucket shared through a locked state file, with an adaptive refill rate.
+    """
+
+    def __init__(self, name, rate, burst, statePath=None):
+        """
+        :param name: provider name, used in the state file name and metrics
+        :param rate: ceiling in requests per second
+        :param burst: most requests that can be made at once after an idle period
+        :param statePath: state file (default <cache dir>/ratelimit-<name>.state)
+        """
+
+        self.name = name
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.statePath = statePath or os.path.join(get_cache_dir(), f"ratelimit-{name}.state")
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.statePath) or ".", exist_ok=True)
+
+    def _update(self, function):
+        # Read, refill, modify and write the shared state under the thread and file locks
+        with self._lock:
+            fd = os.open(self.statePath, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+
+                now = time.time()
+                data = os.pread(fd, struct.calcsize(STATE_FORMAT), 0)
+                if len(data) == struct.calcsize(STATE_FORMAT):
+                    tokens, updated, rate, blockedUntil, lastThrottle = struct.unpack(STATE_FORMAT, data)
+                else:
+                    tokens, updated, rate, blockedUntil, lastThrottle = self.burst, now, self.rate, 0.0, 0.0
+
+                # Refill at the current rate, and let the rate recover towards the ceiling
+                elapsed = max(0.0, now - updated)
+                rate = min(self.rate, rate + self.rate * RECOVERY_PER_SECOND * elapsed)
+                tokens = min(self.burst, tokens + rate * elapsed)
+
+                state = {"tokens": tokens, "rate": rate, "blockedUntil": blockedUntil, "lastThrottle": lastThrottle}
+                result = function(state, now)
+                os.pwrite(fd, struct.pack(STATE_FORMAT, state["tokens"], now, state["rate"],
+                                          state["blockedUntil"], state["lastThrottle"]), 0)
+                return result
+            finally:
+                os.close(fd) # Also releases the file lock
+
+    def try_acquire(self):
+        """
+        Takes a token if one is available and returns 0, or returns the seconds to wait before trying again.
+        """
+
+        def take(state, now):
+            if now < state["blockedUntil"]:
+                return state["blockedUntil"] - now
+            if state["tokens"] >= 1:
+                state["tokens"] -= 1
+                return 0.0
+            return (1 - state["tokens"]) / state["rate"]
+
+        return self._update(take)
+
+    def acquire(self):
+        """
+        Blocks until a request may be sent and returns the seconds spent waiting.
+        """
+
+        waited = 0.0
+        while True:
+            delay = self.try_acquire()
+            if delay <= 0:
+                break
+            time.sleep(delay)
+            waited += delay
+
+        if waited:
+            metrics.observe("rate_limit_wait_seconds", waited, provider=self.name)
+        return waited
+
+    def throttle(self, retryAfter=None):
+        """
+        Records a 429 from the provider: halves the rate (at most once per second, since concurrent
+        requests are usually rejected together), empties the bucket and blocks until Retry-After passes,
+        for at most RETRY_AFTER_MAX seconds.
+
+        :param retryAfter: value of the Retry-After response header, if any
+        """
+
+        def slow_down(state, now):
+            if now - state["lastThrottle"] >= 1.0:
+                state["rate"] = max(self.rate * MIN_RATE_FRACTION, state["rate"] / 2)
+                state["lastThrottle"] = now
+            state["tokens"] = 0.0
+            if retryAfter is not None and str(retryAfter).replace(".", "", 1).isdigit():
+                state["blockedUntil"] = max(state["blockedUntil"], now + min(float(retryAfter), RETRY_AFTER_MAX))
+
+        metrics.increment("rate_limit_throttles_total", provider=self.name)
+        self._update(slow_down)
+
+    def get_rate(self):
+        """
+        Returns the current refill rate in requests per second.
+        """
+
+        return self._update(lambda state, now: state["rate"])
+
+
+def get_rate_limit(provider):
+    """
+    Returns the configured (rate, burst) of a provider.
+
+    :param provider: provider name (e.g. "openweather")
+    """
+
+    rate, burst = DEFAULT_RATE_LIMITS[provider]
+    prefix = provider.upper()
+    return float(os.getenv(f"{prefix}_RATE_LIMIT", rate)), float(os.getenv(f"{prefix}_RATE_BURST", burst))
+
+
+def get_rate_limiter(provider):
+    """
+    Returns the shared TokenBucket of a provider, or None when rate limiting is disabled or provider is None.
+
+    :param provider: provider name (e.g. "openweather"), or None
+    """
+
+    if not ENABLED or provider is None:
+        return None
+
+    with _registryLock:
+        bucket = _buckets.get(provider)
+        if bucket is None:
+            bucket = _buckets[provider] = TokenBucket(provider, *get_rate_limit(provider))
+        return bucket
+
+
+def reset_rate_limiters():
+    """
+    Forgets the buckets so they are rebuilt from the current configuration on next use.
+    """
+
+    with _registryLock:
+        _buckets.clear()
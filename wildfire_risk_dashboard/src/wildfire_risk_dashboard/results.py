@@ -0,0 +1,270 @@
+"""
+Typed risk results.
+
+RiskResult is a slotted record of one assessment: its location, component scores, the inputs they were
+computed from, where the location came from (and which geocoder answered) and when it was assessed.
+RiskResultBatch holds many results column by column, numeric fields in NumPy float64 arrays (None stored as
+NaN) and text fields in lists, so a million results cost a few arrays instead of a million dictionaries.
+Batches convert to Arrow without copying the numeric columns and write Parquet or Arrow IPC files through
+pyarrow, which is optional.
+"""
+
+# Imports
+import time
+from dataclasses import dataclass, fields
+
+import numpy as np
+
+# Global Variables
+TEXT_COLUMNS = {"id", "zip", "country", "fuelError", "error", "source", "geocodeSource"}
+INITIAL_CAPACITY = 1024
+
+
+def import_pyarrow():
+    """
+    Returns the pyarrow and pyarrow.parquet modules, which are only needed for Parquet and Arrow files.
+    """
+
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("Parquet support requires pyarrow (pip install pyarrow).") from e
+    return pyarrow, pyarrow.parquet
+
+
+@dataclass(slots=True)
+class RiskResult:
+    """
+    Result of one assessment. Scores are percentages (0-100); fuelScore and ndvi are None when no
+    satellite data was available, with the reason in fuelError.
+
+    "source" is how the location was given: "coordinates" when lat/lon were supplied, "geocode" when they
+    were looked up from zip/country. For geocoded locations, "geocodeSource" says what answered the lookup:
+    "postal_index", "cache", "owm" or "google" (see utils.geocode_location); it is None otherwise.
+    "assessedAt" is the Unix time the result was assembled. It is a single stamp for the whole result,
+    not a per-provider timestamp, so cached weather, NDVI or elevation inputs may be older than it.
+    """
+
+    id: str | None = None
+    zip: str | None = None
+    country: str | None = None
+    lat: float | None = None
+    lon: float | None = None
+    radius: float | None = None
+    riskScore: float | None = None
+    weatherScore: float | None = None
+    fuelScore: float | None = None
+    slopeScore: float | None = None
+    temp: float | None = None
+    humidity: float | None = None
+    windSpeed: float | None = None
+    ndvi: float | None = None
+    slope: float | None = None
+    fuelError: str | None = None
+    error: str | None = None
+    source: str | None = None
+    geocodeSource: str | None = None
+    assessedAt: float | None = None
+
+    @classmethod
+    def from_assessment(cls, assessment, **values):
+        """
+        Returns a result from a pipeline.assess_location dictionary, stamped with the current time.
+        Keys that are not result fields (e.g. "reused") are ignored.
+
+        :param assessment: dictionary returned by pipeline.assess_location
+        :param values: further fields to set (e.g. id, source)
+        """
+
+        values = {**{key: assessment[key] for key in RESULT_COLUMNS if key in assessment}, **values}
+        values.setdefault("assessedAt", time.time())
+        return cls(**values)
+
+    def to_dict(self):
+        """
+        Returns the result as a dictionary keyed by RESULT_COLUMNS.
+        """
+
+        return {column: getattr(self, column) for column in RESULT_COLUMNS}
+
+
+RESULT_COLUMNS = [field.name for field in fields(RiskResult)]
+NUMERIC_COLUMNS = [column for column in RESULT_COLUMNS if column not in TEXT_COLUMNS]
+
+
+def get_arrow_schema(pyarrow):
+    """
+    Returns the Arrow schema of results: strings for TEXT_COLUMNS and float64 for the rest.
+
+    :param pyarrow: the pyarrow module (see import_pyarrow)
+    """
+
+    return pyarrow.schema([
+        (column, pyarrow.string() if column in TEXT_COLUMNS else pyarrow.float64())
+        for column in RESULT_COLUMNS
+    ])
+
+
+#################################################################################
+
+# --- Result Batches ---
+
+class RiskResultBatch:
+    """
+    Columnar container of RiskResults. Numeric columns are float64 arrays grown by doubling, with
+    missing values as NaN; text columns are lists.
+    """
+
+    def __init__(self, capacity=None):
+        """
+        :param capacity: rows to allocate up front (default INITIAL_CAPACITY)
+        """
+
+        capacity = capacity or INITIAL_CAPACITY
+        self._numeric = {column: np.full(capacity, np.nan) for column in NUMERIC_COLUMNS}
+        self._text = {column: [] for column in TEXT_COLUMNS}
+        self._size = 0
+
+    @classmethod
+    def from_results(cls, results):
+        """
+        Returns a batch of RiskResults.
+
+        :param results: iterable of RiskResult
+        """
+
+        results = list(results)
+        batch = cls(max(len(results), 1))
+        batch.extend(results)
+        return batch
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        for index in range(self._size):
+            yield self[index]
+
+    def __getitem__(self, index):
+        if not -self._size <= index < self._size:
+            raise IndexError("RiskResultBatch index out of range")
+        index %= self._size
+        return RiskResult(**{
+            column: self._text[column][index] if column in TEXT_COLUMNS else self._get_number(column, index)
+            for column in RESULT_COLUMNS
+        })
+
+    def _get_number(self, column, index):
+        value = self._numeric[column][index]
+        return None if np.isnan(value) else float(value)
+
+    def _reserve(self, size):
+        capacity = len(self._numeric[NUMERIC_COLUMNS[0]])
+        if size <= capacity:
+            return
+        while capacity < size:
+            capacity *= 2
+        for column, values in self._numeric.items():
+            grown = np.full(capacity, np.nan)
+            grown[:self._size] = values[:self._size]
+            self._numeric[column] = grown
+
+    def append(self, result):
+        """
+        Adds a RiskResult to the end of the batch.
+
+        :param result: RiskResult
+        """
+
+        self._reserve(self._size + 1)
+        for column in NUMERIC_COLUMNS:
+            value = getattr(result, column)
+            if value is not None:
+                self._numeric[column][self._size] = value
+        for column in TEXT_COLUMNS:
+            self._text[column].append(getattr(result, column))
+        self._size += 1
+
+    def extend(self, results):
+        """
+        Adds RiskResults to the end of the batch.
+
+        :param results: iterable of RiskResult
+        """
+
+        for result in results:
+            self.append(result)
+
+    def column(self, name):
+        """
+        Returns a column: a float64 array view (NaN where missing) for numeric fields, a list for text fields.
+
+        :param name: field name (see RESULT_COLUMNS)
+        """
+
+        if name in TEXT_COLUMNS:
+            return self._text[name]
+        return self._numeric[name][:self._size]
+
+    def to_rows(self):
+        """
+        Yields each result as a dictionary keyed by RESULT_COLUMNS, with missing values as None.
+        """
+
+        numeric = {
+            column: np.where(np.isnan(values), None, values).tolist()
+            for column, values in ((column, self.column(column)) for column in NUMERIC_COLUMNS)
+        }
+        for index in range(self._size):
+            yield {
+                column: self._text[column][index] if column in TEXT_COLUMNS else numeric[column][index]
+                for column in RESULT_COLUMNS
+            }
+
+    # Arrow and Parquet
+    def to_arrow(self):
+        """
+        Returns the batch as a pyarrow Table. Numeric columns share memory with the batch rather than
+        being copied; NaN becomes null through a validity bitmap.
+        """
+
+        pyarrow, _ = import_pyarrow()
+        schema = get_arrow_schema(pyarrow)
+
+        arrays = []
+        for column in RESULT_COLUMNS:
+            if column in TEXT_COLUMNS:
+                arrays.append(pyarrow.array(self._text[column], type=pyarrow.string()))
+                continue
+
+            values = self.column(column)
+            missing = np.isnan(values)
+            validity = pyarrow.py_buffer(np.packbits(~missing, bitorder="little")) if missing.any() else None
+            arrays.append(pyarrow.Array.from_buffers(
+                pyarrow.float64(), self._size, [validity, pyarrow.py_buffer(values)], null_count=int(missing.sum())
+            ))
+        return pyarrow.Table.from_arrays(arrays, schema=schema)
+
+    def write_parquet(self, path):
+        """
+        Writes the batch to a Parquet file.
+
+        :param path: output file
+        """
+
+        _, parquet = import_pyarrow()
+        parquet.write_table(self.to_arrow(), path)
+
+    def write_arrow(self, path):
+        """
+        Writes the batch to an Arrow IPC (Feather v2) file, which can be memory-mapped back without copying.
+
+        :param path: output file
+        """
+
+        pyarrow, _ = import_pyarrow()
+        table = self.to_arrow()
+        with pyarrow.OSFile(path, "wb") as sink:
+            with pyarrow.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
@@ -0,0 +1,237 @@
+"""
+Reuse of previously computed component inputs for nearby locations.
+
+Every computed weather, fuel and slope stage result is recorded in a geohash grid. A later assessment
+within a component's distance and freshness tolerance reuses its neighbours' inputs instead of calling
+the providers: the nearest neighbour's when it is very close, otherwise an inverse-distance-weighted
+interpolation of all neighbours in range. Scores are recomputed from the reused inputs.
+"""
+
+# Imports
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from . import wildfire_risk_dashboard as wrd
+from .cache import encode_geohash
+
+# Global Variables
+METERS_PER_DEGREE = 111_111
+# Default (distance in meters, max age in seconds) per component, overridable with REUSE_<COMPONENT>_DISTANCE / _MAX_AGE
+DEFAULT_TOLERANCES = {
+    "weather": (1000.0, 600.0), # Current conditions barely change over a kilometre; OWM refreshes every 10 minutes
+    "fuel": (15.0, 32 * 86_400.0), # Half a Landsat pixel; one 32-day composite
+    "slope": (5.0, 365 * 86_400.0) # Terrain does not change
+}
+SNAP_FRACTION = 0.25 # Within this fraction of the tolerance, the nearest neighbour is reused as is
+
+
+def get_grid_precision(distance):
+    """
+    Returns the longest geohash precision whose cells are at least distance meters tall,
+    so that every neighbour in range is in the 3 x 3 block of cells around a point.
+
+    :param distance: tolerance in meters
+    """
+
+    for precision in range(12, 0, -1):
+        latBits = (5 * precision) // 2
+        if 180 / 2 ** latBits * METERS_PER_DEGREE >= distance:
+            return precision
+    return 1
+
+
+def get_cell_size(precision):
+    """
+    Returns the (height, width) of a geohash cell in degrees.
+
+    :param precision: number of geohash characters
+    """
+
+    latBits = (5 * precision) // 2
+    lonBits = 5 * precision - latBits
+    return 180 / 2 ** latBits, 360 / 2 ** lonBits
+
+
+def get_distance(latA, lonA, latB, lonB):
+    """
+    Returns the distance in meters between two nearby points on the WGS84 ellipsoid.
+
+    :param latA: latitude of the first point
+    :param lonA: longitude of the first point
+    :param latB: latitude of the second point
+    :param lonB: longitude of the second point
+    """
+
+    metersPerLat, metersPerLon = wrd.get_meters_per_degree((latA + latB) / 2)
+    return math.hypot((latB - latA) * float(metersPerLat), (lonB - lonA) * float(metersPerLon))
+
+
+#################################################################################
+
+# --- Component Grids ---
+
+class ComponentGrid:
+    """
+    Geohash grid of one component's recorded inputs, bounded to the most recently used cells.
+    """
+
+    def __init__(self, distance, maxAge, maxEntries):
+        """
+        :param distance: tolerance in meters
+        :param maxAge: seconds a recorded result stays reusable
+        :param maxEntries: most results kept before the least recently used cells are dropped
+        """
+
+        self.distance = distance
+        self.maxAge = maxAge
+        self.maxEntries = maxEntries
+        self.precision = get_grid_precision(distance)
+        self.cellHeight, self.cellWidth = get_cell_size(self.precision)
+        self._cells = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def _get_neighbor_cells(self, lat, lon):
+        # Cells are at least self.distance tall, but narrow with latitude, so widen the block as needed
+        metersPerLon = max(METERS_PER_DEGREE * math.cos(math.radians(lat)), 1.0)
+        columns = max(1, math.ceil(self.distance / (self.cellWidth * metersPerLon)))
+        return {
+            encode_geohash(lat + row * self.cellHeight, lon + column * self.cellWidth, self.precision)
+            for row in (-1, 0, 1)
+            for column in range(-columns, columns + 1)
+        }
+
+    def add(self, lat, lon, radius, values, timestamp):
+        """
+        Records a result in the cell containing (lat, lon).
+        """
+
+        cell = encode_geohash(lat, lon, self.precision)
+        with self._lock:
+            entries = self._cells.setdefault(cell, [])
+            entries.append((lat, lon, radius, values, timestamp))
+            self._cells.move_to_end(cell)
+            self._size += 1
+            while self._size > self.maxEntries and self._cells:
+                _, dropped = self._cells.popitem(last=False)
+                self._size -= len(dropped)
+
+    def find(self, lat, lon, radius, now):
+        """
+        Returns a list of (distance, age, values) for fresh results within the tolerance, nearest first.
+        """
+
+        neighbors = []
+        with self._lock:
+            for cell in self._get_neighbor_cells(lat, lon):
+                for entryLat, entryLon, entryRadius, values, timestamp in self._cells.get(cell, ()):
+                    age = now - timestamp
+                    if entryRadius != radius or age > self.maxAge:
+                        continue
+                    distance = get_distance(lat, lon, entryLat, entryLon)
+                    if distance <= self.distance:
+                        neighbors.append((distance, age, values))
+        return sorted(neighbors, key=lambda neighbor: neighbor[0])
+
+
+#################################################################################
+
+# --- Reuse Index ---
+
+class ReuseIndex:
+    """
+    Spatial index of computed weather, fuel and slope inputs for reuse by nearby assessments.
+    """
+
+    def __init__(self, tolerances=None, maxEntries=None):
+        """
+        :param tolerances: optional overrides of DEFAULT_TOLERANCES (component -> (distance meters, max age seconds))
+        :param maxEntries: results kept per component (default REUSE_MAX_ENTRIES, 100000)
+        """
+
+        maxEntries = maxEntries or int(os.getenv("REUSE_MAX_ENTRIES", "100000"))
+        self.grids = {}
+        for component, (distance, maxAge) in DEFAULT_TOLERANCES.items():
+            distance = float(os.getenv(f"REUSE_{component.upper()}_DISTANCE", distance))
+            maxAge = float(os.getenv(f"REUSE_{component.upper()}_MAX_AGE", maxAge))
+            distance, maxAge = (tolerances or {}).get(component, (distance, maxAge))
+            self.grids[component] = ComponentGrid(distance, maxAge, maxEntries)
+
+    def add(self, component, lat, lon, radius, values):
+        """
+        Records a computed stage result.
+
+        :param component: "weather", "fuel" or "slope"
+        :param lat: Latitude
+        :param lon: Longitude
+        :param radius: Radius in meters (ignored for weather)
+        :param values: stage result (see pipeline.DEFAULT_STAGES)
+        """
+
+        radius = None if component == "weather" else float(radius)
+        self.grids[component].add(lat, lon, radius, dict(values), time.time())
+
+    def lookup(self, component, lat, lon, radius):
+        """
+        Returns (values, reuseInfo) reused from nearby results, or None when nothing is in range.
+        reuseInfo has "mode" ("nearest" or "interpolated"), "distance" (meters to the nearest neighbour),
+        "neighbors" (results used) and "age" (seconds since the nearest was computed).
+
+        :param component: "weather", "fuel" or "slope"
+        :param lat: Latitude
+        :param lon: Longitude
+        :param radius: Radius in meters (ignored for weather)
+        """
+
+        grid = self.grids[component]
+        radius = None if component == "weather" else float(radius)
+        neighbors = grid.find(lat, lon, radius, time.time())
+        if not neighbors:
+            return None
+
+        distance, age, values = neighbors[0]
+        if len(neighbors) == 1 or distance <= grid.distance * SNAP_FRACTION:
+            info = {"mode": "nearest", "distance": round(distance, 2), "neighbors": 1, "age": round(age, 1)}
+            return dict(values), info
+
+        info = {"mode": "interpolated", "distance": round(distance, 2), "neighbors": len(neighbors),
+                "age": round(age, 1)}
+        return interpolate_inputs(component, neighbors), info
+
+
+def interpolate_inputs(component, neighbors):
+    """
+    Returns a stage result whose inputs are the inverse-distance-weighted mean of the neighbours'
+    inputs, with its scores recomputed from them.
+
+    :param component: "weather", "fuel" or "slope"
+    :param neighbors: list of (distance, age, values) from ComponentGrid.find
+    """
+
+    weights = [1 / max(distance, 1e-6) for distance, _, _ in neighbors]
+    total = sum(weights)
+
+    def weighted(key):
+        return sum(weight * values[key] for weight, (_, _, values) in zip(weights, neighbors, strict=True)) / total
+
+    if component == "weather":
+        weatherData = {"main": {"temp": weighted("temp"), "humidity": weighted("humidity")},
+                       "wind": {"speed": weighted("windSpeed")}}
+        return {
+            "temp": weatherData["main"]["temp"],
+            "humidity": weatherData["main"]["humidity"],
+            "windSpeed": weatherData["wind"]["speed"],
+            "weatherScore": wrd.calculate_weather_score(
+                wrd.normalize_temperature(weatherData), wrd.normalize_humidity(weatherData),
+                wrd.normalize_wind_speed(weatherData)
+            )
+        }
+    if component == "fuel":
+        ndvi = weighted("ndvi")
+        return {"ndvi": ndvi, "fuelScore": wrd.normalize_fuel(ndvi)}
+
+    slope = weighted("slope")
+    return {"slope": slope, "slopeScore": wrd.normalize_slope(slope)}
@@ -0,0 +1,331 @@
+"""
+XYZ risk heatmap tiles.
+
+Each 256 x 256 web-map tile is scored on a grid of sample points with the batch scoring kernel: one
+weather lookup for the tile, one elevation grid (sloped with Horn's kernel) and one Earth Engine NDVI
+reduction for every sample. The risk grid is coloured like the dashboard gauge and written as a PNG
+with zlib and struct only. Tiles are cached in memory and on disk, keyed by the data epoch as well as
+z/x/y, so panning and zooming do not recompute them until the underlying data changes. A small local
+HTTP server exposes them to folium at /tiles/{z}/{x}/{y}.png.
+"""
+
+# Imports
+import math
+import os
+import re
+import shutil
+import struct
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from . import metrics, utils
+from . import wildfire_risk_dashboard as wrd
+from .cache import get_cache_dir, get_composite_period
+
+# Global Variables
+TILE_SIZE = 256
+TILE_SAMPLES = int(os.getenv("TILE_SAMPLES", "32")) # Sample points per tile side; must divide TILE_SIZE
+TILE_MIN_ZOOM = int(os.getenv("TILE_MIN_ZOOM", "12")) # Lower zooms span too much ground to score per tile
+TILE_EPOCH_SECONDS = int(os.getenv("TILE_EPOCH_SECONDS", "3600")) # How long rendered tiles stay current
+TILE_ALPHA = 160
+# Gauge colours at risk scores 0, 50 and 100 (green, orange, red)
+RISK_COLOR_STOPS = np.array([0.0, 50.0, 100.0])
+RISK_COLORS = np.array([[46, 204, 113], [243, 156, 18], [231, 76, 60]], dtype=float)
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+TILE_PATH_PATTERN = re.compile(r"^/tiles/(\d+)/(\d+)/(\d+)\.png$")
+MAX_ZOOM = 30 # Deepest zoom any XYZ client requests; also keeps 2 ** z small
+
+
+def is_valid_tile(z, x, y):
+    """
+    Returns whether z/x/y names an existing XYZ tile.
+
+    :param z: zoom level
+    :param x: tile column
+    :param y: tile row
+    """
+
+    return 0 <= z <= MAX_ZOOM and 0 <= x < 2 ** z and 0 <= y < 2 ** z
+
+
+def get_tile_bounds(z, x, y):
+    """
+    Returns the (south, west, north, east) bounds in degrees of a Web Mercator XYZ tile.
+
+    :param z: zoom level
+    :param x: tile column
+    :param y: tile row (0 at the north)
+    """
+
+    tiles = 2 ** z
+
+    def get_tile_lat(row):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / tiles))))
+
+    return get_tile_lat(y + 1), x / tiles * 360 - 180, get_tile_lat(y), (x + 1) / tiles * 360 - 180
+
+
+def get_data_epoch(now=None):
+    """
+    Returns the data epoch tiles are cached under: the NDVI composite period plus the TILE_EPOCH_SECONDS
+    window, so tiles are re-rendered when either the weather window or the satellite composite moves on.
+
+    :param now: Unix time (defaults to the current time)
+    """
+
+    now = time.time() if now is None else now
+    return f"{get_composite_period()}-{int(now // TILE_EPOCH_SECONDS)}"
+
+
+#################################################################################
+
+# --- Rendering ---
+
+def compute_risk_grid(south, west, north, east, samples=None):
+    """
+    Returns a (samples, samples) array of risk scores over a bounding box, rows north to south.
+    Points without satellite data (e.g. water) are NaN.
+
+    :param south: southern latitude
+    :param west: western longitude
+    :param north: northern latitude
+    :param east: eastern longitude
+    :param samples: sample points per side (default TILE_SAMPLES)
+    """
+
+    samples = samples or TILE_SAMPLES
+    latEdges = np.linspace(north, south, samples + 1)
+    lonEdges = np.linspace(west, east, samples + 1)
+    lats = (latEdges[:-1] + latEdges[1:]) / 2
+    lons = (lonEdges[:-1] + lonEdges[1:]) / 2
+
+    # Weather varies over kilometres, so one lookup covers the tile
+    weatherData = utils.get_weather_data((north + south) / 2, (west + east) / 2)
+
+    elevationGrid = utils.get_elevation_grid(lats, lons)
+    slopes, _ = wrd.get_slope_rasters(elevationGrid, lats, lons)
+
+    latGrid, lonGrid = np.meshgrid(lats, lons, indexing="ij")
+    cellRadius = abs(latEdges[0] - latEdges[1]) * wrd.ONE_DEGREE_OF_LAT_CONST / 2
+    ndvis = utils.get_ndvi_batch([
+        (lat, lon, cellRadius) for lat, lon in zip(latGrid.ravel().tolist(), lonGrid.ravel().tolist(), strict=True)
+    ]).reshape(latGrid.shape)
+
+    scores = wrd.score_batch(
+        np.full(latGrid.shape, weatherData["main"]["temp"]),
+        np.full(latGrid.shape, weatherData["main"]["humidity"]),
+        np.full(latGrid.shape, weatherData["wind"]["speed"]),
+        ndvis,
+        slopes
+    )
+    return np.where(np.isnan(ndvis), np.nan, scores["riskScore"])
+
+
+def colorize_risk(riskGrid, size=TILE_SIZE):
+    """
+    Returns a (size, size, 4) RGBA uint8 image of a risk grid, blending the gauge colours and leaving NaN transparent.
+
+    :param riskGrid: 2D array of risk scores (0-100) whose sides divide size
+    :param size: output side in pixels
+    """
+
+    riskGrid = np.asarray(riskGrid, dtype=float)
+    scale = size // riskGrid.shape[0]
+    risk = np.repeat(np.repeat(riskGrid, scale, axis=0), scale, axis=1)
+
+    missing = np.isnan(risk)
+    filled = np.clip(np.where(missing, 0.0, risk), 0, 100)
+    image = np.empty(risk.shape + (4,), dtype=np.uint8)
+    for channel in range(3):
+        image[..., channel] = np.interp(filled, RISK_COLOR_STOPS, RISK_COLORS[:, channel]).round()
+    image[..., 3] = np.where(missing, 0, TILE_ALPHA)
+    return image
+
+
+def encode_png(image):
+    """
+    Returns the PNG encoding of an RGBA image.
+
+    :param image: (height, width, 4) uint8 array
+    """
+
+    image = np.ascontiguousarray(image, dtype=np.uint8)
+    height, width = image.shape[:2]
+
+    def chunk(chunkType, data):
+        return struct.pack(">I", len(data)) + chunkType + data + struct.pack(">I", zlib.crc32(chunkType + data))
+
+    # Every scanline starts with filter type 0 (none)
+    scanlines = np.hstack([np.zeros((height, 1), dtype=np.uint8), image.reshape(height, width * 4)])
+    header = struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0) # 8-bit RGBA
+    return PNG_SIGNATURE + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(scanlines.tobytes(), 6)) \
+        + chunk(b"IEND", b"")
+
+
+@metrics.timed("tile_render")
+def render_risk_tile(z, x, y):
+    """
+    Returns a PNG risk heatmap of an XYZ tile (fully transparent below TILE_MIN_ZOOM).
+
+    :param z: zoom level
+    :param x: tile column
+    :param y: tile row
+    """
+
+    if z < TILE_MIN_ZOOM:
+        return encode_png(np.zeros((TILE_SIZE, TILE_SIZE, 4), dtype=np.uint8))
+    return encode_png(colorize_risk(compute_risk_grid(*get_tile_bounds(z, x, y))))
+
+
+#################################################################################
+
+# --- Tile Cache ---
+
+class TileCache:
+    """
+    Two-level cache of rendered tiles keyed by (epoch, z, x, y): an in-memory LRU in front of PNG files
+    under <directory>/<epoch>/<z>/<x>/<y>.png. Files of older epochs are removed when a new epoch starts.
+    """
+
+    def __init__(self, directory=None, maxEntries=None):
+        """
+        :param directory: tile directory (default tiles/ in the cache directory)
+        :param maxEntries: tiles held in memory (default TILE_CACHE_MAX_ENTRIES, 512)
+        """
+
+        self.directory = directory or os.path.join(get_cache_dir(), "tiles")
+        self.maxEntries = maxEntries or int(os.getenv("TILE_CACHE_MAX_ENTRIES", "512"))
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._renderLocks = {}
+        self._epoch = None
+
+    def _get_path(self, epoch, z, x, y):
+        return os.path.join(self.directory, epoch, str(z), str(x), f"{y}.png")
+
+    def _remove_stale_epochs(self, epoch):
+        if self._epoch == epoch:
+            return
+        self._epoch = epoch
+        if os.path.isdir(self.directory):
+            for name in os.listdir(self.directory):
+                if name != epoch:
+                    shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+
+    def get_tile(self, z, x, y, render=None):
+        """
+        Returns the PNG of a tile for the current data epoch, rendering it only on a miss.
+        Concurrent requests for the same tile wait for one render.
+
+        :param z: zoom level
+        :param x: tile column
+        :param y: tile row
+        :param render: function(z, x, y) returning PNG bytes (default render_risk_tile)
+        """
+
+        if not is_valid_tile(z, x, y):
+            raise ValueError(f"Tile {z}/{x}/{y} does not exist.")
+
+        epoch = get_data_epoch()
+        key = (epoch, z, x, y)
+        with self._lock:
+            self._remove_stale_epochs(epoch)
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                metrics.record_cache_lookup("tiles", True)
+                return self._entries[key]
+            renderLock = self._renderLocks.setdefault(key, threading.Lock())
+
+        with renderLock:
+            try:
+                with self._lock:
+                    if key in self._entries: # Rendered while we waited
+                        metrics.record_cache_lookup("tiles", True)
+                        return self._entries[key]
+
+                path = self._get_path(*key)
+                if os.path.exists(path):
+                    metrics.record_cache_lookup("tiles", True)
+                    with open(path, "rb") as file:
+                        png = file.read()
+                else:
+                    metrics.record_cache_lookup("tiles", False)
+                    png = (render or render_risk_tile)(z, x, y)
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    with open(f"{path}.partial", "wb") as file:
+                        file.write(png)
+                    os.replace(f"{path}.partial", path)
+
+                with self._lock:
+                    self._entries[key] = png
+                    while len(self._entries) > self.maxEntries:
+                        self._entries.popitem(last=False)
+            finally:
+                # Also after a failed render, so the lock does not outlive the request
+                with self._lock:
+                    self._renderLocks.pop(key, None)
+        return png
+
+
+#################################################################################
+
+# --- Tile Server ---
+
+def make_tile_handler(tileCache):
+    """
+    Returns a request handler class serving /tiles/{z}/{x}/{y}.png from a TileCache.
+
+    :param tileCache: TileCache to serve from
+    """
+
+    class TileHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            match = TILE_PATH_PATTERN.match(self.path.split("?")[0])
+            tile = tuple(int(value) for value in match.groups()) if match is not None else None
+            # Only a tile that cannot exist is a 404; everything raised while rendering one is a 502
+            if tile is None or not is_valid_tile(*tile):
+                return self.send_body(404, b"Not found", "text/plain")
+            z, x, y = tile
+            try:
+                png = tileCache.get_tile(z, x, y)
+            except Exception:
+                # Provider errors can carry request URLs and API keys, so none of it goes to the browser
+                metrics.increment("tile_errors_total")
+                return self.send_body(502, b"Tile rendering failed", "text/plain")
+            self.send_body(200, png, "image/png")
+
+        def send_body(self, status, body, contentType):
+            self.send_response(status)
+            self.send_header("Content-Type", contentType)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Access-Control-Allow-Origin", "*")
+            if status == 200:
+                self.send_header("Cache-Control", f"max-age={TILE_EPOCH_SECONDS}")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass # Tile requests are too frequent to log
+
+    return TileHandler
+
+
+def start_tile_server(host="127.0.0.1", port=0, tileCache=None):
+    """
+    Starts the tile server on a background thread and returns it.
+    Its tile URL template is f"http://{host}:{server.server_address[1]}/tiles/{{z}}/{{x}}/{{y}}.png".
+
+    :param host: interface to listen on
+    :param port: port to listen on (0 picks a free one)
+    :param tileCache: TileCache to serve from (default: a new one in the cache directory)
+    """
+
+    server = ThreadingHTTPServer((host, port), make_tile_handler(tileCache or TileCache()))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name="tile-server").start()
+    return server
@@ -1,66 +1,494 @@
 import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlparse
+
+import numpy as np
+import pycountry as pc
 import requests
-import ee
-from datetime import datetime, timedelta
 from dotenv import load_dotenv
-import googlemaps
-import pycountry as pc
+from requests.adapters import HTTPAdapter
+
+from . import metrics, ratelimit
+from . import wildfire_risk_dashboard as wrd
+from .cache import GeocodeCache, NdviCache, WeatherCache, get_composite_period, normalize_postal_code
+from .dem import DemTileStore
+from .postal import PostalIndex
+
+NO_SATELLITE_DATA_MESSAGE = "Satellite data unavailable for this area at this time (possible cloud cover or water)."
 
 # Custom Exception for when NDVI cannot be determined
 class SatelliteDataError(Exception):
     """Exception raised when satellite data (NDVI) cannot be retrieved."""
     pass
 
-# Initialize the Earth Engine
-try:
-    ee.Initialize(project='project-acf0062f-af6b-4917-944')
-except Exception as e:
-    print(f"Earth Engine failed to initialize: {e}")
-
 # looks for .env file and loads the variables into the system.
+# Only reads a local file; the provider clients below are created lazily on first use.
 load_dotenv()
 
-# Assign the key to a variable
-OW_API_KEY = os.getenv("OPENWEATHER_API_KEY")
-GC_API_KEY = os.getenv("GOOGLECLOUD_API_KEY")
-gmaps = googlemaps.Client(key=GC_API_KEY)
+# Earth Engine Cloud project (EARTHENGINE_PROJECT in the environment or .env); required for NDVI
+EE_PROJECT = os.getenv("EARTHENGINE_PROJECT")
+
+# Provider endpoints; overridable so tests and benchmarks can point at local stand-ins
+OPENWEATHER_BASE_URL = os.getenv("OPENWEATHER_BASE_URL", "https://api.openweathermap.org")
+OPEN_METEO_BASE_URL = os.getenv("OPEN_METEO_BASE_URL", "https://api.open-meteo.com")
+GOOGLE_MAPS_BASE_URL = os.getenv("GOOGLE_MAPS_BASE_URL", "https://maps.googleapis.com")
+
+# HTTP client settings (seconds unless noted)
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3.05"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "20"))
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+HTTP_BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", "0.5"))
+HTTP_BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", "10"))
+HTTP_RETRY_AFTER_MAX = float(os.getenv("HTTP_RETRY_AFTER_MAX", "60")) # Longest Retry-After honoured before retrying
+HTTP_POOL_HOSTS = int(os.getenv("HTTP_POOL_HOSTS", "10")) # Number of per-host pools kept alive
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10")) # Connections kept alive per host
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+_session = None
+_sessionPid = None
+_sessionLock = threading.Lock()
+
+
+def get_http_session():
+    """
+    Returns the shared requests session, creating it on first use in each process.
+    The session keeps a keep-alive connection pool per host, so repeat calls skip the TCP+TLS handshake.
+    """
+
+    global _session, _sessionPid
+    with _sessionLock:
+        # A forked worker must not share sockets with its parent
+        if _session is None or _sessionPid != os.getpid():
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_HOSTS, pool_maxsize=HTTP_POOL_SIZE, max_retries=0)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+            _sessionPid = os.getpid()
+        return _session
+
+
+def get_backoff_delay(attempt, retryAfter=None):
+    """
+    Returns how long to wait before the next retry, using exponential backoff with full jitter.
+    A numeric Retry-After header from the provider is honoured as a minimum, capped at HTTP_RETRY_AFTER_MAX.
+
+    :param attempt: number of attempts already made (0 for the first retry)
+    :param retryAfter: value of the Retry-After response header, if any
+    """
+
+    delay = random.uniform(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * (2 ** attempt)))
+    try:
+        delay = max(delay, float(retryAfter))
+    except (TypeError, ValueError):
+        pass
+    return min(delay, max(HTTP_RETRY_AFTER_MAX, HTTP_BACKOFF_MAX))
+
+
+def http_get(url, params=None, timeout=None, maxRetries=None, provider=None):
+    """
+    Returns the response to a GET request sent through the shared session.
+    Connection errors, timeouts and 429/5xx responses are retried a bounded number of times; a 429/5xx that
+    outlasts the retries raises requests.HTTPError rather than being returned as if it were an answer.
+    When a provider is given, every attempt waits for that provider's rate limiter, and a 429 slows it down;
+    the limiter then paces the retry itself, so no backoff sleep is added on top.
+
+    :param url: URL to request
+    :param params: optional query parameters
+    :param timeout: (connect, read) timeout in seconds; defaults to the configured timeouts
+    :param maxRetries: number of retries; defaults to HTTP_MAX_RETRIES
+    :param provider: rate-limited provider name (see ratelimit.DEFAULT_RATE_LIMITS), or None
+    """
+
+    if timeout is None:
+        timeout = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+    if maxRetries is None:
+        maxRetries = HTTP_MAX_RETRIES
+
+    session = get_http_session()
+    limiter = ratelimit.get_rate_limiter(provider)
+    for attempt in range(maxRetries + 1):
+        if limiter is not None:
+            limiter.acquire()
+        try:
+            response = session.get(url, params=params, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == maxRetries:
+                raise
+            metrics.increment("http_retries_total", host=urlparse(url).hostname, reason="connection")
+            time.sleep(get_backoff_delay(attempt))
+            continue
+
+        throttled = response.status_code == 429 and limiter is not None
+        if throttled:
+            limiter.throttle(response.headers.get("Retry-After"))
+
+        if response.status_code in RETRY_STATUS_CODES and attempt < maxRetries:
+            metrics.increment("http_retries_total", host=urlparse(url).hostname, reason=str(response.status_code))
+            if not throttled: # Otherwise the next acquire() waits out Retry-After and the halved rate
+                time.sleep(get_backoff_delay(attempt, response.headers.get("Retry-After")))
+            continue
+
+        if response.status_code in RETRY_STATUS_CODES:
+            response.raise_for_status()
+        return response
+
+
+#################################################################################
+
+# --- Provider Clients ---
+# Created on first use, once per process, so importing this module (tests, CLI help, worker
+# processes) costs no network handshakes and no Earth Engine/Google client setup.
+
+# One lock per client, so a slow Earth Engine initialization does not hold up geocoding
+_earthEngineLock = threading.Lock()
+_gmapsLock = threading.Lock()
+_earthEngine = None
+_earthEnginePid = None
+_gmaps = None
+_gmapsPid = None
+
+
+def get_openweather_key():
+    """
+    Returns the OpenWeatherMap API key (OPENWEATHER_API_KEY).
+    """
+
+    return os.getenv("OPENWEATHER_API_KEY")
+
+
+def get_earth_engine():
+    """
+    Returns the Earth Engine module, importing and initializing it on first use in each process.
+    """
+
+    global _earthEngine, _earthEnginePid
+    with _earthEngineLock:
+        if _earthEngine is None or _earthEnginePid != os.getpid():
+            if not EE_PROJECT:
+                raise RuntimeError(
+                    "Earth Engine project is not configured: set EARTHENGINE_PROJECT to your Earth Engine "
+                    "Cloud project id in the environment or .env."
+                )
+            import ee
+
+            ee.Initialize(project=EE_PROJECT)
+            _earthEngine = ee
+            _earthEnginePid = os.getpid()
+        return _earthEngine
+
+
+def get_gmaps_client():
+    """
+    Returns the Google Maps client (GOOGLECLOUD_API_KEY), creating it on first use in each process.
+    Google's client retries 5xx responses itself; it gets the shared pooled session and our timeouts.
+    """
+
+    global _gmaps, _gmapsPid
+    with _gmapsLock:
+        if _gmaps is None or _gmapsPid != os.getpid():
+            import googlemaps
+
+            _gmaps = googlemaps.Client(
+                key=os.getenv("GOOGLECLOUD_API_KEY"),
+                connect_timeout=HTTP_CONNECT_TIMEOUT,
+                read_timeout=HTTP_READ_TIMEOUT,
+                retry_timeout=int(HTTP_BACKOFF_MAX * HTTP_MAX_RETRIES),
+                retry_over_query_limit=False, # Over-quota responses go through our shared rate limiter instead
+                requests_session=get_http_session(),
+                base_url=GOOGLE_MAPS_BASE_URL
+            )
+            _gmapsPid = os.getpid()
+        return _gmaps
+
+
+def reset_provider_clients():
+    """
+    Drops the cached provider clients so the next call rebuilds them from the current settings.
+    """
+
+    global _earthEngine, _gmaps, _session
+    with _earthEngineLock:
+        _earthEngine = None
+    with _gmapsLock:
+        _gmaps = None
+    with _sessionLock:
+        _session = None
+
+
+# Offline postal-code index (see postal.py); used when the file exists,
+# e.g. after `wildfire_risk_dashboard build-postal-index`
+POSTAL_INDEX_PATH = os.getenv("POSTAL_INDEX_PATH") or PostalIndex().path
+postalIndex = PostalIndex(POSTAL_INDEX_PATH) if os.path.exists(POSTAL_INDEX_PATH) else None
+
+# Persistent geocode cache; postal-code centroids almost never change
+geocodeCache = GeocodeCache() if os.getenv("GEOCODE_CACHE_ENABLED", "1") != "0" else None
 
 def get_geo_coordinates(zipCode, countryCode):
+    """
+    Returns the location of a postal code (see geocode_location).
+
+    :param zipCode: postal code
+    :param countryCode: ISO Alpha-2 country code
+    """
+
+    return geocode_location(zipCode, countryCode)[0]
+
+
+@metrics.timed("geocode")
+def geocode_location(zipCode, countryCode):
+    """
+    Returns (location, geocodeSource) for a postal code, from the offline postal index when it has the code,
+    otherwise from the geocode cache or the provider waterfall. geocodeSource is "postal_index", "cache",
+    "owm" or "google", and None when the code was not found. Index hits are not copied into the cache, so a
+    rebuilt index takes effect at once.
+
+    :param zipCode: postal code
+    :param countryCode: ISO Alpha-2 country code
+    """
+
+    # The offline index needs no network round trip, and is authoritative over cached provider answers
+    if postalIndex is not None:
+        location = postalIndex.get(zipCode, countryCode)
+        if location is not None:
+            return location, "postal_index"
+
+    if geocodeCache is not None:
+        cached = geocodeCache.get(zipCode, countryCode)
+        if cached is not None:
+            return cached["result"], "cache" if cached["result"] is not None else None
+
+    result, source, owmDecision = run_geocode_waterfall(zipCode, countryCode)
+
+    if geocodeCache is not None:
+        geocodeCache.set(zipCode, countryCode, result, source, owmDecision)
+    return result, source
+
+
+# Hedged geocoding: when OWM is slower than its usual GEOCODE_HEDGE_PERCENTILE latency, Google is queried in parallel
+GEOCODE_HEDGE_ENABLED = os.getenv("GEOCODE_HEDGE_ENABLED", "0") == "1"
+GEOCODE_HEDGE_PERCENTILE = float(os.getenv("GEOCODE_HEDGE_PERCENTILE", "95"))
+# Deadline used until enough latencies are observed
+GEOCODE_HEDGE_DEFAULT_DEADLINE = float(os.getenv("GEOCODE_HEDGE_DEFAULT_DEADLINE", "1.0"))
+GEOCODE_HEDGE_MIN_SAMPLES = 20
+# Geocoding requests in flight at once, abandoned hedge losers included
+GEOCODE_HEDGE_POOL_SIZE = int(os.getenv("GEOCODE_HEDGE_POOL_SIZE", "16"))
+
+_owmLatencies = deque(maxlen=500)
+_owmLatencyLock = threading.Lock()
+
+_hedgeExecutor = None
+_hedgeExecutorPid = None
+_hedgeExecutorLock = threading.Lock()
+
+
+def get_hedge_executor():
+    """
+    Returns the thread pool hedged geocoding requests run on, creating it on first use in each process.
+    It is shared by every lookup, so requests abandoned by a hedge are bounded by GEOCODE_HEDGE_POOL_SIZE.
+    """
+
+    global _hedgeExecutor, _hedgeExecutorPid
+    with _hedgeExecutorLock:
+        # A forked worker cannot use its parent's threads
+        if _hedgeExecutor is None or _hedgeExecutorPid != os.getpid():
+            _hedgeExecutor = ThreadPoolExecutor(max_workers=GEOCODE_HEDGE_POOL_SIZE, thread_name_prefix="geocode")
+            _hedgeExecutorPid = os.getpid()
+        return _hedgeExecutor
+
+def get_hedge_deadline():
+    """
+    Returns how long to wait for OpenWeatherMap before hedging with Google: the GEOCODE_HEDGE_PERCENTILE
+    of recently observed OWM geocoding latencies, or GEOCODE_HEDGE_DEFAULT_DEADLINE until enough are observed.
+    """
+
+    with _owmLatencyLock:
+        latencies = list(_owmLatencies)
+    if len(latencies) < GEOCODE_HEDGE_MIN_SAMPLES:
+        return GEOCODE_HEDGE_DEFAULT_DEADLINE
+    return float(np.percentile(latencies, GEOCODE_HEDGE_PERCENTILE))
+
+
+def run_geocode_waterfall(zipCode, countryCode):
+    """
+    Returns (location, source, owmDecision) from OpenWeatherMap, falling back to Google Maps.
+    With GEOCODE_HEDGE_ENABLED, a slow OpenWeatherMap is hedged with a parallel Google query (see run_hedged_geocode).
+
+    :param zipCode: postal code
+    :param countryCode: ISO Alpha-2 country code
+    """
+
+    if GEOCODE_HEDGE_ENABLED:
+        return run_hedged_geocode(zipCode, countryCode)
+
+    owmResponse, owmDecision = request_owm_geocode(zipCode, countryCode)
+    if owmDecision == "accepted":
+        return owmResponse, "owm", owmDecision
+
+    # Fallback to Google Maps
+    metrics.increment("geocode_fallback_total", owmDecision=owmDecision)
+    location = request_google_location(zipCode, countryCode)
+    if location is not None:
+        return location, "google", owmDecision
+
+    # If both fail, return None or raise an error
+    return None, None, owmDecision
+
+
+def run_hedged_geocode(zipCode, countryCode):
+    """
+    Returns (location, source, owmDecision) like run_geocode_waterfall, but only waits get_hedge_deadline() for
+    OpenWeatherMap before querying Google in parallel. The first answer that passes the quality checks wins and
+    the other request is abandoned (owmDecision is None when Google wins before OpenWeatherMap answers).
+    When no location is found and either request failed, the error is raised rather than reported as "not found".
+
+    :param zipCode: postal code
+    :param countryCode: ISO Alpha-2 country code
+    """
+
+    executor = get_hedge_executor()
+    owmFuture = executor.submit(request_owm_geocode, zipCode, countryCode)
+    try:
+        owmResponse, owmDecision = owmFuture.result(timeout=get_hedge_deadline())
+    except FutureTimeoutError:
+        pass
+    else:
+        # OWM answered in time: the normal waterfall
+        if owmDecision == "accepted":
+            return owmResponse, "owm", owmDecision
+        metrics.increment("geocode_fallback_total", owmDecision=owmDecision)
+        location = request_google_location(zipCode, countryCode)
+        return (location, "google", owmDecision) if location is not None else (None, None, owmDecision)
+
+    metrics.increment("geocode_hedges_total")
+    googleFuture = executor.submit(request_google_location, zipCode, countryCode)
+    owmDecision = None
+    googleLocation = None
+    errors = []
+    try:
+        for future in as_completed([owmFuture, googleFuture]):
+            try:
+                result = future.result()
+            except Exception as e:
+                errors.append(e)
+                continue
+
+            if future is owmFuture:
+                owmResponse, owmDecision = result
+                if owmDecision == "accepted":
+                    metrics.increment("geocode_hedge_wins_total", source="owm")
+                    return owmResponse, "owm", owmDecision
+            elif result is not None:
+                googleLocation = result
+                # OWM has not answered, or failed: Google wins the hedge
+                if owmDecision is None:
+                    metrics.increment("geocode_hedge_wins_total", source="google")
+                    return googleLocation, "google", owmDecision
+    finally:
+        # The loser is abandoned rather than waited for; it is only cancelled if still queued in the pool
+        owmFuture.cancel()
+        googleFuture.cancel()
+
+    # Both answered and OWM failed its checks: an ordinary fallback
+    if googleLocation is not None:
+        metrics.increment("geocode_fallback_total", owmDecision=owmDecision)
+        return googleLocation, "google", owmDecision
+    # A failed request is not evidence that the code does not exist, so it must not be cached as "not found"
+    if errors:
+        raise errors[0]
+    return None, None, owmDecision
+
+
+def request_owm_geocode(zipCode, countryCode):
+    """
+    Returns (owmResponse, owmDecision) from OpenWeatherMap, where owmDecision is "accepted" when the result
+    passes the quality checks and "no_result", "wrong_country" or "generic" otherwise.
+
+    :param zipCode: postal code
+    :param countryCode: ISO Alpha-2 country code
+    """
+
     # Try open weather api
-    owmURL = f"http://api.openweathermap.org/geo/1.0/zip?zip={zipCode},{countryCode}&appid={OW_API_KEY}"
-    owmResponse = requests.get(owmURL).json()
+    owmURL = f"{OPENWEATHER_BASE_URL}/geo/1.0/zip?zip={zipCode},{countryCode}&appid={get_openweather_key()}"
+    response = http_get(owmURL, provider="openweather")
+    owmResponse = response.json()
+    # Only the round trip of the answered request, not the rate-limiter wait or earlier retries
+    with _owmLatencyLock:
+        _owmLatencies.append(response.elapsed.total_seconds())
 
     # Check if it's the right country AND that the name isn't just "Brazil" or "United States"
     # If OWM returns a generic name, we want Google to give us the specific city
     # If OWM gives us a result, we check if it's actually detailed.
     # If the name is just the Country Name or the Zip Code, we force Google.
-    if "lat" in owmResponse and owmResponse.get("country") == countryCode.upper():
-        owm_name = owmResponse.get("name", "")
-        country_name = pc.countries.get(alpha_2=countryCode).name
-        
-        # If the name is better than just the country name, use it!
-        if owm_name.lower() != country_name.lower() and owm_name != zipCode:
-            return owmResponse
+    if "lat" not in owmResponse:
+        return owmResponse, "no_result"
+    if owmResponse.get("country") != countryCode.upper():
+        return owmResponse, "wrong_country"
 
-    # Fallback to Google Maps
-    # Google is much stricter with the 'components' filter
-    geocodeResult = gmaps.geocode(
-        f"{zipCode}", 
-        components={"country": countryCode.upper()}
-    )
+    owm_name = owmResponse.get("name", "")
+    country_name = pc.countries.get(alpha_2=countryCode).name
+
+    # If the name is better than just the country name, use it!
+    # Compared in the geocode cache's normalized form, so every spelling of a code reaches the same decision
+    if owm_name.lower() != country_name.lower() and normalize_postal_code(owm_name) != normalize_postal_code(zipCode):
+        return owmResponse, "accepted"
+    return owmResponse, "generic"
+
+
+def request_google_location(zipCode, countryCode):
+    """
+    Returns the location of a postal code from Google Maps, or None when Google has no result.
     
-    if geocodeResult:
-        # Extract location data from the first result
-        location = geocodeResult[0]['geometry']['location']
-        return {
-            "lat": location['lat'],
-            "lon": location['lng'],
-            "name": geocodeResult[0]['formatted_address'],
-            "source": "google" # Helpful for debugging
-        }
+    :param zipCode: postal code
+    :param countryCode: ISO Alpha-2 country code
+    """
+
+    # Google is much stricter with the 'components' filter
+    geocodeResult = request_google_geocode(zipCode, countryCode)
+    if not geocodeResult:
+        return None
+
+    # Extract location data from the first result
+    location = geocodeResult[0]['geometry']['location']
+    return {
+        "lat": location['lat'],
+        "lon": location['lng'],
+        "name": geocodeResult[0]['formatted_address'],
+        "source": "google" # Helpful for debugging
+    }
+
+
+def request_google_geocode(zipCode, countryCode):
+    """
+    Returns Google's geocoding results for a postal code, waiting for the shared Google rate limiter.
+    Over-quota responses slow the limiter down and are retried a bounded number of times.
     
-    # If both fail, return None or raise an error
-    return None
+    :param zipCode: postal code
+    :param countryCode: ISO Alpha-2 country code
+    """
+
+    limiter = ratelimit.get_rate_limiter("google")
+    for attempt in range(HTTP_MAX_RETRIES + 1):
+        if limiter is not None:
+            limiter.acquire()
+        try:
+            return get_gmaps_client().geocode(
+                f"{zipCode}",
+                components={"country": countryCode.upper()}
+            )
+        except Exception as e:
+            if getattr(e, "status", None) != "OVER_QUERY_LIMIT" or attempt == HTTP_MAX_RETRIES:
+                raise
+            if limiter is not None:
+                limiter.throttle()
+            else:
+                time.sleep(get_backoff_delay(attempt))
 
 
 def grab_coordinates(geoData):
@@ -70,39 +498,134 @@ def grab_coordinates(geoData):
     lon = geoData["lon"]
     return lat, lon
 
+# Current weather is shared between nearby requests until the provider refreshes it
+weatherCache = WeatherCache() if os.getenv("WEATHER_CACHE_ENABLED", "1") != "0" else None
+
+@metrics.timed("weather")
 def get_weather_data(lat, lon):
-    url = f"https://api.openweathermap.org/data/2.5/weather?lat={lat}&lon={lon}&appid={OW_API_KEY}"
-    response = requests.get(url)
+    """
+    Returns current weather for a location, served from the weather cache when a nearby request is still fresh.
+
+    :param lat: Latitude
+    :param lon: Longitude
+    """
+
+    if weatherCache is not None:
+        return weatherCache.get_or_fetch(lat, lon, request_weather_data)
+    return request_weather_data(lat, lon)
+
+
+def request_weather_data(lat, lon):
+    url = f"{OPENWEATHER_BASE_URL}/data/2.5/weather?lat={lat}&lon={lon}&appid={get_openweather_key()}"
+    response = http_get(url, provider="openweather")
     return response.json()
 
+# Hours of hourly forecast fetched by default (Open-Meteo serves up to 16 days)
+FORECAST_HOURS = int(os.getenv("FORECAST_HOURS", "48"))
+
+@metrics.timed("forecast")
+def get_hourly_forecast(lat, lon, hours=None):
+    """
+    Returns the hourly forecast for a location from a single Open-Meteo request, as a dictionary of
+    "time" (ISO 8601 UTC hours) and "temp" (Kelvin), "humidity" (%) and "windSpeed" (m/s) arrays,
+    the same units the weather normalizers expect.
+
+    :param lat: Latitude
+    :param lon: Longitude
+    :param hours: number of hours from now; defaults to FORECAST_HOURS
+    """
+
+    params = {
+        "latitude": lat,
+        "longitude": lon,
+        "hourly": "temperature_2m,relative_humidity_2m,wind_speed_10m",
+        "wind_speed_unit": "ms",
+        "timezone": "UTC",
+        "forecast_hours": hours or FORECAST_HOURS
+    }
+    hourly = http_get(f"{OPEN_METEO_BASE_URL}/v1/forecast", params=params, provider="open_meteo").json()["hourly"]
+
+    return {
+        "time": hourly["time"],
+        "temp": np.array(hourly["temperature_2m"], dtype=float) + 273.15,
+        "humidity": np.array(hourly["relative_humidity_2m"], dtype=float),
+        "windSpeed": np.array(hourly["wind_speed_10m"], dtype=float)
+    }
+
+# NDVI only changes once per 32-day composite, so results persist across restarts
+ndviCache = NdviCache() if os.getenv("NDVI_CACHE_ENABLED", "1") != "0" else None
+
+# How often to check Earth Engine for a newly published composite
+NDVI_COMPOSITE_REFRESH_SECONDS = float(os.getenv("NDVI_COMPOSITE_REFRESH_SECONDS", "3600"))
+_latestComposite = None
+_latestCompositeLock = threading.Lock()
+
+def get_latest_composite_start():
+    """
+    Returns the start date of the newest NDVI composite from the last 60 days, the image NDVI is reduced from.
+    Composites are published with a lag, so this is usually the previous period's; it is looked up at most
+    every NDVI_COMPOSITE_REFRESH_SECONDS.
+    """
+
+    global _latestComposite
+    with _latestCompositeLock:
+        if _latestComposite is None or time.monotonic() - _latestComposite[1] > NDVI_COMPOSITE_REFRESH_SECONDS:
+            latest = get_ndvi_collection().sort('system:time_start', False).first()
+            timeStart = latest.get('system:time_start').getInfo()
+            _latestComposite = (datetime.fromtimestamp(timeStart / 1000, tz=timezone.utc).date(), time.monotonic())
+        return _latestComposite[0]
+
+
+@metrics.timed("ndvi")
 def get_ndvi(lat, lon, radius):
     """
-    Returns the average NDVI of the defined area.
+    Returns the average NDVI of the defined area, served from the NDVI cache when the
+    latest composite has already been queried for this cell.
+
+    :param lat: Latitude
+    :param lon: Longitude
+    :param radius: Radius in meters
+    """
+
+    if ndviCache is None:
+        return request_ndvi(lat, lon, radius)
+
+    # Keyed by the composite actually reduced, so a newly published one is picked up straight away
+    compositeStart = get_latest_composite_start()
+    period = get_composite_period(compositeStart)
+    cached = ndviCache.get(lat, lon, radius, period)
+    if cached is not None:
+        if cached["ndvi"] is None:
+            raise SatelliteDataError(NO_SATELLITE_DATA_MESSAGE)
+        return cached["ndvi"]
+
+    try:
+        ndviAvg = request_ndvi(lat, lon, radius, compositeStart)
+    except SatelliteDataError:
+        ndviCache.set(lat, lon, radius, None, period)
+        raise
+
+    ndviCache.set(lat, lon, radius, ndviAvg, period)
+    return ndviAvg
+
+
+def request_ndvi(lat, lon, radius, compositeStart=None):
+    """
+    Returns the average NDVI of the defined area from Earth Engine.
     
     :param lat: Latitude
     :param lon: Longitude
     :param radius: Radius in meters
+    :param compositeStart: start date of the composite to reduce (defaults to the latest covering the point)
     """
     
-    # Calculate the date range
-    currentDate = datetime.now().date()
-    daysAgo = 60
-    pastDate = currentDate - timedelta(days=daysAgo)
-    startDate = pastDate.strftime("%Y-%m-%d")
-    endDate = currentDate.strftime("%Y-%m-%d")
+    ee = get_earth_engine()
 
     # Define the point
     point = ee.Geometry.Point([lon, lat])
 
-    # Access the collection
-    ndviCollection = ee.ImageCollection("LANDSAT/COMPOSITES/C02/T1_L2_32DAY_NDVI")
-
-    # Apply filters
-    latestImage = ndviCollection \
-        .filterBounds(point) \
-        .filterDate(startDate, endDate) \
-        .sort('system:time_start', False) \
-        .first()
+    # Latest composite covering the point
+    latestImage = get_latest_ndvi_image(point, compositeStart)
     
     # Define the area (buffer) based on radius
     area = point.buffer(radius)
@@ -120,14 +643,260 @@ def get_ndvi(lat, lon, radius):
 
    # ! IMPORTANT BELOW: NEEDS IMPROVEMENT
     """
-    No Data Handling: If a coordinate is in the middle of the ocean or if cloud cover was 100% for that 60-day window, stats.get('NDVI') might return None.
+    No Data Handling: If a coordinate is in the middle of the ocean or if cloud cover was 100% for that 60-day window,
+    stats.get('NDVI') might return None.
     """
     if ndviAvg is None:
-        raise SatelliteDataError("Satellite data unavailable for this area at this time (possible cloud cover or water).") 
+        raise SatelliteDataError(NO_SATELLITE_DATA_MESSAGE)
     else:
         return ndviAvg
 
+
+def get_ndvi_collection():
+    """
+    Returns the NDVI composites published in the last 60 days.
+    """
+
+    # Calculate the date range
+    currentDate = datetime.now().date()
+    daysAgo = 60
+    pastDate = currentDate - timedelta(days=daysAgo)
+    startDate = pastDate.strftime("%Y-%m-%d")
+    endDate = currentDate.strftime("%Y-%m-%d")
+
+    # Access the collection
+    ndviCollection = get_earth_engine().ImageCollection("LANDSAT/COMPOSITES/C02/T1_L2_32DAY_NDVI")
+    return ndviCollection.filterDate(startDate, endDate)
+
+
+def get_latest_ndvi_image(region, compositeStart=None):
+    """
+    Returns the most recent NDVI composite covering the region from the last 60 days,
+    or the composite starting on compositeStart when one is given.
+
+    :param region: ee.Geometry the image must cover
+    :param compositeStart: start date of the composite to use, or None for the latest
+    """
+
+    ndviCollection = get_ndvi_collection()
+    if compositeStart is not None:
+        nextDay = (compositeStart + timedelta(days=1)).strftime("%Y-%m-%d")
+        ndviCollection = ndviCollection.filterDate(compositeStart.strftime("%Y-%m-%d"), nextDay)
+
+    # Apply filters
+    return ndviCollection \
+        .filterBounds(region) \
+        .sort('system:time_start', False) \
+        .first()
+
+
+# Most points sent to Earth Engine in a single reduceRegions request
+NDVI_BATCH_SIZE = int(os.getenv("NDVI_BATCH_SIZE", "5000"))
+
+@metrics.timed("ndvi_batch")
+def get_ndvi_batch(points):
+    """
+    Returns an array with the average NDVI of each (lat, lon, radius) area.
+    Cached areas are served from the NDVI cache (read and written once per batch, not per point); the rest
+    are reduced together in one Earth Engine request.
+    Areas without satellite data are NaN instead of raising for the whole batch.
+
+    :param points: list of (lat, lon, radius) tuples
+    """
+
+    ndvis = np.full(len(points), np.nan)
+    compositeStart = get_latest_composite_start() if ndviCache is not None else None
+    period = get_composite_period(compositeStart) if compositeStart is not None else None
+    pending = []
+    cachedEntries = ndviCache.get_many(points, period) if ndviCache is not None else [None] * len(points)
+    for index, cached in enumerate(cachedEntries):
+        if cached is None:
+            pending.append(index)
+        elif cached["ndvi"] is not None:
+            ndvis[index] = cached["ndvi"]
+
+    for start in range(0, len(pending), NDVI_BATCH_SIZE):
+        chunk = pending[start:start + NDVI_BATCH_SIZE]
+        chunkPoints = [points[index] for index in chunk]
+        values = request_ndvi_batch(chunkPoints, compositeStart)
+
+        if ndviCache is not None:
+            ndviCache.set_many(chunkPoints, values, period)
+        for index, ndviAvg in zip(chunk, values, strict=True):
+            if ndviAvg is not None:
+                ndvis[index] = ndviAvg
+
+    return ndvis
+
+
+def request_ndvi_batch(points, compositeStart=None):
+    """
+    Returns a list with the average NDVI of each (lat, lon, radius) area (None where no data is available)
+    using a single server-side reduceRegions call.
+
+    :param points: list of (lat, lon, radius) tuples
+    :param compositeStart: start date of the composite to reduce (defaults to the latest covering the points)
+    """
+
+    if not points:
+        return []
+
+    ee = get_earth_engine()
+
+    # One buffered feature per point, tagged with its position in the batch
+    areas = ee.FeatureCollection([
+        ee.Feature(ee.Geometry.Point([lon, lat]).buffer(radius), {"index": index})
+        for index, (lat, lon, radius) in enumerate(points)
+    ])
+    latestImage = get_latest_ndvi_image(ee.Geometry.MultiPoint([[lon, lat] for lat, lon, _ in points]), compositeStart)
+
+    stats = latestImage.select("NDVI").reduceRegions(
+        collection=areas,
+        reducer=ee.Reducer.mean().setOutputs(["NDVI"]),
+        scale=30  # Landsat resolution is 30m
+    ).select(["index", "NDVI"], None, False) # Drop the buffered polygons, which would be most of the download
+
+    ndvis = [None] * len(points)
+    for feature in stats.getInfo()["features"]:
+        properties = feature["properties"]
+        ndvis[properties["index"]] = properties.get("NDVI")
+    return ndvis
+
+
+# Elevation backend: "open-meteo" (HTTP, default) or "dem" (local .hgt tiles in DEM_TILE_DIR)
+demTileStore = DemTileStore(os.getenv("DEM_TILE_DIR", "")) if os.getenv("ELEVATION_BACKEND") == "dem" else None
+
+def set_elevation_backend(store):
+    """
+    Selects where elevations come from: a DemTileStore for offline lookups, or None for Open-Meteo.
+
+    :param store: DemTileStore instance, or None
+    """
+
+    global demTileStore
+    demTileStore = store
+
+
+@metrics.timed("elevation")
 def get_elevation_data(coordsDic):
-    url = f"https://api.open-meteo.com/v1/elevation?latitude={coordsDic["north"][0]},{coordsDic["east"][0]},{coordsDic["south"][0]},{coordsDic["west"][0]}&longitude={coordsDic["north"][1]},{coordsDic["east"][1]},{coordsDic["south"][1]},{coordsDic["west"][1]}"
-    response = requests.get(url)
+    if demTileStore is not None:
+        directions = ["north", "east", "south", "west"]
+        elevations = get_dem_elevations(
+            [coordsDic[direction][0] for direction in directions],
+            [coordsDic[direction][1] for direction in directions]
+        )
+        return {"elevation": elevations.tolist()}
+
+    url = f"{OPEN_METEO_BASE_URL}/v1/elevation?latitude={coordsDic["north"][0]},{coordsDic["east"][0]},{coordsDic["south"][0]},{coordsDic["west"][0]}&longitude={coordsDic["north"][1]},{coordsDic["east"][1]},{coordsDic["south"][1]},{coordsDic["west"][1]}"
+    response = http_get(url, provider="open_meteo")
     return response.json()
+
+
+# Open-Meteo accepts at most 100 coordinates per elevation request
+ELEVATION_MAX_COORDS = 100
+ELEVATION_MAX_CONCURRENCY = int(os.getenv("ELEVATION_MAX_CONCURRENCY", "4"))
+
+def request_elevation_chunk(lats, lons):
+    """
+    Returns the elevations of up to ELEVATION_MAX_COORDS coordinates from one Open-Meteo request.
+
+    :param lats: sequence of latitudes
+    :param lons: sequence of longitudes
+    """
+
+    chunkLats = ",".join(str(lat) for lat in lats)
+    chunkLons = ",".join(str(lon) for lon in lons)
+    url = f"{OPEN_METEO_BASE_URL}/v1/elevation?latitude={chunkLats}&longitude={chunkLons}"
+    response = http_get(url, provider="open_meteo")
+    return response.json()["elevation"]
+
+
+@metrics.timed("elevation_batch")
+def get_elevation_batch(lats, lons, chunkSize=ELEVATION_MAX_COORDS, maxWorkers=None):
+    """
+    Returns an array of elevations for matching arrays of latitudes and longitudes, in input order.
+    Points are packed into requests of up to chunkSize coordinates that run concurrently.
+
+    :param lats: array of latitudes
+    :param lons: array of longitudes
+    :param chunkSize: coordinates per request (at most ELEVATION_MAX_COORDS)
+    :param maxWorkers: requests in flight at once; defaults to ELEVATION_MAX_CONCURRENCY
+    """
+
+    if demTileStore is not None:
+        return get_dem_elevations(lats, lons)
+    return request_elevation_batch(lats, lons, chunkSize, maxWorkers)
+
+
+def request_elevation_batch(lats, lons, chunkSize=ELEVATION_MAX_COORDS, maxWorkers=None):
+    """
+    Returns an array of elevations from Open-Meteo for matching arrays of latitudes and longitudes
+    (see get_elevation_batch).
+
+    :param lats: array of latitudes
+    :param lons: array of longitudes
+    :param chunkSize: coordinates per request (at most ELEVATION_MAX_COORDS)
+    :param maxWorkers: requests in flight at once; defaults to ELEVATION_MAX_CONCURRENCY
+    """
+
+    lats = np.asarray(lats, dtype=float)
+    lons = np.asarray(lons, dtype=float)
+    flatLats = lats.ravel()
+    flatLons = lons.ravel()
+    chunkSize = min(chunkSize, ELEVATION_MAX_COORDS)
+    starts = range(0, flatLats.size, chunkSize)
+
+    with ThreadPoolExecutor(max_workers=maxWorkers or ELEVATION_MAX_CONCURRENCY) as executor:
+        chunks = executor.map(
+            lambda start: request_elevation_chunk(flatLats[start:start + chunkSize], flatLons[start:start + chunkSize]),
+            starts
+        )
+        elevations = [elevation for chunk in chunks for elevation in chunk]
+
+    return np.array(elevations, dtype=float).reshape(lats.shape)
+
+
+def get_dem_elevations(lats, lons):
+    """
+    Returns an array of elevations from the local DEM tiles. Void samples, which would otherwise flow
+    into the slope as NaN, are filled from Open-Meteo.
+
+    :param lats: array of latitudes
+    :param lons: array of longitudes
+    """
+
+    lats = np.asarray(lats, dtype=float)
+    lons = np.asarray(lons, dtype=float)
+    elevations = demTileStore.get_elevations(lats, lons)
+
+    voids = np.isnan(elevations)
+    if voids.any():
+        elevations[voids] = request_elevation_batch(lats[voids], lons[voids])
+    return elevations
+
+
+def get_elevation_data_batch(lats, lons, degree):
+    """
+    Returns a flat array of north, east, south, west elevations for every site,
+    batched into as few requests as possible.
+    Use wildfire_risk_dashboard.grab_elevations_batch to split it by direction.
+
+    :param lats: array of center latitudes
+    :param lons: array of center longitudes
+    :param degree: offset in meters of the neighboring coordinates
+    """
+
+    neighborLats, neighborLons = wrd.get_neighboring_coords_batch(lats, lons, degree)
+    return get_elevation_batch(neighborLats.ravel(), neighborLons.ravel())
+
+
+def get_elevation_grid(lats, lons):
+    """
+    Returns a 2D array of elevations for every (lat, lon) pair of a grid.
+
+    :param lats: latitude axis of the grid (rows)
+    :param lons: longitude axis of the grid (columns)
+    """
+
+    latGrid, lonGrid = np.meshgrid(lats, lons, indexing="ij")
+    return get_elevation_batch(latGrid, lonGrid)
@@ -1,5 +1,6 @@
 """
-For a risk assement tool we use a Dynamic Risk Index that weights environmental factors based on their impact on fire behavior.
+For a risk assement tool we use a Dynamic Risk Index that weights environmental factors based on their impact
+on fire behavior.
 
 To calculate a score between 0 and 100, the algorithm will use the following weights:
     Total Risk = (0.40 x Weather) + (0.40 x Fuel) + (0.20 x Topography)
@@ -7,10 +8,13 @@ To calculate a score between 0 and 100, the algorithm will use the following wei
 
 # Imports
 import math
-from geopy import distance
+
+import numpy as np
 
 # Global Variables
 ONE_DEGREE_OF_LAT_CONST = 111_111
+WGS84_SEMI_MAJOR_AXIS = 6_378_137.0
+WGS84_ECCENTRICITY_SQ = 0.00669437999014
 
 
 def get_one_degree_of_lon(lat):
@@ -23,6 +27,35 @@ def get_one_degree_of_lon(lat):
     return ONE_DEGREE_OF_LAT_CONST * math.cos(math.radians(lat))
 
 
+def get_meters_per_degree(lat):
+    """
+    Returns the length in meters of one degree of latitude and of longitude at a given latitude.
+    Closed-form WGS84 radii of curvature; accepts scalars or arrays.
+
+    :param lat: latitude
+    """
+
+    sinLat = np.sin(np.radians(lat))
+    w = 1 - WGS84_ECCENTRICITY_SQ * sinLat ** 2
+    metersPerLat = np.radians(1) * WGS84_SEMI_MAJOR_AXIS * (1 - WGS84_ECCENTRICITY_SQ) / w ** 1.5
+    metersPerLon = np.radians(1) * WGS84_SEMI_MAJOR_AXIS * np.cos(np.radians(lat)) / np.sqrt(w)
+    return metersPerLat, metersPerLon
+
+
+def get_local_distance(coordA, coordB):
+    """
+    Returns the distance in meters between two nearby coordinates.
+    Uses the local WGS84 scale at their mid-latitude; over the sub-kilometre spans used for
+    slope it agrees with the full geodesic solution to within 1e-5 (relative).
+
+    :param coordA: (lat, lon) of the first point
+    :param coordB: (lat, lon) of the second point
+    """
+
+    metersPerLat, metersPerLon = get_meters_per_degree((coordA[0] + coordB[0]) / 2)
+    return float(math.hypot((coordB[0] - coordA[0]) * metersPerLat, (coordB[1] - coordA[1]) * metersPerLon))
+
+
 #################################################################################
 
 # --- Weather Data Processing ---
@@ -202,10 +235,14 @@ def get_steepness(elevations, coordinates):
     :param coordinates: A dictionary of coordinates of the current and neighboring coordinates
     """
     
-    dz1 = elevations["east"] - elevations["west"] # (The Rise): This is the Elevation at the East point minus the Elevation at the West point.
-    dz2 = elevations["north"] - elevations["south"] # (The Rise): This is the Elevation at the North point minus the Elevation at the South point.
-    dx = distance.distance(coordinates["west"], coordinates["east"]).meters # (The Run): This is the horizontal distance (in meters) between your West and East coordinates.
-    dy = distance.distance(coordinates["south"], coordinates["north"]).meters # (The Run): This is the horizontal distance (in meters) between your South and North coordinates.
+    # (The Rise): This is the Elevation at the East point minus the Elevation at the West point.
+    dz1 = elevations["east"] - elevations["west"]
+    # (The Rise): This is the Elevation at the North point minus the Elevation at the South point.
+    dz2 = elevations["north"] - elevations["south"]
+    # (The Run): This is the horizontal distance (in meters) between your West and East coordinates.
+    dx = get_local_distance(coordinates["west"], coordinates["east"])
+    # (The Run): This is the horizontal distance (in meters) between your South and North coordinates.
+    dy = get_local_distance(coordinates["south"], coordinates["north"])
 
     # Guard against division by zero (flat ground or identical points)
     if dx == 0 or dy == 0:
@@ -215,6 +252,76 @@ def get_steepness(elevations, coordinates):
     return math.degrees(math.atan(math.sqrt( ((dz1 / dx) ** 2) + ((dz2 / dy) ** 2) )))
 
 
+def get_neighboring_coords_batch(lats, lons, degree):
+    """
+    Returns (N, 4) arrays of neighboring latitudes and longitudes in north, east, south, west order.
+
+    :param lats: array of center latitudes
+    :param lons: array of center longitudes
+    :param degree: degrees to offset, either one offset for every site or an array of N offsets
+    """
+
+    lats = np.asarray(lats, dtype=float).ravel()
+    lons = np.asarray(lons, dtype=float).ravel()
+
+    dLat = degree / ONE_DEGREE_OF_LAT_CONST
+    dLon = degree / (ONE_DEGREE_OF_LAT_CONST * np.cos(np.radians(lats)))
+
+    neighborLats = np.stack([lats + dLat, lats, lats - dLat, lats], axis=1)
+    neighborLons = np.stack([lons, lons + dLon, lons, lons - dLon], axis=1)
+    return neighborLats, neighborLons
+
+
+def grab_elevations_batch(elevations):
+    """
+    Returns a dictionary of north, east, south and west elevation arrays from a flat batch of elevations.
+
+    :param elevations: flat array of 4 elevations per site (north, east, south, west),
+        e.g. from utils.get_elevation_data_batch
+    """
+
+    elevations = np.asarray(elevations, dtype=float).reshape(-1, 4)
+    return {
+        "north": elevations[:, 0],
+        "east": elevations[:, 1],
+        "south": elevations[:, 2],
+        "west": elevations[:, 3]
+    }
+
+
+def get_steepness_batch(elevations, lats, degree):
+    """
+    Returns an array of slopes in degrees for many locations at once.
+    The run is taken from the known offset used by get_neighboring_coords rather than measured,
+    so results match get_steepness to within 1e-5 (relative) of the run distance.
+
+    :param elevations: dictionary of direction arrays (see grab_elevations_batch), or an (N, 4) array
+                       of north, east, south, west elevations
+    :param lats: array of N center latitudes
+    :param degree: offset in meters used to build the neighboring coordinates, either one offset for
+                   every location or an array of N offsets
+    """
+
+    if isinstance(elevations, dict):
+        elevations = np.stack([elevations[direction] for direction in ("north", "east", "south", "west")], axis=1)
+    elevations = np.asarray(elevations, dtype=float).reshape(-1, 4)
+    lats = np.asarray(lats, dtype=float)
+    degree = np.broadcast_to(np.asarray(degree, dtype=float), lats.shape)
+
+    metersPerLat, metersPerLon = get_meters_per_degree(lats)
+    dx = 2 * (degree / (ONE_DEGREE_OF_LAT_CONST * np.cos(np.radians(lats)))) * metersPerLon
+    dy = 2 * (degree / ONE_DEGREE_OF_LAT_CONST) * metersPerLat
+
+    dz1 = elevations[:, 1] - elevations[:, 3] # East - West
+    dz2 = elevations[:, 0] - elevations[:, 2] # North - South
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slopes = np.degrees(np.arctan(np.sqrt(((dz1 / dx) ** 2) + ((dz2 / dy) ** 2))))
+
+    # Guard against division by zero (identical points)
+    return np.where(degree == 0, 0.0, slopes)
+
+
 def normalize_slope(slope):
     """
     Returns a score between 0-100 based on slope.
@@ -249,3 +356,251 @@ def calculate_risk_score(weatherScore, fuelScore, slopeScore):
     total_score = (weatherWeight * weatherScore) + (fuelWeight * fuelScore) + (slopeWeight * slopeScore)
                   
     return round(total_score, 2)
+
+
+#################################################################################
+
+# --- Batch Scoring ---
+# Array-in/array-out versions of the scorers above. Each one applies exactly the same
+# arithmetic as its scalar counterpart, so a column of inputs scores identically to
+# calling the scalar function once per row.
+
+def grab_weather_columns(weatherDataList):
+    """
+    Returns arrays of temperature (K), humidity (%) and wind speed (m/s) from a list of weather data.
+
+    :param weatherDataList: List of converted JSON objects containing weather data
+    """
+
+    temps = np.array([weatherData["main"]["temp"] for weatherData in weatherDataList], dtype=float)
+    humidities = np.array([weatherData["main"]["humidity"] for weatherData in weatherDataList], dtype=float)
+    windSpeeds = np.array([weatherData["wind"]["speed"] for weatherData in weatherDataList], dtype=float)
+    return temps, humidities, windSpeeds
+
+
+def normalize_temperature_batch(temps):
+    """
+    Returns an array of scores between 0-100 based on temperatures.
+
+    :param temps: array of temperatures in Kelvin
+    """
+
+    temps = np.asarray(temps, dtype=float) - 273.15
+    return np.clip(((temps - 10) / 20) * 100, 0, 100)
+
+
+def normalize_humidity_batch(humidities):
+    """
+    Returns an array of scores between 0-100 based on humidities.
+
+    :param humidities: array of relative humidities (%)
+    """
+
+    humidities = np.asarray(humidities, dtype=float)
+    return np.clip((1 - ((humidities - 30) / 40)) * 100, 0, 100)
+
+
+def normalize_wind_speed_batch(windSpeeds):
+    """
+    Returns an array of scores between 0-100 based on wind speeds.
+
+    :param windSpeeds: array of wind speeds in m/s
+    """
+
+    windSpeeds = np.asarray(windSpeeds, dtype=float) * 3.6
+    return np.clip(((windSpeeds - 10) / 20) * 100, 0, 100)
+
+
+def calculate_weather_score_batch(tempScores, humidityScores, windScores):
+    """
+    Returns an array of weather scores between 0-100 based on normalized weather scores.
+
+    :param tempScores: array of normalized temperature scores (0-100)
+    :param humidityScores: array of normalized humidity scores (0-100)
+    :param windScores: array of normalized wind speed scores (0-100)
+    """
+
+    tempScores = np.asarray(tempScores, dtype=float) * .15
+    humidityScores = np.asarray(humidityScores, dtype=float) * .35
+    windScores = np.asarray(windScores, dtype=float) * .5
+    return np.round(tempScores + humidityScores + windScores, 2)
+
+
+def normalize_fuel_batch(ndvis):
+    """
+    Returns an array of scores between 0-100 based on NDVI.
+    Missing NDVI values (None or NaN) produce NaN scores.
+
+    :param ndvis: array of NDVI values (-1 to 1)
+    """
+
+    ndvis = np.asarray(ndvis, dtype=float)
+    barrenScore = 10 + (ndvis / 0.2) * 90
+    vegetatedScore = np.maximum(10, 100 + (ndvis - 0.2) * (10 - 100) / (0.8 - 0.2))
+    scores = np.where(ndvis <= 0.2, barrenScore, vegetatedScore)
+    return np.where(ndvis < 0, 0.0, scores)
+
+
+def normalize_slope_batch(slopes):
+    """
+    Returns an array of scores between 0-100 based on slopes.
+
+    :param slopes: array of slopes in degrees
+    """
+
+    slopes = np.asarray(slopes, dtype=float)
+    return np.where(slopes >= 30, 100.0, (slopes / 30) * 100)
+
+
+def calculate_risk_score_batch(weatherScores, fuelScores, slopeScores):
+    """
+    Returns an array of risk scores between 0-100.
+    Missing fuel scores (None or NaN) count as 0, matching calculate_risk_score.
+
+    :param weatherScores: array of normalized weather scores (0-100)
+    :param fuelScores: array of normalized fuel scores (0-100)
+    :param slopeScores: array of normalized slope scores (0-100)
+    """
+
+    weatherWeight = 0.40
+    fuelWeight = 0.40
+    slopeWeight = 0.20
+
+    fuelScores = np.asarray(fuelScores, dtype=float)
+    fuelScores = np.where(np.isnan(fuelScores), 0.0, fuelScores)
+
+    totalScores = (weatherWeight * np.asarray(weatherScores, dtype=float)) + (fuelWeight * fuelScores) \
+        + (slopeWeight * np.asarray(slopeScores, dtype=float))
+
+    return np.round(totalScores, 2)
+
+
+def score_batch(temps, humidities, windSpeeds, ndvis, slopes):
+    """
+    Returns a dictionary of component and total score arrays for columns of raw inputs.
+
+    :param temps: array of temperatures in Kelvin
+    :param humidities: array of relative humidities (%)
+    :param windSpeeds: array of wind speeds in m/s
+    :param ndvis: array of NDVI values (None or NaN where unavailable)
+    :param slopes: array of slopes in degrees
+    """
+
+    tempScores = normalize_temperature_batch(temps)
+    humidityScores = normalize_humidity_batch(humidities)
+    windScores = normalize_wind_speed_batch(windSpeeds)
+    weatherScores = calculate_weather_score_batch(tempScores, humidityScores, windScores)
+    fuelScores = normalize_fuel_batch(ndvis)
+    slopeScores = normalize_slope_batch(slopes)
+    riskScores = calculate_risk_score_batch(weatherScores, fuelScores, slopeScores)
+
+    return {
+        "tempScore": tempScores,
+        "humidityScore": humidityScores,
+        "windScore": windScores,
+        "weatherScore": weatherScores,
+        "fuelScore": fuelScores,
+        "slopeScore": slopeScores,
+        "riskScore": riskScores
+    }
+
+
+#################################################################################
+
+# --- Forecast Timeline ---
+
+def get_peak_window(riskScores, windowSize):
+    """
+    Returns (start, end) indices of the consecutive run of windowSize scores with the highest mean
+    (end is exclusive), or None when there are no scores. The earliest window wins a tie.
+
+    :param riskScores: array of risk scores in time order
+    :param windowSize: number of consecutive scores in the window
+    """
+
+    riskScores = np.asarray(riskScores, dtype=float)
+    if riskScores.size == 0:
+        return None
+    windowSize = max(1, min(windowSize, riskScores.size))
+    windowSums = np.convolve(riskScores, np.ones(windowSize), mode="valid")
+    start = int(np.argmax(windowSums))
+    return start, start + windowSize
+
+
+#################################################################################
+
+# --- Raster Slope Processing ---
+# Grid mode: one elevation array for a whole bounding box, sloped in a single pass with
+# Horn's full 3x3 kernel instead of four cardinal points per location.
+
+def get_grid_coords(south, west, north, east, cellSize):
+    """
+    Returns the latitude and longitude axes of a grid covering a bounding box.
+    Rows run north to south and columns west to east, cellSize meters apart.
+
+    :param south: southern latitude of the box
+    :param west: western longitude of the box
+    :param north: northern latitude of the box
+    :param east: eastern longitude of the box
+    :param cellSize: grid spacing in meters
+    """
+
+    dLat = cellSize / ONE_DEGREE_OF_LAT_CONST
+    dLon = cellSize / get_one_degree_of_lon((south + north) / 2)
+    rows = int(math.floor((north - south) / dLat)) + 1
+    cols = int(math.floor((east - west) / dLon)) + 1
+
+    lats = north - np.arange(rows) * dLat
+    lons = west + np.arange(cols) * dLon
+    return lats, lons
+
+
+def get_slope_grid(elevationGrid, cellSizeX, cellSizeY):
+    """
+    Returns a raster of slopes in degrees using Horn's 3x3 kernel.
+    Edges are extrapolated linearly so border cells keep the local gradient.
+
+    :param elevationGrid: 2D array of elevations in meters, rows north to south
+    :param cellSizeX: east-west cell spacing in meters (scalar, or one value per row)
+    :param cellSizeY: north-south cell spacing in meters
+    """
+
+    elevationGrid = np.asarray(elevationGrid, dtype=float)
+    if elevationGrid.ndim != 2 or min(elevationGrid.shape) < 2:
+        raise ValueError("Elevation grid must be 2D with at least 2 rows and 2 columns.")
+
+    cellSizeX = np.broadcast_to(np.asarray(cellSizeX, dtype=float), (elevationGrid.shape[0],))[:, None]
+
+    padded = np.pad(elevationGrid, 1, mode="reflect", reflect_type="odd")
+    a, b, c = padded[:-2, :-2], padded[:-2, 1:-1], padded[:-2, 2:] # North-west, north, north-east
+    d, f = padded[1:-1, :-2], padded[1:-1, 2:] # West, east
+    g, h, i = padded[2:, :-2], padded[2:, 1:-1], padded[2:, 2:] # South-west, south, south-east
+
+    dzdx = ((c + 2 * f + i) - (a + 2 * d + g)) / (8 * cellSizeX)
+    dzdy = ((a + 2 * b + c) - (g + 2 * h + i)) / (8 * cellSizeY)
+
+    return np.degrees(np.arctan(np.hypot(dzdx, dzdy)))
+
+
+def get_slope_rasters(elevationGrid, lats, lons):
+    """
+    Returns slope (degrees) and slope-score (0-100) rasters for an elevation grid.
+
+    :param elevationGrid: 2D array of elevations in meters, shaped (len(lats), len(lons))
+    :param lats: latitude axis of the grid, north to south (see get_grid_coords)
+    :param lons: longitude axis of the grid, west to east (see get_grid_coords)
+    """
+
+    lats = np.asarray(lats, dtype=float)
+    lons = np.asarray(lons, dtype=float)
+    if lats.size < 2 or lons.size < 2:
+        raise ValueError("Elevation grid must be 2D with at least 2 rows and 2 columns.")
+    if np.shape(elevationGrid) != (lats.size, lons.size):
+        raise ValueError("Elevation grid must be shaped (len(lats), len(lons)).")
+
+    metersPerLat, metersPerLon = get_meters_per_degree(lats)
+    cellSizeY = abs(lats[0] - lats[1]) * metersPerLat.mean()
+    cellSizeX = abs(lons[1] - lons[0]) * metersPerLon
+
+    slope = get_slope_grid(elevationGrid, cellSizeX, cellSizeY)
+    return slope, normalize_slope_batch(slope)
@@ -0,0 +1,14 @@
+import pytest
+from src.wildfire_risk_dashboard import ratelimit
+
+#############################################################
+
+# --- Shared Fixtures ---
+
+@pytest.fixture(autouse=True)
+def isolated_cache_dir(tmp_path, monkeypatch):
+    # Rate limiter state files go to the test's directory rather than the real ~/.cache
+    monkeypatch.setenv("WILDFIRE_CACHE_DIR", str(tmp_path / "cache"))
+    ratelimit.reset_rate_limiters()
+    yield
+    ratelimit.reset_rate_limiters()
@@ -0,0 +1,14 @@
+from benchmarks import run
+
+#############################################################
+
+# --- Benchmark Smoke Testing ---
+
+def test_benchmarks_run_offline_against_standins():
+    results = run.run_benchmarks(points=200, assessments=3, rows=6, concurrencyLevels=(1, 3),
+                                 latency=0.0, jitter=0.0, repeats=1)
+
+    assert results["scoring"]["points"] == 200
+    assert results["single"]["count"] == 3 and results["single"]["errors"] == 0
+    assert [level["concurrency"] for level in results["bulk"]] == [1, 3]
+    assert all(level["errors"] == 0 and level["p99Ms"] >= level["p50Ms"] for level in results["bulk"])
@@ -0,0 +1,145 @@
+import csv
+
+import numpy as np
+import pytest
+from src.wildfire_risk_dashboard import bulk, pipeline, utils
+
+#############################################################
+
+# --- Bulk Scoring Testing ---
+
+@pytest.fixture
+def fake_providers(monkeypatch):
+    calls = {"points": [], "ndviBatches": 0, "elevationBatches": 0}
+
+    def fake_get_weather_data(lat, lon):
+        return {"main": {"temp": 293.15, "humidity": 50}, "wind": {"speed": 5.55}} # weatherScore 49.95
+
+    def fake_get_ndvi_batch(points):
+        calls["ndviBatches"] += 1
+        calls["points"].extend(points)
+        return np.full(len(points), np.nan) # No satellite data
+
+    def fake_get_elevation_data_batch(lats, lons, degree):
+        calls["elevationBatches"] += 1
+        return np.full(len(lats) * 4, 440.0) # Flat ground
+
+    def fake_geocode_location(zipCode, countryCode):
+        if zipCode == "57104":
+            return {"lat": 43.5447, "lon": -96.7311, "name": "Sioux Falls"}, "owm"
+        return None, None
+
+    monkeypatch.setattr(utils, "get_weather_data", fake_get_weather_data)
+    monkeypatch.setattr(utils, "get_ndvi_batch", fake_get_ndvi_batch)
+    monkeypatch.setattr(utils, "get_elevation_data_batch", fake_get_elevation_data_batch)
+    monkeypatch.setattr(utils, "geocode_location", fake_geocode_location)
+    monkeypatch.setattr(pipeline, "assess_location", lambda *args, **kwargs: pytest.fail("row scored on its own"))
+    return calls
+
+
+def write_locations(path, rows):
+    with open(path, "w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=["id", "zip", "country", "lat", "lon", "radius"])
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def test_score_file_streams_csv_and_records_row_errors(tmp_path, fake_providers):
+    inputPath = tmp_path / "locations.csv"
+    outputPath = tmp_path / "scores.csv"
+    write_locations(inputPath, [
+        {"id": "a", "zip": "57104", "country": "US"},
+        {"id": "b", "lat": "40.0", "lon": "-105.0", "radius": "100"},
+        {"id": "c", "zip": "00000", "country": "ZZ"},
+    ])
+
+    scored, skipped = bulk.score_file(str(inputPath), str(outputPath), windowSize=2, concurrency=2)
+
+    with open(outputPath, newline="") as file:
+        results = {row["id"]: row for row in csv.DictReader(file)}
+
+    assert (scored, skipped) == (3, 0)
+    assert results["a"]["riskScore"] == "19.98" and results["a"]["radius"] == "30.0" # Weather only: 49.95 * 0.4
+    assert results["a"]["fuelError"] == utils.NO_SATELLITE_DATA_MESSAGE
+    assert (results["a"]["source"], results["a"]["geocodeSource"]) == ("geocode", "owm")
+    assert results["b"]["radius"] == "100.0"
+    assert (results["b"]["source"], results["b"]["geocodeSource"]) == ("coordinates", "")
+    assert results["c"]["error"] == "Could not find coordinates for this location."
+    assert (40.0, -105.0, 100.0) in fake_providers["points"]
+    # One NDVI and one elevation request for the window of a and b; c's window has nothing left to score
+    assert fake_providers["ndviBatches"] == fake_providers["elevationBatches"] == 1
+
+
+def test_score_file_resumes_from_existing_output(tmp_path, fake_providers):
+    inputPath = tmp_path / "locations.csv"
+    outputPath = tmp_path / "scores.csv"
+    write_locations(inputPath, [{"id": str(i), "lat": "40.0", "lon": str(-105.0 + i)} for i in range(5)])
+
+    bulk.score_file(str(inputPath), str(outputPath))
+    fake_providers["points"].clear()
+    write_locations(inputPath, [{"id": str(i), "lat": "40.0", "lon": str(-105.0 + i)} for i in range(7)])
+
+    scored, skipped = bulk.score_file(str(inputPath), str(outputPath), resume=True)
+
+    with open(outputPath, newline="") as file:
+        ids = [row["id"] for row in csv.DictReader(file)]
+    assert (scored, skipped) == (2, 5)
+    assert len(fake_providers["points"]) == 2
+    assert ids == [str(i) for i in range(7)]
+
+
+def test_score_file_parquet_output_with_resume(tmp_path, fake_providers):
+    parquet = pytest.importorskip("pyarrow.parquet")
+    inputPath = tmp_path / "locations.csv"
+    outputPath = tmp_path / "scores.parquet"
+    write_locations(inputPath, [{"id": str(i), "lat": "40.0", "lon": "-105.0"} for i in range(3)])
+
+    bulk.score_file(str(inputPath), str(outputPath))
+    write_locations(inputPath, [{"id": str(i), "lat": "40.0", "lon": "-105.0"} for i in range(4)])
+    scored, skipped = bulk.score_file(str(inputPath), str(outputPath), resume=True)
+
+    table = parquet.read_table(outputPath)
+    assert (scored, skipped) == (1, 3)
+    assert table.column("id").to_pylist() == ["0", "1", "2", "3"]
+    assert table.column("riskScore").to_pylist() == [19.98] * 4
+
+
+def test_resume_retries_rows_that_failed(tmp_path, fake_providers, monkeypatch):
+    inputPath = tmp_path / "locations.csv"
+    outputPath = tmp_path / "scores.csv"
+    write_locations(inputPath, [
+        {"id": "a", "zip": "57104", "country": "US"},
+        {"id": "b", "lat": "40.0", "lon": "-105.0"},
+    ])
+
+    monkeypatch.setattr(utils, "geocode_location", lambda zipCode, countryCode: (None, None)) # Geocoding down
+    bulk.score_file(str(inputPath), str(outputPath))
+    monkeypatch.setattr(utils, "geocode_location", lambda zipCode, countryCode: ({"lat": 43.5, "lon": -96.7}, "cache"))
+    scored, skipped = bulk.score_file(str(inputPath), str(outputPath), resume=True)
+
+    with open(outputPath, newline="") as file:
+        rows = [(row["id"], row["error"]) for row in csv.DictReader(file)]
+    assert (scored, skipped) == (1, 1)
+    assert rows[-1] == ("a", "")
+    assert bulk.read_scored_ids(str(outputPath)) == {"a", "b"}
+
+
+def test_parquet_windows_survive_a_crash(tmp_path, fake_providers, monkeypatch):
+    parquet = pytest.importorskip("pyarrow.parquet")
+    inputPath = tmp_path / "locations.csv"
+    outputPath = tmp_path / "scores.parquet"
+    write_locations(inputPath, [{"id": str(i), "lat": "40.0", "lon": "-105.0"} for i in range(5)])
+
+    def crash_on_fifth(location, defaultRadius):
+        if location["id"] == "4":
+            raise KeyboardInterrupt # Stands in for a kill mid-run
+        return resolveLocation(location, defaultRadius)
+
+    resolveLocation = bulk.resolve_location
+    monkeypatch.setattr(bulk, "resolve_location", crash_on_fifth)
+    with pytest.raises(KeyboardInterrupt):
+        bulk.score_file(str(inputPath), str(outputPath), windowSize=2)
+
+    assert parquet.read_table(outputPath).column("id").to_pylist() == ["0", "1", "2", "3"]
+    monkeypatch.setattr(bulk, "resolve_location", resolveLocation)
+    assert bulk.score_file(str(inputPath), str(outputPath), resume=True) == (1, 4)
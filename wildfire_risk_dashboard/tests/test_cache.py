@@ -0,0 +1,191 @@
+import math
+import time
+from datetime import date
+
+import pytest
+from src.wildfire_risk_dashboard import cache, utils
+
+#############################################################
+
+# --- Geocode Cache Testing ---
+
+def test_geocode_cache_round_trip(tmp_path):
+    geocodeCache = cache.GeocodeCache(path=str(tmp_path / "geocode.sqlite"))
+    location = {"lat": -3.84, "lon": -62.06, "name": "Codajás, AM, Brazil", "source": "google"}
+
+    assert geocodeCache.get("69450-000", "BR") is None
+
+    geocodeCache.set("69450-000", "BR", location, "google", "generic")
+    entry = geocodeCache.get(" 69450-000 ", "br")
+
+    assert entry == {"result": location, "source": "google", "owmDecision": "generic"}
+
+
+def test_geocode_cache_normalizes_postal_codes(tmp_path):
+    geocodeCache = cache.GeocodeCache(path=str(tmp_path / "geocode.sqlite"))
+    geocodeCache.set("e14  5ab", "GB", {"lat": 51.5, "lon": -0.02, "name": "London"}, "owm", "accepted")
+
+    assert geocodeCache.get("E14 5AB", "gb")["result"]["name"] == "London"
+
+
+def test_geocode_cache_expires_entries(tmp_path):
+    geocodeCache = cache.GeocodeCache(path=str(tmp_path / "geocode.sqlite"), ttl=60, negativeTtl=0)
+    geocodeCache.set("00000", "ZZ", None, None, "no_result")
+    geocodeCache.set("57104", "US", {"lat": 43.5, "lon": -96.7, "name": "Sioux Falls"}, "owm", "accepted")
+    time.sleep(0.01)
+
+    assert geocodeCache.get("00000", "ZZ") is None
+    assert geocodeCache.get("57104", "US") is not None
+
+
+def test_geocode_waterfall_runs_once_per_postal_code(tmp_path, monkeypatch):
+    calls = []
+
+    def fake_waterfall(zipCode, countryCode):
+        calls.append((zipCode, countryCode))
+        return {"lat": 43.5, "lon": -96.7, "name": "Sioux Falls"}, "owm", "accepted"
+
+    monkeypatch.setattr(utils, "geocodeCache", cache.GeocodeCache(path=str(tmp_path / "geocode.sqlite")))
+    monkeypatch.setattr(utils, "run_geocode_waterfall", fake_waterfall)
+
+    first = utils.geocode_location("57104", "US")
+    second = utils.geocode_location("57104", "us")
+
+    assert first[0] == second[0]
+    assert (first[1], second[1]) == ("owm", "cache")
+    assert len(calls) == 1
+
+
+#############################################################
+
+# --- Weather Cache Testing ---
+
+def test_encode_geohash_known_value():
+    # Reference value from the original geohash specification
+    assert cache.encode_geohash(57.64911, 10.40744, 11) == "u4pruydqqvj"
+
+
+def test_weather_cache_shares_nearby_requests():
+    weatherCache = cache.WeatherCache(precision=6, ttl=600, maxEntries=10)
+    calls = []
+
+    def fetcher(lat, lon):
+        calls.append((lat, lon))
+        return {"main": {"temp": 293.15, "humidity": 50}, "wind": {"speed": 5.55}}
+
+    first = weatherCache.get_or_fetch(43.5447, -96.7311, fetcher)
+    second = weatherCache.get_or_fetch(43.5449, -96.7313, fetcher) # ~30m away
+
+    assert first is second
+    assert len(calls) == 1
+    assert weatherCache.stats() == {"hits": 1, "misses": 1, "hitRate": 0.5, "size": 1}
+
+
+def test_weather_cache_expires_and_evicts():
+    weatherCache = cache.WeatherCache(precision=6, ttl=0, maxEntries=2)
+    weatherCache.set(43.5, -96.7, {"main": {}})
+    time.sleep(0.01)
+    assert weatherCache.get(43.5, -96.7) is None
+
+    weatherCache.ttl = 600
+    weatherCache.set(10.0, 10.0, {"main": {}})
+    weatherCache.set(20.0, 20.0, {"main": {}})
+    weatherCache.set(30.0, 30.0, {"main": {}})
+    assert weatherCache.stats()["size"] == 2
+    assert weatherCache.get(10.0, 10.0) is None
+
+
+def test_weather_cache_skips_error_payloads():
+    weatherCache = cache.WeatherCache()
+    weatherCache.get_or_fetch(43.5, -96.7, lambda lat, lon: {"cod": 401, "message": "Invalid API key"})
+    assert weatherCache.stats()["size"] == 0
+
+
+#############################################################
+
+# --- NDVI Cache Testing ---
+
+def test_composite_periods():
+    from datetime import date
+
+    assert cache.get_composite_period(date(2026, 1, 1)) == "2026-00"
+    assert cache.get_composite_period(date(2026, 2, 1)) == "2026-00"
+    assert cache.get_composite_period(date(2026, 2, 2)) == "2026-01"
+
+
+def test_ndvi_cache_quantizes_locations(tmp_path):
+    ndviCache = cache.NdviCache(path=str(tmp_path / "ndvi.sqlite"), precision=4)
+    ndviCache.set(43.54471, -96.73112, 30, 0.31, period="2026-08")
+
+    assert ndviCache.get(43.54469, -96.73108, 30, period="2026-08") == {"ndvi": 0.31}
+    assert ndviCache.get(43.54469, -96.73108, 100, period="2026-08") is None
+    assert ndviCache.get(43.54469, -96.73108, 30, period="2026-09") is None
+
+
+def test_ndvi_cache_bulk_round_trip(tmp_path):
+    ndviCache = cache.NdviCache(path=str(tmp_path / "ndvi.sqlite"))
+    points = [(43.5447, -96.7311, 30), (0.0, -30.0, 30), (11.0, 11.0, 100)]
+
+    assert ndviCache.get_many(points, period="2026-08") == [None, None, None]
+    ndviCache.set_many(points[:2], [0.31, None], period="2026-08")
+
+    assert ndviCache.get_many(points, period="2026-08") == [{"ndvi": 0.31}, {"ndvi": None}, None]
+    assert ndviCache.get(*points[0], period="2026-08") == {"ndvi": 0.31}
+
+
+def test_get_ndvi_negative_cache(tmp_path, monkeypatch):
+    calls = []
+
+    def fake_request_ndvi(lat, lon, radius, compositeStart=None):
+        calls.append((lat, lon, radius))
+        raise utils.SatelliteDataError("no data")
+
+    monkeypatch.setattr(utils, "ndviCache", cache.NdviCache(path=str(tmp_path / "ndvi.sqlite")))
+    monkeypatch.setattr(utils, "get_latest_composite_start", lambda: date(2026, 7, 14))
+    monkeypatch.setattr(utils, "request_ndvi", fake_request_ndvi)
+
+    for _ in range(2):
+        with pytest.raises(utils.SatelliteDataError):
+            utils.get_ndvi(0.0, -30.0, 30)
+
+    assert len(calls) == 1
+
+
+def test_get_ndvi_batch_reports_missing_points_individually(tmp_path, monkeypatch):
+    batches = []
+
+    def fake_request_ndvi_batch(points, compositeStart=None):
+        batches.append(points)
+        return [0.42 if lon > 0 else None for lat, lon, radius in points]
+
+    monkeypatch.setattr(utils, "ndviCache", cache.NdviCache(path=str(tmp_path / "ndvi.sqlite")))
+    monkeypatch.setattr(utils, "get_latest_composite_start", lambda: date(2026, 7, 14))
+    monkeypatch.setattr(utils, "request_ndvi_batch", fake_request_ndvi_batch)
+
+    points = [(10.0, 10.0, 30), (0.0, -30.0, 30), (11.0, 11.0, 100)]
+    first = utils.get_ndvi_batch(points)
+    second = utils.get_ndvi_batch(points)
+
+    assert len(batches) == 1 and len(batches[0]) == 3
+    for ndvis in (first, second):
+        assert ndvis[0] == 0.42 and ndvis[2] == 0.42
+        assert math.isnan(ndvis[1]) # NaN marks the point without data
+
+
+def test_ndvi_cache_follows_the_published_composite(tmp_path, monkeypatch):
+    composites = []
+
+    def fake_request_ndvi(lat, lon, radius, compositeStart=None):
+        composites.append(compositeStart)
+        return 0.3 if compositeStart.month == 7 else 0.5
+
+    latest = {"start": date(2026, 7, 14)}
+    monkeypatch.setattr(utils, "ndviCache", cache.NdviCache(path=str(tmp_path / "ndvi.sqlite")))
+    monkeypatch.setattr(utils, "get_latest_composite_start", lambda: latest["start"])
+    monkeypatch.setattr(utils, "request_ndvi", fake_request_ndvi)
+
+    assert utils.get_ndvi(43.5447, -96.7311, 30) == 0.3
+    assert utils.get_ndvi(43.5447, -96.7311, 30) == 0.3
+    latest["start"] = date(2026, 8, 15) # Next composite published mid-period
+    assert utils.get_ndvi(43.5447, -96.7311, 30) == 0.5
+    assert composites == [date(2026, 7, 14), date(2026, 8, 15)]
@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+from src.wildfire_risk_dashboard import dem, utils
+from src.wildfire_risk_dashboard import wildfire_risk_dashboard as wrd
+
+#############################################################
+
+# --- DEM Tile Store Testing ---
+
+def write_hgt_tile(directory, tileLat, tileLon, samples):
+    path = directory / dem.get_tile_name(tileLat, tileLon)
+    samples.astype(">i2").tofile(path)
+    return path
+
+
+def test_tile_names():
+    assert dem.get_tile_name(43, -97) == "N43W097.hgt"
+    assert dem.get_tile_name(-4, 12) == "S04E012.hgt"
+
+
+def test_bilinear_elevations_on_a_plane(tmp_path):
+    # 11 x 11 samples rising 10m per sample to the east and 5m per sample to the south
+    rows, cols = np.mgrid[0:11, 0:11]
+    write_hgt_tile(tmp_path, 43, -97, 100 + 10 * cols + 5 * rows)
+    store = dem.DemTileStore(str(tmp_path))
+
+    # Halfway between samples in both directions (0.05 degrees is half a sample spacing)
+    elevations = store.get_elevations([43.95, 43.0], [-96.95, -96.05])
+
+    assert elevations[0] == pytest.approx(100 + 10 * 0.5 + 5 * 0.5)
+    assert elevations[1] == pytest.approx(100 + 10 * 9.5 + 5 * 10)
+
+
+def test_void_samples_and_missing_tiles(tmp_path):
+    samples = np.full((11, 11), 440)
+    samples[0, 0] = dem.HGT_VOID
+    write_hgt_tile(tmp_path, 43, -97, samples)
+    store = dem.DemTileStore(str(tmp_path))
+
+    assert np.isnan(store.get_elevations([43.99], [-96.99])[0])
+
+    # A point on the north-east sample interpolates between columns 9 and 10, but column 9 carries no weight
+    samples[0, 9] = dem.HGT_VOID
+    write_hgt_tile(tmp_path, 43, -97, samples)
+    assert dem.DemTileStore(str(tmp_path)).get_elevations([44.0], [-96.0])[0] == 440
+    with pytest.raises(ValueError):
+        store.get_elevations([10.5], [10.5])
+
+
+def test_points_on_tile_edges_use_the_tile_present(tmp_path):
+    rows, cols = np.mgrid[0:11, 0:11]
+    write_hgt_tile(tmp_path, 43, -97, 100 + 10 * cols + 5 * rows)
+    store = dem.DemTileStore(str(tmp_path))
+
+    # 44.0 and -96.0 are the northern and eastern edges of N43W097; N44W097 and N43W096 are absent
+    elevations = store.get_elevations([44.0, 43.5], [-96.5, -96.0])
+
+    assert elevations[0] == pytest.approx(100 + 10 * 5)
+    assert elevations[1] == pytest.approx(100 + 10 * 10 + 5 * 5)
+
+
+def test_non_square_tiles_read_their_header(tmp_path):
+    rows, cols = np.mgrid[0:11, 0:6]
+    write_hgt_tile(tmp_path, 70, -150, 100 + 10 * cols + 5 * rows)
+    (tmp_path / "N70W150.hdr").write_text("BYTEORDER M\nNROWS 11\nNCOLS 6\n")
+    store = dem.DemTileStore(str(tmp_path))
+
+    assert store.get_elevations([70.5], [-149.5])[0] == pytest.approx(100 + 10 * 2.5 + 5 * 5)
+
+
+def test_dem_voids_fall_back_to_open_meteo(tmp_path, monkeypatch):
+    samples = np.full((11, 11), 440)
+    samples[0:2, 0:2] = dem.HGT_VOID
+    write_hgt_tile(tmp_path, 43, -97, samples)
+    monkeypatch.setattr(utils, "demTileStore", dem.DemTileStore(str(tmp_path)))
+    monkeypatch.setattr(utils, "request_elevation_chunk", lambda lats, lons: [500.0] * len(lats))
+
+    elevations = utils.get_elevation_batch([43.99, 43.5], [-96.99, -96.5])
+
+    assert elevations.tolist() == [500.0, 440.0]
+
+
+def test_dem_backend_replaces_open_meteo(tmp_path, monkeypatch):
+    rows, cols = np.mgrid[0:1201, 0:1201]
+    write_hgt_tile(tmp_path, 43, -97, 400 + cols // 4)
+    monkeypatch.setattr(utils, "demTileStore", dem.DemTileStore(str(tmp_path)))
+    monkeypatch.setattr(utils, "http_get", lambda *args, **kwargs: pytest.fail("network used"))
+
+    coords = wrd.get_neighboring_coords(43.5447, -96.7311, 30)
+    elevationData = utils.get_elevation_data(coords)
+    elevations = wrd.grab_elevations(elevationData)
+
+    assert len(elevationData["elevation"]) == 4
+    assert elevations["east"] > elevations["west"]
+    assert elevations["north"] == pytest.approx(elevations["south"])
@@ -0,0 +1,102 @@
+import time
+
+import pytest
+from src.wildfire_risk_dashboard import utils
+
+#############################################################
+
+# --- Hedged Geocoding Testing ---
+
+OWM_LOCATION = {"lat": 43.54, "lon": -96.73, "name": "Sioux Falls", "country": "US"}
+GOOGLE_LOCATION = {"lat": 43.55, "lon": -96.72, "name": "Sioux Falls, SD 57104, USA", "source": "google"}
+
+
+@pytest.fixture
+def hedging(monkeypatch):
+    monkeypatch.setattr(utils, "GEOCODE_HEDGE_ENABLED", True)
+    monkeypatch.setattr(utils, "GEOCODE_HEDGE_DEFAULT_DEADLINE", 0.05)
+    monkeypatch.setattr(utils, "_owmLatencies", utils.deque(maxlen=500))
+    googleCalls = []
+
+    def setup(owmDelay, owmDecision, googleDelay, googleLocation, owmError=None):
+        def fake_owm(zipCode, countryCode):
+            time.sleep(owmDelay)
+            if owmError is not None:
+                raise owmError
+            return OWM_LOCATION, owmDecision
+
+        def fake_google(zipCode, countryCode):
+            googleCalls.append(zipCode)
+            time.sleep(googleDelay)
+            return googleLocation
+
+        monkeypatch.setattr(utils, "request_owm_geocode", fake_owm)
+        monkeypatch.setattr(utils, "request_google_location", fake_google)
+        return googleCalls
+
+    return setup
+
+
+def test_fast_owm_is_not_hedged(hedging):
+    googleCalls = hedging(0, "accepted", 0, GOOGLE_LOCATION)
+    assert utils.run_geocode_waterfall("57104", "US") == (OWM_LOCATION, "owm", "accepted")
+    assert googleCalls == []
+
+
+def test_slow_owm_is_hedged_with_google(hedging):
+    hedging(1.0, "accepted", 0.05, GOOGLE_LOCATION)
+
+    start = time.monotonic()
+    result = utils.run_geocode_waterfall("57104", "US")
+    elapsed = time.monotonic() - start
+
+    assert result == (GOOGLE_LOCATION, "google", None)
+    assert elapsed < 0.5 # Did not wait for OWM
+
+
+def test_hedge_waits_for_owm_when_google_has_nothing(hedging):
+    hedging(0.2, "accepted", 0, None)
+    assert utils.run_geocode_waterfall("57104", "US") == (OWM_LOCATION, "owm", "accepted")
+
+
+def test_hedge_raises_owm_error_when_google_has_nothing(hedging):
+    hedging(0.2, None, 0, None, owmError=utils.requests.ConnectionError("connection reset"))
+    with pytest.raises(utils.requests.ConnectionError):
+        utils.run_geocode_waterfall("57104", "US")
+
+
+def test_abandoned_hedges_share_one_bounded_pool(hedging, monkeypatch):
+    monkeypatch.setattr(utils, "GEOCODE_HEDGE_POOL_SIZE", 4)
+    monkeypatch.setattr(utils, "_hedgeExecutor", None)
+    hedging(0.3, "accepted", 0, GOOGLE_LOCATION)
+
+    for _ in range(5):
+        assert utils.run_geocode_waterfall("57104", "US")[1] == "google"
+
+    executor = utils.get_hedge_executor()
+    assert executor is utils.get_hedge_executor()
+    assert len(executor._threads) <= 4 # Five abandoned OWM requests, but no thread per lookup
+    executor.shutdown(wait=True)
+
+
+def test_hedge_deadline_follows_observed_latencies(monkeypatch):
+    monkeypatch.setattr(utils, "_owmLatencies", utils.deque([0.1] * 95 + [2.0] * 5, maxlen=500))
+    monkeypatch.setattr(utils, "GEOCODE_HEDGE_PERCENTILE", 90)
+    assert utils.get_hedge_deadline() == pytest.approx(0.1)
+
+    monkeypatch.setattr(utils, "_owmLatencies", utils.deque([0.1] * 5, maxlen=500))
+    assert utils.get_hedge_deadline() == utils.GEOCODE_HEDGE_DEFAULT_DEADLINE
+
+
+def test_owm_zip_name_is_generic_for_any_spelling(monkeypatch):
+    class FakeResponse:
+        elapsed = utils.timedelta(seconds=0.1)
+
+        def json(self):
+            return {"lat": 51.5, "lon": -0.14, "name": "SW1A 1AA", "country": "GB"}
+
+    monkeypatch.setattr(utils, "http_get", lambda url, **kwargs: FakeResponse())
+    monkeypatch.setattr(utils, "_owmLatencies", utils.deque(maxlen=500))
+    for zipCode in ("SW1A 1AA", " sw1a  1aa "):
+        assert utils.request_owm_geocode(zipCode, "GB")[1] == "generic"
+    assert utils._owmLatencies[-1] == 0.1 # The round trip only, not time spent in http_get
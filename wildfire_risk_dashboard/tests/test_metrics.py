@@ -0,0 +1,94 @@
+import pytest
+from src.wildfire_risk_dashboard import metrics, ratelimit, utils
+from src.wildfire_risk_dashboard.cache import WeatherCache
+
+#############################################################
+
+# --- Metrics Testing ---
+
+@pytest.fixture
+def enabled_metrics():
+    metrics.reset()
+    metrics.enable()
+    yield metrics
+    metrics.enable(False)
+    metrics.reset()
+
+
+def test_disabled_metrics_record_nothing():
+    metrics.reset()
+    metrics.enable(False)
+
+    @metrics.timed("noop")
+    def noop():
+        return 42
+
+    assert noop() == 42
+    metrics.increment("stage_calls_total", stage="noop")
+    with metrics.timer("noop"):
+        pass
+    assert metrics.export_json()["stages"] == {}
+    assert metrics.export_json()["counters"] == []
+
+
+def test_timed_records_calls_and_errors(enabled_metrics):
+    @metrics.timed("flaky")
+    def flaky(fail):
+        if fail:
+            raise ValueError("boom")
+        return "ok"
+
+    flaky(False)
+    with pytest.raises(ValueError):
+        flaky(True)
+
+    stats = metrics.export_json()["stages"]["flaky"]
+    assert stats["calls"] == 2
+    assert stats["errors"] == 1
+
+
+def test_cache_hit_rate_and_prometheus_export(enabled_metrics):
+    cache = WeatherCache(precision=6, ttl=600)
+    cache.get(43.5447, -96.7311)
+    cache.set(43.5447, -96.7311, {"main": {"temp": 290}})
+    cache.get(43.5447, -96.7311)
+
+    assert metrics.export_json()["caches"]["weather"] == {"hits": 1, "misses": 1, "hitRate": 0.5}
+
+    text = metrics.export_prometheus()
+    assert '# TYPE wildfire_cache_lookups_total counter' in text
+    assert 'wildfire_cache_lookups_total{cache="weather",result="hit"} 1' in text
+
+
+def test_stage_histogram_buckets_are_cumulative(enabled_metrics):
+    metrics.observe("stage_duration_seconds", 0.003, stage="weather")
+    metrics.observe("stage_duration_seconds", 0.2, stage="weather")
+
+    text = metrics.export_prometheus()
+    assert 'wildfire_stage_duration_seconds_bucket{stage="weather",le="0.005"} 1' in text
+    assert 'wildfire_stage_duration_seconds_bucket{stage="weather",le="0.25"} 2' in text
+    assert 'wildfire_stage_duration_seconds_bucket{stage="weather",le="+Inf"} 2' in text
+    assert 'wildfire_stage_duration_seconds_count{stage="weather"} 2' in text
+
+
+def test_geocode_fallback_is_counted(enabled_metrics, monkeypatch):
+    class FakeResponse:
+        elapsed = utils.timedelta(seconds=0.1)
+
+        def json(self):
+            return {"lat": -3.1, "lon": -60.0, "name": "Brazil", "country": "BR"}
+
+    class FakeGmaps:
+        def geocode(self, query, components):
+            return [{"geometry": {"location": {"lat": -3.1, "lng": -60.0}}, "formatted_address": "Manaus"}]
+
+    monkeypatch.setattr(utils, "http_get", lambda url, **kwargs: FakeResponse())
+    monkeypatch.setattr(utils, "get_gmaps_client", lambda: FakeGmaps())
+    monkeypatch.setattr(ratelimit, "ENABLED", False)
+    monkeypatch.setenv("OPENWEATHER_API_KEY", "test")
+
+    result, source, _ = utils.run_geocode_waterfall("69000-000", "BR")
+
+    assert source == "google"
+    counters = metrics.export_json()["counters"]
+    assert {"name": "wildfire_geocode_fallback_total", "labels": {"owmDecision": "generic"}, "value": 1} in counters
@@ -0,0 +1,181 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+from src.wildfire_risk_dashboard import pipeline, utils
+from src.wildfire_risk_dashboard import wildfire_risk_dashboard as wrd
+
+#############################################################
+
+# --- Pipeline Testing ---
+
+def slow_stage(result, delay=0.3):
+    def stage(lat, lon, radius):
+        time.sleep(delay)
+        return result
+    return stage
+
+
+WEATHER = {"temp": 293.15, "humidity": 50, "windSpeed": 5.55, "weatherScore": 50.0}
+FUEL = {"ndvi": 0.2, "fuelScore": 100.0}
+SLOPE = {"slope": 15.0, "slopeScore": 50.0}
+
+
+def test_stages_run_concurrently():
+    stages = {"weather": slow_stage(WEATHER), "fuel": slow_stage(FUEL), "slope": slow_stage(SLOPE)}
+
+    start = time.monotonic()
+    assessment = pipeline.assess_location(43.5447, -96.7311, 30, stages=stages)
+    elapsed = time.monotonic() - start
+
+    assert elapsed < 0.8 # Sequential would take at least 0.9 seconds
+    assert assessment["riskScore"] == 70.0 # (50 * 0.4) + (100 * 0.4) + (50 * 0.2)
+    assert assessment["fuelError"] is None
+
+
+def test_failed_fuel_stage_degrades_to_none():
+    def failing_fuel(lat, lon, radius):
+        raise utils.SatelliteDataError("no data")
+
+    stages = {"weather": slow_stage(WEATHER, 0), "fuel": failing_fuel, "slope": slow_stage(SLOPE, 0)}
+    assessment = pipeline.assess_location(0.0, -30.0, 30, stages=stages)
+
+    assert assessment["fuelScore"] is None
+    assert assessment["fuelError"] == "no data"
+    assert assessment["riskScore"] == 30.0 # (50 * 0.4) + (50 * 0.2)
+
+
+def test_stage_timeouts():
+    stages = {"weather": slow_stage(WEATHER, 0), "fuel": slow_stage(FUEL, 2), "slope": slow_stage(SLOPE, 0)}
+    assessment = pipeline.assess_location(43.5, -96.7, 30, stages=stages, timeouts={"fuel": 0.1})
+    assert assessment["fuelScore"] is None
+    assert "timed out" in assessment["fuelError"]
+
+    stages["weather"] = slow_stage(WEATHER, 2)
+    with pytest.raises(TimeoutError):
+        pipeline.assess_location(43.5, -96.7, 30, stages=stages, timeouts={"weather": 0.1, "fuel": 0.1})
+
+
+def test_stage_timeouts_exclude_time_queued(monkeypatch):
+    # One pool thread: each stage waits for the one before it, longer than its own timeout
+    monkeypatch.setattr(pipeline, "_stageExecutor", ThreadPoolExecutor(max_workers=1))
+    monkeypatch.setattr(pipeline, "_stageExecutorPid", os.getpid())
+    stages = {"weather": slow_stage(WEATHER, 0.2), "fuel": slow_stage(FUEL, 0.2), "slope": slow_stage(SLOPE, 0.2)}
+
+    assessment = pipeline.assess_location(43.5, -96.7, 30, stages=stages,
+                                          timeouts={"weather": 0.3, "fuel": 0.3, "slope": 0.3})
+
+    assert assessment["fuelError"] is None
+    assert assessment["riskScore"] == 70.0
+
+
+#############################################################
+
+# --- Forecast Testing ---
+
+def test_forecast_timeline_matches_scalar_scores(monkeypatch):
+    forecast = {
+        "time": ["2026-08-01T00:00", "2026-08-01T01:00", "2026-08-01T02:00", "2026-08-01T03:00"],
+        "temp": np.array([283.15, 293.15, 303.15, 298.15]),
+        "humidity": np.array([80.0, 50.0, 15.0, 30.0]),
+        "windSpeed": np.array([1.0, 5.55, 12.0, 8.0])
+    }
+    monkeypatch.setattr(utils, "get_hourly_forecast", lambda lat, lon, hours: forecast)
+
+    calls = []
+    def counted(result):
+        def stage(lat, lon, radius):
+            calls.append(result)
+            return result
+        return stage
+
+    timeline = pipeline.assess_forecast(43.5, -96.7, 30, windowHours=2,
+                                        stages={"fuel": counted(FUEL), "slope": counted(SLOPE)})
+
+    assert len(calls) == 2 # Fuel and slope fetched once for every hour
+    for hour in range(4):
+        weatherData = {"main": {"temp": forecast["temp"][hour], "humidity": forecast["humidity"][hour]},
+                       "wind": {"speed": forecast["windSpeed"][hour]}}
+        weatherScore = wrd.calculate_weather_score(wrd.normalize_temperature(weatherData),
+                                                   wrd.normalize_humidity(weatherData),
+                                                   wrd.normalize_wind_speed(weatherData))
+        assert timeline["weatherScore"][hour] == weatherScore
+        assert timeline["riskScore"][hour] == wrd.calculate_risk_score(weatherScore, 100.0, 50.0)
+
+    assert timeline["peakWindow"]["start"] == "2026-08-01T02:00"
+    assert timeline["peakWindow"]["end"] == "2026-08-01T03:00"
+
+
+def test_empty_forecast_has_no_peak_window(monkeypatch):
+    forecast = {"time": [], "temp": np.array([]), "humidity": np.array([]), "windSpeed": np.array([])}
+    monkeypatch.setattr(utils, "get_hourly_forecast", lambda lat, lon, hours: forecast)
+
+    timeline = pipeline.assess_forecast(43.5, -96.7, 30, stages={"fuel": lambda *args: FUEL,
+                                                                 "slope": lambda *args: SLOPE})
+
+    assert timeline["riskScore"].size == 0
+    assert timeline["peakWindow"] is None
+
+
+def test_peak_window_picks_highest_mean():
+    assert wrd.get_peak_window([10, 80, 20, 60, 70, 10], 2) == (3, 5)
+    assert wrd.get_peak_window([10, 80, 20], 1) == (1, 2)
+    assert wrd.get_peak_window([10, 20], 5) == (0, 2)
+    assert wrd.get_peak_window([], 3) is None
+
+
+#############################################################
+
+# --- Radius Sweep Testing ---
+
+def plane_elevation(lat, lon):
+    return 440 + 900 * (lat - 43.5) + 600 * (lon + 96.7)
+
+
+def test_sweep_matches_single_assessments(monkeypatch):
+    weatherData = {"main": {"temp": 303.15, "humidity": 20}, "wind": {"speed": 9.0}}
+    ndviCalls = []
+    elevationCalls = []
+
+    def fake_ndvi_batch(points, compositeStart=None):
+        ndviCalls.append(points)
+        return [0.3 if radius < 400 else None for _, _, radius in points]
+
+    def fake_elevation_chunk(lats, lons):
+        elevationCalls.append(len(lats))
+        return [plane_elevation(lat, lon) for lat, lon in zip(lats, lons, strict=True)]
+
+    def fake_ndvi(lat, lon, radius):
+        if radius >= 400:
+            raise utils.SatelliteDataError(utils.NO_SATELLITE_DATA_MESSAGE)
+        return 0.3
+
+    def fake_elevation_data(coordsDic):
+        directions = ("north", "east", "south", "west")
+        return {"elevation": [plane_elevation(*coordsDic[direction]) for direction in directions]}
+
+    monkeypatch.setattr(utils, "get_weather_data", lambda lat, lon: weatherData)
+    monkeypatch.setattr(utils, "ndviCache", None)
+    monkeypatch.setattr(utils, "demTileStore", None)
+    monkeypatch.setattr(utils, "request_ndvi_batch", fake_ndvi_batch)
+    monkeypatch.setattr(utils, "request_elevation_chunk", fake_elevation_chunk)
+
+    radii = [30, 100, 250, 500]
+    sweep = pipeline.assess_sweep(43.5447, -96.7311, radii)
+
+    assert len(ndviCalls) == 1 and len(ndviCalls[0]) == 4 # One reduction for every buffer
+    assert elevationCalls == [16] # Four rings of four neighbours in one request
+
+    monkeypatch.setattr(utils, "get_ndvi", fake_ndvi)
+    monkeypatch.setattr(utils, "get_elevation_data", fake_elevation_data)
+    for radius, swept in zip(radii, sweep, strict=True):
+        single = pipeline.assess_location(43.5447, -96.7311, radius)
+        assert swept["radius"] == radius
+        assert swept["fuelScore"] == single["fuelScore"]
+        assert swept["slope"] == pytest.approx(single["slope"], rel=1e-4)
+        assert swept["riskScore"] == pytest.approx(single["riskScore"], abs=0.01)
+
+    assert sweep[-1]["fuelScore"] is None
+    assert sweep[-1]["fuelError"] == utils.NO_SATELLITE_DATA_MESSAGE
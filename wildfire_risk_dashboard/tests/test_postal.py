@@ -0,0 +1,61 @@
+import pytest
+from src.wildfire_risk_dashboard import postal, utils
+from src.wildfire_risk_dashboard.cache import GeocodeCache
+
+#############################################################
+
+# --- Postal Index Testing ---
+
+GEONAMES_ROWS = [
+    "US\t57104\tSioux Falls\tSouth Dakota\tSD\tMinnehaha\t099\t\t\t43.5514\t-96.7376\t4",
+    "FR\t69450\tSaint-Cyr-au-Mont-d'Or\tAuvergne-Rhône-Alpes\t84\tRhône\t69\t\t\t45.8167\t4.8167\t5",
+    "BR\t69450-000\tManaquiri\tAmazonas\t04\t\t\t\t\t-3.4411\t-60.4594\t4",
+    "BR\t69900-001\tRio Branco\tAcre\t01\t\t\t\t\t-9.97\t-67.81\t6",
+    "BR\t69900-002\tRio Branco\tAcre\t01\t\t\t\t\t-9.98\t-67.83\t6",
+    "GB\tE14 5AB\tLondon\tEngland\tENG\t\t\t\t\t51.5\t-0.02\t6",
+    "GB\tE14 5AB\tLondon\tEngland\tENG\t\t\t\t\t51.6\t-0.04\t6",
+]
+
+
+@pytest.fixture
+def index(tmp_path):
+    sourcePath = tmp_path / "dump.txt"
+    sourcePath.write_text("\n".join(GEONAMES_ROWS) + "\n", encoding="utf-8")
+    postalIndex = postal.PostalIndex(str(tmp_path / "postal.sqlite"))
+    assert postalIndex.build(str(sourcePath)) == 7 # Six codes plus the 69900-000 prefix centroid
+    return postalIndex
+
+
+def test_postal_index_keys_by_country(index):
+    assert index.get("69450", "FR")["name"].startswith("Saint-Cyr")
+    assert index.get("69450", "BR")["name"] == "Manaquiri, Amazonas"
+    assert index.get("57104", "CA") is None
+
+
+def test_postal_index_handles_cep_suffix(index):
+    assert index.get("69450-000", "br") == index.get("69450000", "BR")
+    # An unlisted CEP falls back to the city-level centroid of its 5-digit prefix
+    fallback = index.get("69900-999", "BR")
+    assert fallback["lat"] == pytest.approx(-9.975)
+    assert index.get("69900", "BR") == fallback
+
+
+def test_postal_index_averages_repeated_codes(index):
+    location = index.get("e14  5ab", "gb")
+    assert location["lat"] == pytest.approx(51.55)
+    assert location["source"] == "postal_index"
+
+
+def test_postal_index_wins_over_geocode_cache(index, tmp_path, monkeypatch):
+    geocodeCache = GeocodeCache(path=str(tmp_path / "geocode.sqlite"))
+    geocodeCache.set("57104", "US", None, None, "no_result") # A stale "not found" from before the index existed
+    monkeypatch.setattr(utils, "postalIndex", index)
+    monkeypatch.setattr(utils, "geocodeCache", geocodeCache)
+    monkeypatch.setattr(utils, "http_get", lambda *args, **kwargs: pytest.fail("network used"))
+
+    location, geocodeSource = utils.geocode_location("57104", "US")
+    assert location["source"] == geocodeSource == "postal_index"
+    assert location["name"] == "Sioux Falls, South Dakota"
+
+    utils.get_geo_coordinates("69450", "FR")
+    assert geocodeCache.get("69450", "FR") is None # Index hits are not cached
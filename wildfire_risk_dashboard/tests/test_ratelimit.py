@@ -0,0 +1,69 @@
+import multiprocessing
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from src.wildfire_risk_dashboard import ratelimit
+
+#############################################################
+
+# --- Rate Limiter Testing ---
+
+def take_tokens(statePath, count):
+    bucket = ratelimit.TokenBucket("test", rate=20, burst=5, statePath=statePath)
+    for _ in range(count):
+        bucket.acquire()
+
+
+def test_bucket_allows_burst_then_paces(tmp_path):
+    bucket = ratelimit.TokenBucket("test", rate=20, burst=5, statePath=str(tmp_path / "bucket.state"))
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(lambda _: bucket.acquire(), range(15)))
+    elapsed = time.monotonic() - start
+
+    # 5 tokens up front, then 10 more at 20 per second
+    assert 0.4 <= elapsed < 1.0
+
+
+def test_bucket_is_shared_between_processes(tmp_path):
+    statePath = str(tmp_path / "bucket.state")
+    context = multiprocessing.get_context("spawn")
+
+    start = time.monotonic()
+    processes = [context.Process(target=take_tokens, args=(statePath, 5)) for _ in range(3)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    elapsed = time.monotonic() - start
+
+    assert all(process.exitcode == 0 for process in processes)
+    assert elapsed >= 0.45 # 15 requests share one bucket: 5 up front, 10 more at 20 per second
+
+
+def test_throttle_halves_rate_and_recovers(tmp_path, monkeypatch):
+    bucket = ratelimit.TokenBucket("test", rate=10, burst=1, statePath=str(tmp_path / "bucket.state"))
+    bucket.throttle("0")
+    assert bucket.get_rate() == pytest.approx(5, abs=0.1)
+
+    bucket.throttle() # Ignored: concurrent 429s only count once per second
+    assert bucket.get_rate() == pytest.approx(5, abs=0.1)
+
+    now = time.time()
+    monkeypatch.setattr(ratelimit.time, "time", lambda: now + 20)
+    assert bucket.get_rate() == 10 # Recovers 5% of the ceiling per second
+
+
+def test_throttle_honours_retry_after(tmp_path):
+    bucket = ratelimit.TokenBucket("test", rate=100, burst=10, statePath=str(tmp_path / "bucket.state"))
+    bucket.throttle("2")
+    assert bucket.try_acquire() == pytest.approx(2, abs=0.1)
+
+
+def test_throttle_caps_retry_after(tmp_path, monkeypatch):
+    monkeypatch.setattr(ratelimit, "RETRY_AFTER_MAX", 3.0)
+    bucket = ratelimit.TokenBucket("test", rate=100, burst=10, statePath=str(tmp_path / "bucket.state"))
+    bucket.throttle("86400")
+    assert bucket.try_acquire() == pytest.approx(3, abs=0.1)
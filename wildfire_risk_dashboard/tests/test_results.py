@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+from src.wildfire_risk_dashboard.results import RESULT_COLUMNS, RiskResult, RiskResultBatch
+
+#############################################################
+
+# --- Result Testing ---
+
+def make_results(count):
+    return [
+        RiskResult(id=str(i), lat=40.0 + i, lon=-105.0, radius=30.0, riskScore=float(i),
+                   fuelScore=None if i % 2 else 20.0, fuelError="no data" if i % 2 else None,
+                   source="coordinates", assessedAt=1_700_000_000.0 + i)
+        for i in range(count)
+    ]
+
+
+def test_result_from_assessment_ignores_extra_keys():
+    assessment = {"lat": 40.0, "lon": -105.0, "radius": 30, "riskScore": 42.0, "fuelScore": None, "reused": {}}
+
+    result = RiskResult.from_assessment(assessment, id="a", source="coordinates")
+
+    assert result.riskScore == 42.0 and result.id == "a"
+    assert result.assessedAt is not None
+    assert list(result.to_dict()) == RESULT_COLUMNS
+    assert not hasattr(result, "__dict__")
+
+
+def test_batch_grows_and_round_trips_missing_values():
+    results = make_results(5)
+    batch = RiskResultBatch(capacity=2)
+    batch.extend(results)
+
+    assert len(batch) == 5
+    assert list(batch) == results
+    assert batch[-1] == results[4]
+    assert np.isnan(batch.column("fuelScore")[1])
+    assert [row["fuelScore"] for row in batch.to_rows()] == [20.0, None, 20.0, None, 20.0]
+
+
+def test_batch_to_arrow_shares_numeric_buffers(tmp_path):
+    parquet = pytest.importorskip("pyarrow.parquet")
+    batch = RiskResultBatch.from_results(make_results(4))
+
+    table = batch.to_arrow()
+
+    assert table.column("lat").chunk(0).buffers()[1].address == batch.column("lat").ctypes.data
+    assert table.column("fuelScore").to_pylist() == [20.0, None, 20.0, None]
+
+    batch.write_parquet(tmp_path / "results.parquet")
+    assert parquet.read_table(tmp_path / "results.parquet").equals(table)
@@ -0,0 +1,71 @@
+import pytest
+from src.wildfire_risk_dashboard import pipeline, reuse
+
+#############################################################
+
+# --- Spatial Reuse Testing ---
+
+WEATHER = {"temp": 293.15, "humidity": 50, "windSpeed": 5.55, "weatherScore": 50.0}
+FUEL = {"ndvi": 0.2, "fuelScore": 100.0}
+SLOPE = {"slope": 15.0, "slopeScore": 50.0}
+
+
+def counting_stages(calls):
+    def make(name, result):
+        def stage(lat, lon, radius):
+            calls.append(name)
+            return result
+        return stage
+    return {"weather": make("weather", WEATHER), "fuel": make("fuel", FUEL), "slope": make("slope", SLOPE)}
+
+
+def test_grid_finds_neighbors_across_cells():
+    index = reuse.ReuseIndex(tolerances={"slope": (50.0, 60.0)})
+    index.add("slope", 43.5447, -96.7311, 30, SLOPE)
+
+    # About 34 m away: in range, whichever cells the two points fall in
+    values, info = index.lookup("slope", 43.5447 + 0.00025, -96.7311 + 0.00025, 30)
+    assert values == SLOPE
+    assert 30 < info["distance"] < 40
+    assert index.lookup("slope", 43.5447 + 0.001, -96.7311, 30) is None # About 111 m away
+    assert index.lookup("slope", 43.5447, -96.7311, 100) is None # Different radius
+
+
+def test_interpolates_between_neighbors():
+    index = reuse.ReuseIndex(tolerances={"slope": (100.0, 60.0)})
+    index.add("slope", 43.5, -96.7, 30, {"slope": 10.0, "slopeScore": 33.33})
+    index.add("slope", 43.5 + 0.0006, -96.7, 30, {"slope": 20.0, "slopeScore": 66.67})
+
+    values, info = index.lookup("slope", 43.5 + 0.0003, -96.7, 30) # Halfway
+    assert info["mode"] == "interpolated" and info["neighbors"] == 2
+    assert values["slope"] == pytest.approx(15.0)
+    assert values["slopeScore"] == pytest.approx(50.0)
+
+
+def test_expired_results_are_not_reused(monkeypatch):
+    index = reuse.ReuseIndex(tolerances={"weather": (1000.0, 600.0)})
+    index.add("weather", 43.5, -96.7, 30, WEATHER)
+
+    now = reuse.time.time()
+    monkeypatch.setattr(reuse.time, "time", lambda: now + 601)
+    assert index.lookup("weather", 43.5, -96.7, 30) is None
+
+
+def test_assessment_reuses_nearby_components(monkeypatch):
+    monkeypatch.setattr(pipeline, "reuseIndex", reuse.ReuseIndex())
+    calls = []
+
+    first = pipeline.assess_location(43.5447, -96.7311, 30, stages=counting_stages(calls))
+    assert first["reused"] == {}
+
+    # 3 m away: fuel and slope are reused, weather (1 km tolerance) too
+    second = pipeline.assess_location(43.54473, -96.7311, 30, stages=counting_stages(calls))
+    assert sorted(calls) == ["fuel", "slope", "weather"] # Only the first assessment fetched
+    assert set(second["reused"]) == {"weather", "fuel", "slope"}
+    assert second["reused"]["slope"]["distance"] == pytest.approx(3.3, abs=0.1)
+    assert second["riskScore"] == first["riskScore"]
+
+    # 500 m away: only the weather is close enough
+    third = pipeline.assess_location(43.5492, -96.7311, 30, stages=counting_stages(calls))
+    assert set(third["reused"]) == {"weather"}
+    assert sorted(calls[3:]) == ["fuel", "slope"]
@@ -0,0 +1,151 @@
+import struct
+import urllib.error
+import urllib.request
+import zlib
+
+import numpy as np
+import pytest
+from src.wildfire_risk_dashboard import tiles, utils
+
+#############################################################
+
+# --- Risk Tile Testing ---
+
+def decode_png(png):
+    assert png[:8] == tiles.PNG_SIGNATURE
+    chunks = {}
+    position = 8
+    while position < len(png):
+        length, = struct.unpack(">I", png[position:position + 4])
+        chunkType = png[position + 4:position + 8]
+        data = png[position + 8:position + 8 + length]
+        assert struct.unpack(">I", png[position + 8 + length:position + 12 + length])[0] == zlib.crc32(chunkType + data)
+        chunks[chunkType] = data
+        position += 12 + length
+
+    width, height, bitDepth, colorType = struct.unpack(">IIBB", chunks[b"IHDR"][:10])
+    assert (bitDepth, colorType) == (8, 6)
+    rows = np.frombuffer(zlib.decompress(chunks[b"IDAT"]), dtype=np.uint8).reshape(height, width * 4 + 1)
+    assert not rows[:, 0].any() # Filter type 0 on every scanline
+    return rows[:, 1:].reshape(height, width, 4)
+
+
+def test_png_round_trip():
+    image = np.random.default_rng(0).integers(0, 256, (4, 6, 4), dtype=np.uint8)
+    assert np.array_equal(decode_png(tiles.encode_png(image)), image)
+
+
+def test_tile_bounds():
+    south, west, north, east = tiles.get_tile_bounds(0, 0, 0)
+    assert (west, east) == (-180, 180)
+    assert north == pytest.approx(85.0511, abs=1e-4) and south == pytest.approx(-85.0511, abs=1e-4)
+
+    south, west, north, east = tiles.get_tile_bounds(1, 1, 0) # North-east quadrant
+    assert (south, west, east) == (0, 0, 180)
+
+
+def test_risk_grid_uses_one_fetch_per_provider(monkeypatch):
+    calls = {"weather": 0, "elevation": 0, "ndvi": 0}
+
+    def fake_weather(lat, lon):
+        calls["weather"] += 1
+        return {"main": {"temp": 303.15, "humidity": 20}, "wind": {"speed": 9.0}}
+
+    def fake_elevation_grid(lats, lons):
+        calls["elevation"] += 1
+        return np.add.outer(np.zeros(len(lats)), np.arange(len(lons)) * 5.0)
+
+    def fake_ndvi_batch(points):
+        calls["ndvi"] += 1
+        ndvis = np.full(len(points), 0.3)
+        ndvis[0] = np.nan # Water in the north-west corner
+        return ndvis
+
+    monkeypatch.setattr(utils, "get_weather_data", fake_weather)
+    monkeypatch.setattr(utils, "get_elevation_grid", fake_elevation_grid)
+    monkeypatch.setattr(utils, "get_ndvi_batch", fake_ndvi_batch)
+
+    riskGrid = tiles.compute_risk_grid(*tiles.get_tile_bounds(14, 3786, 5969), samples=8)
+    assert calls == {"weather": 1, "elevation": 1, "ndvi": 1}
+    assert riskGrid.shape == (8, 8)
+    assert np.isnan(riskGrid[0, 0]) and not np.isnan(riskGrid[1:, 1:]).any()
+
+    image = tiles.colorize_risk(riskGrid)
+    assert image.shape == (256, 256, 4)
+    assert image[0, 0, 3] == 0 and image[255, 255, 3] == tiles.TILE_ALPHA
+
+
+def test_tile_cache_renders_once_per_epoch(tmp_path, monkeypatch):
+    renders = []
+    def fake_render(z, x, y):
+        renders.append((z, x, y))
+        return b"png"
+
+    monkeypatch.setattr(tiles, "get_data_epoch", lambda: "epoch-1")
+    tileCache = tiles.TileCache(directory=str(tmp_path))
+    assert tileCache.get_tile(14, 1, 2, fake_render) == b"png"
+    assert tileCache.get_tile(14, 1, 2, fake_render) == b"png"
+    assert tiles.TileCache(directory=str(tmp_path)).get_tile(14, 1, 2, fake_render) == b"png" # From disk
+    assert renders == [(14, 1, 2)]
+
+    monkeypatch.setattr(tiles, "get_data_epoch", lambda: "epoch-2")
+    tileCache.get_tile(14, 1, 2, fake_render)
+    assert len(renders) == 2
+    assert not (tmp_path / "epoch-1").exists()
+
+    with pytest.raises(ValueError):
+        tileCache.get_tile(1, 2, 0, fake_render)
+
+
+def test_tile_server_serves_png(tmp_path, monkeypatch):
+    blankTile = tiles.encode_png(np.zeros((2, 2, 4), dtype=np.uint8))
+    monkeypatch.setattr(tiles, "render_risk_tile", lambda z, x, y: blankTile)
+    server = tiles.start_tile_server(tileCache=tiles.TileCache(directory=str(tmp_path)))
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/tiles/14/3786/5969.png"
+        with urllib.request.urlopen(url) as response:
+            assert response.headers["Content-Type"] == "image/png"
+            assert response.read().startswith(tiles.PNG_SIGNATURE)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_failed_render_releases_lock_and_hides_error(tmp_path, monkeypatch):
+    def failing_render(z, x, y):
+        raise RuntimeError("https://api.example.com/?appid=secret")
+
+    monkeypatch.setattr(tiles, "render_risk_tile", failing_render)
+    tileCache = tiles.TileCache(directory=str(tmp_path))
+    with pytest.raises(RuntimeError):
+        tileCache.get_tile(14, 1, 2)
+    assert tileCache._renderLocks == {}
+
+    server = tiles.start_tile_server(tileCache=tileCache)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/tiles/14/3786/5969.png"
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(url)
+        assert error.value.code == 502
+        assert b"secret" not in error.value.read()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_tile_server_only_returns_404_for_missing_tiles(tmp_path, monkeypatch):
+    def failing_render(z, x, y):
+        raise ValueError("No DEM tile covers 43.5, -96.7 in /srv/dem")
+
+    monkeypatch.setattr(tiles, "render_risk_tile", failing_render)
+    server = tiles.start_tile_server(tileCache=tiles.TileCache(directory=str(tmp_path)))
+    try:
+        baseUrl = f"http://127.0.0.1:{server.server_address[1]}/tiles"
+        for path, status in (("14/3786/5969.png", 502), ("2/4/0.png", 404), ("99/0/0.png", 404), ("a/b/c.png", 404)):
+            with pytest.raises(urllib.error.HTTPError) as error:
+                urllib.request.urlopen(f"{baseUrl}/{path}")
+            assert error.value.code == status
+            assert b"DEM" not in error.value.read()
+    finally:
+        server.shutdown()
+        server.server_close()
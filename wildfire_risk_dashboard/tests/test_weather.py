@@ -1,3 +1,6 @@
+import math
+
+import numpy as np
 import pytest
 from src.wildfire_risk_dashboard import utils
 from src.wildfire_risk_dashboard import wildfire_risk_dashboard as wrd
@@ -66,6 +69,103 @@ def test_get_elevation_data():
     assert len(elevationData["elevation"]) == 4
 
 
+#############################################################
+
+# --- HTTP Client Testing ---
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+def test_http_get_retries_throttled_and_server_errors(monkeypatch):
+    responses = [FakeResponse(429, {"Retry-After": "0"}), FakeResponse(503), FakeResponse(200)]
+    calls = []
+
+    def fake_get(url, params=None, timeout=None):
+        calls.append(timeout)
+        return responses[len(calls) - 1]
+
+    monkeypatch.setattr(utils.get_http_session(), "get", fake_get)
+    monkeypatch.setattr(utils.time, "sleep", lambda seconds: None)
+
+    assert utils.http_get("https://example.com").status_code == 200
+    assert len(calls) == 3
+    assert calls[0] == (utils.HTTP_CONNECT_TIMEOUT, utils.HTTP_READ_TIMEOUT)
+
+
+def test_http_get_raises_when_server_errors_outlast_retries(monkeypatch):
+    response = utils.requests.Response()
+    response.status_code = 503
+    calls = []
+
+    def fake_get(url, params=None, timeout=None):
+        calls.append(url)
+        return response
+
+    monkeypatch.setattr(utils.get_http_session(), "get", fake_get)
+    monkeypatch.setattr(utils.time, "sleep", lambda seconds: None)
+
+    with pytest.raises(utils.requests.HTTPError):
+        utils.http_get("https://example.com", maxRetries=2)
+    assert len(calls) == 3
+
+
+def test_http_get_leaves_throttled_retries_to_the_limiter(monkeypatch):
+    responses = [FakeResponse(429, {"Retry-After": "5"}), FakeResponse(200)]
+    calls = []
+    sleeps = []
+
+    class FakeLimiter:
+        def acquire(self):
+            calls.append("acquire")
+
+        def throttle(self, retryAfter):
+            calls.append(("throttle", retryAfter))
+
+    def fake_get(url, params=None, timeout=None):
+        calls.append("get")
+        return responses[calls.count("get") - 1]
+
+    monkeypatch.setattr(utils.get_http_session(), "get", fake_get)
+    monkeypatch.setattr(utils.ratelimit, "get_rate_limiter", lambda provider: FakeLimiter())
+    monkeypatch.setattr(utils.time, "sleep", sleeps.append)
+
+    assert utils.http_get("https://example.com", provider="openweather").status_code == 200
+    assert calls == ["acquire", "get", ("throttle", "5"), "acquire", "get"]
+    assert sleeps == [] # The limiter's acquire() is the only wait
+
+
+def test_http_get_gives_up_after_max_retries(monkeypatch):
+    calls = []
+
+    def fake_get(url, params=None, timeout=None):
+        calls.append(url)
+        raise utils.requests.ConnectionError("connection reset")
+
+    monkeypatch.setattr(utils.get_http_session(), "get", fake_get)
+    monkeypatch.setattr(utils.time, "sleep", lambda seconds: None)
+
+    with pytest.raises(utils.requests.ConnectionError):
+        utils.http_get("https://example.com", maxRetries=2)
+    assert len(calls) == 3
+
+
+def test_backoff_delay_is_bounded():
+    for attempt in range(10):
+        assert 0 <= utils.get_backoff_delay(attempt) <= utils.HTTP_BACKOFF_MAX
+    assert utils.get_backoff_delay(0, "7") >= 7
+    assert utils.get_backoff_delay(0, "86400") == utils.HTTP_RETRY_AFTER_MAX
+
+
+def test_earth_engine_requires_a_project(monkeypatch):
+    monkeypatch.setattr(utils, "EE_PROJECT", None)
+    utils.reset_provider_clients()
+    with pytest.raises(RuntimeError, match="EARTHENGINE_PROJECT"):
+        utils.get_earth_engine()
+
+
 #############################################################
 
 # --- Weather Data Testing ---
@@ -159,6 +259,35 @@ def test_slope_calculation_and_normalization():
     assert slope_deg > 0
     assert risk_score == pytest.approx((slope_deg / 30) * 100)
 
+def test_steepness_matches_geodesic_distances():
+    from geopy import distance
+
+    lat, lon = 43.5447, -96.7311
+    coords = wrd.get_neighboring_coords(lat, lon, 30)
+    mock_elevations = {"north": 452, "east": 470, "south": 431, "west": 440}
+
+    dz1 = mock_elevations["east"] - mock_elevations["west"]
+    dz2 = mock_elevations["north"] - mock_elevations["south"]
+    dx = distance.distance(coords["west"], coords["east"]).meters
+    dy = distance.distance(coords["south"], coords["north"]).meters
+    geodesic_slope = math.degrees(math.atan(math.sqrt(((dz1 / dx) ** 2) + ((dz2 / dy) ** 2))))
+
+    assert wrd.get_steepness(mock_elevations, coords) == pytest.approx(geodesic_slope, rel=1e-5)
+
+
+def test_steepness_batch_matches_scalar():
+    lats = [43.5447, -12.0, 61.2]
+    lons = [-96.7311, -63.1, 10.7]
+    elevations = [[452, 470, 431, 440], [100, 100, 100, 100], [890, 870, 905, 910]]
+
+    batch_slopes = wrd.get_steepness_batch(elevations, lats, 30)
+
+    for i in range(len(lats)):
+        coords = wrd.get_neighboring_coords(lats[i], lons[i], 30)
+        elevationsDic = wrd.grab_elevations({"elevation": elevations[i]})
+        assert batch_slopes[i] == pytest.approx(wrd.get_steepness(elevationsDic, coords), rel=1e-9)
+
+
 def test_flat_ground_slope():
     # Scenario: All elevations are 440m
     mock_elevations = {"current": 440, "north": 440, "east": 440, "south": 440, "west": 440}
@@ -180,4 +309,115 @@ def test_calculate_risk_score_extremes():
     
     # Test 3: Realistic "High Risk" (High wind, dry grass, flat land)
     # (90 * 0.4) + (80 * 0.4) + (10 * 0.2) = 36 + 32 + 2 = 70
-    assert wrd.calculate_risk_score(90, 80, 10) == 70.0
\ No newline at end of file
+    assert wrd.calculate_risk_score(90, 80, 10) == 70.0
+
+#############################################################
+
+# --- Batch Scoring Testing ---
+
+def test_batch_scores_match_scalar_scores():
+    # Sweep every input across its thresholds so each branch of the scalar scorers is hit
+    temps = [263.15, 283.15, 288.15, 293.15, 300.0, 303.15, 310.0]
+    humidities = [10, 30, 45, 50, 60, 70, 90]
+    windSpeeds = [0.0, 2.78, 4.0, 5.55, 7.5, 8.33, 12.0]
+    ndvis = [-0.3, 0.0, 0.1, 0.2, 0.45, 0.8, None]
+    slopes = [0.0, 2.5, 10.0, 17.3, 29.9, 30.0, 45.0]
+
+    batch = wrd.score_batch(temps, humidities, windSpeeds, ndvis, slopes)
+
+    for i in range(len(temps)):
+        weatherData = {"main": {"temp": temps[i], "humidity": humidities[i]}, "wind": {"speed": windSpeeds[i]}}
+        t_score = wrd.normalize_temperature(weatherData)
+        h_score = wrd.normalize_humidity(weatherData)
+        w_score = wrd.normalize_wind_speed(weatherData)
+        weatherScore = wrd.calculate_weather_score(t_score, h_score, w_score)
+        fuelScore = None if ndvis[i] is None else wrd.normalize_fuel(ndvis[i])
+        slopeScore = wrd.normalize_slope(slopes[i])
+
+        assert batch["tempScore"][i] == t_score
+        assert batch["humidityScore"][i] == h_score
+        assert batch["windScore"][i] == w_score
+        assert batch["weatherScore"][i] == weatherScore
+        assert batch["slopeScore"][i] == slopeScore
+        assert batch["riskScore"][i] == wrd.calculate_risk_score(weatherScore, fuelScore, slopeScore)
+        if fuelScore is None:
+            assert math.isnan(batch["fuelScore"][i])
+        else:
+            assert batch["fuelScore"][i] == fuelScore
+
+
+def test_grab_weather_columns():
+    weatherDataList = [
+        {"main": {"temp": 308.15, "humidity": 20}, "wind": {"speed": 11.11}},
+        {"main": {"temp": 293.15, "humidity": 50}, "wind": {"speed": 5.55}}
+    ]
+
+    temps, humidities, windSpeeds = wrd.grab_weather_columns(weatherDataList)
+
+    assert list(temps) == [308.15, 293.15]
+    assert list(humidities) == [20, 50]
+    assert list(windSpeeds) == [11.11, 5.55]
+
+
+#############################################################
+
+# --- Raster Slope Testing ---
+
+def test_slope_grid_on_inclined_plane():
+    # A plane rising 1m for every 2m east has a slope of atan(0.5), approx 26.57 degrees, in every cell
+    lats, lons = wrd.get_grid_coords(43.54, -96.74, 43.55, -96.72, 30)
+    cellSizeX = (lons[1] - lons[0]) * wrd.get_meters_per_degree(lats)[1]
+    eastMeters = np.cumsum(np.broadcast_to(cellSizeX[:, None], (lats.size, lons.size)), axis=1)
+    elevationGrid = 440 + 0.5 * eastMeters
+
+    slope, slopeScore = wrd.get_slope_rasters(elevationGrid, lats, lons)
+
+    assert slope.shape == (lats.size, lons.size)
+    assert slope == pytest.approx(np.full(slope.shape, math.degrees(math.atan(0.5))))
+    assert slopeScore == pytest.approx(wrd.normalize_slope_batch(slope))
+
+
+def test_slope_rasters_reject_single_row_grid():
+    with pytest.raises(ValueError):
+        wrd.get_slope_rasters(np.full((1, 3), 440.0), [43.54], [-96.74, -96.73, -96.72])
+
+
+def test_slope_grid_flat_ground():
+    slope = wrd.get_slope_grid(np.full((4, 5), 440.0), 30, 30)
+    assert np.all(slope == 0.0)
+
+
+#############################################################
+
+# --- Batched Elevation Testing ---
+
+def test_neighboring_coords_batch_matches_scalar():
+    lats, lons = [43.5447, -12.0], [-96.7311, -63.1]
+    neighborLats, neighborLons = wrd.get_neighboring_coords_batch(lats, lons, 30)
+
+    for i in range(len(lats)):
+        coords = wrd.get_neighboring_coords(lats[i], lons[i], 30)
+        for j, direction in enumerate(["north", "east", "south", "west"]):
+            assert neighborLats[i, j] == pytest.approx(coords[direction][0], abs=1e-12)
+            assert neighborLons[i, j] == pytest.approx(coords[direction][1], abs=1e-12)
+
+
+def test_elevation_batch_packs_requests_and_keeps_order(monkeypatch):
+    requests_made = []
+
+    def fake_request_elevation_chunk(lats, lons):
+        requests_made.append(len(lats))
+        return [lat * 10 for lat in lats]
+
+    monkeypatch.setattr(utils, "demTileStore", None)
+    monkeypatch.setattr(utils, "request_elevation_chunk", fake_request_elevation_chunk)
+
+    lats = np.linspace(40, 41, 250)
+    lons = np.linspace(-100, -99, 250)
+    elevations = utils.get_elevation_data_batch(lats, lons, 30)
+    grabbed = wrd.grab_elevations_batch(elevations)
+
+    assert sorted(requests_made) == [100] * 10 # 1000 neighbours, 100 per request
+    assert grabbed["east"] == pytest.approx(lats * 10)
+    assert grabbed["north"] == pytest.approx((lats + 30 / wrd.ONE_DEGREE_OF_LAT_CONST) * 10)
+    assert wrd.get_steepness_batch(grabbed, lats, 30).shape == (250,)